@@ -0,0 +1,97 @@
+"""
+Compare one-connection-per-request against the pooled session that
+socrata.http uses, by posting chunk-sized bodies at a local stub server
+from several threads at once.
+
+    python -m bench.http_pool --requests 2000 --threads 8 --chunk-kb 64
+"""
+import argparse
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+from socrata.authorization import Authorization
+from socrata.http import post
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super(StubServer, self).__init__(('127.0.0.1', 0), StubHandler)
+        self.connections = 0
+        self.lock = Lock()
+
+    def url(self):
+        return 'http://127.0.0.1:{port}/chunk'.format(port = self.server_address[1])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super(StubHandler, self).setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('content-length', 0)))
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def unpooled_post(url, auth, data):
+    # What socrata.http did before it had a session: a fresh connection per call
+    return requests.post(url, auth = auth.basic, data = data, timeout = 60)
+
+def pooled_post(url, auth, data):
+    return post(url, auth = auth, data = data)
+
+def run(server, send, auth, count, threads, body):
+    server.connections = 0
+    url = server.url()
+    started = time.time()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda _: send(url, auth, body), range(count)))
+    elapsed = time.time() - started
+    return {
+        'seconds': elapsed,
+        'requests_per_second': count / elapsed,
+        'mb_per_second': (count * len(body)) / elapsed / (1024 * 1024),
+        'connections': server.connections
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark pooled vs unpooled HTTP')
+    parser.add_argument('--requests', type = int, default = 2000)
+    parser.add_argument('--threads', type = int, default = 8)
+    parser.add_argument('--chunk-kb', type = int, default = 64)
+    args = parser.parse_args()
+
+    server = StubServer()
+    Thread(target = server.serve_forever, daemon = True).start()
+
+    auth = Authorization('127.0.0.1', username = 'bench', password = 'bench', pool_size = args.threads)
+    body = b'x' * (args.chunk_kb * 1024)
+
+    for (name, send) in [('unpooled', unpooled_post), ('pooled', pooled_post)]:
+        result = run(server, send, auth, args.requests, args.threads, body)
+        print('{name:>9}: {requests_per_second:8.1f} req/s {mb_per_second:8.1f} MB/s {connections:6d} connections'.format(
+            name = name,
+            **result
+        ))
+
+    server.shutdown()
+    auth.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Time turning a page of rows from the API into python values, comparing
+sorting the output columns for every row (how it used to work) against
+each of the row formats OutputSchema.rows supports now.
+
+    python -m bench.munge_rows --rows 500 --columns 300
+"""
+import argparse
+import timeit
+from socrata.authorization import Authorization
+from socrata.output_schema import OutputSchema
+
+def make_output_schema(columns):
+    auth = Authorization('localhost', username = 'bench', password = 'bench')
+    return OutputSchema(auth, {
+        'resource': {
+            'id': 1,
+            # Positions deliberately out of order, so sorting has work to do
+            'output_columns': [
+                {'field_name': 'column_%d' % i, 'position': (i * 7) % columns}
+                for i in range(columns)
+            ]
+        },
+        'links': {}
+    })
+
+def make_page(rows, columns):
+    return [{'row': [{'ok': str(r * c)} for c in range(columns)]} for r in range(rows)]
+
+def munge_row_per_row_sort(output_schema, row):
+    row = row['row']
+    columns = sorted(output_schema.attributes['output_columns'], key = lambda oc: oc['position'])
+    field_names = [oc['field_name'] for oc in columns]
+    return {k: v for k, v in zip(field_names, row)}
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark row materialization')
+    parser.add_argument('--rows', type = int, default = 500)
+    parser.add_argument('--columns', type = int, default = 300)
+    parser.add_argument('--repeat', type = int, default = 20)
+    args = parser.parse_args()
+
+    output_schema = make_output_schema(args.columns)
+    page = make_page(args.rows, args.columns)
+
+    cases = [
+        ('sort per row', lambda: [munge_row_per_row_sort(output_schema, row) for row in page]),
+        ('dict', lambda: output_schema._shape_rows(page, 'dict')),
+        ('tuple', lambda: output_schema._shape_rows(page, 'tuple')),
+        ('columns', lambda: output_schema._shape_rows(page, 'columns'))
+    ]
+    for (name, fun) in cases:
+        seconds = min(timeit.repeat(fun, number = 1, repeat = args.repeat))
+        print('{name:>12}: {ms:8.2f} ms per page'.format(name = name, ms = seconds * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Time building the Source -> InputSchema -> OutputSchema trees for a large
+revision, which happens every time its sources are listed or polled.
+
+    python -m bench.resource_construction --sources 200 --schemas 3 --outputs 5
+"""
+import argparse
+import timeit
+from socrata.authorization import Authorization
+from socrata.resource import Collection
+from socrata.sources import Source
+
+SOURCE_OPS = ['show', 'update', 'initiate', 'chunk', 'commit', 'bytes', 'add_to_revision', 'show_input_schema']
+INPUT_SCHEMA_OPS = ['show', 'transform', 'latest_output']
+OUTPUT_SCHEMA_OPS = ['show', 'rows', 'schema_errors', 'schema_errors_csv', 'build_config', 'validate_row_id']
+
+def source_response(source_id, schemas, outputs):
+    prefix = '/api/publishing/v1/source/%d' % source_id
+    schema = prefix + '/schema/{input_schema_id}'
+    output = schema + '/output/{output_schema_id}'
+    links = {name: prefix + '/' + name for name in SOURCE_OPS}
+    links['input_schema_links'] = {name: schema + '/' + name for name in INPUT_SCHEMA_OPS}
+    links['input_schema_links']['output_schema_links'] = {name: output + '/' + name for name in OUTPUT_SCHEMA_OPS}
+
+    return {
+        'resource': {
+            'id': source_id,
+            'finished_at': None,
+            'failed_at': None,
+            'schemas': [
+                {
+                    'id': source_id * 1000 + s,
+                    'output_schemas': [
+                        {'id': (source_id * 1000 + s) * 1000 + o, 'output_columns': []}
+                        for o in range(outputs)
+                    ]
+                }
+                for s in range(schemas)
+            ]
+        },
+        'links': links
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark building resource trees')
+    parser.add_argument('--sources', type = int, default = 200)
+    parser.add_argument('--schemas', type = int, default = 3)
+    parser.add_argument('--outputs', type = int, default = 5)
+    parser.add_argument('--repeat', type = int, default = 10)
+    args = parser.parse_args()
+
+    auth = Authorization('localhost', username = 'bench', password = 'bench')
+    collection = Collection(auth)
+    responses = [source_response(i, args.schemas, args.outputs) for i in range(args.sources)]
+    objects = args.sources * (1 + args.schemas * (1 + args.outputs))
+
+    def build():
+        return collection._subresources(Source, responses)
+
+    def build_and_walk():
+        return [
+            o_s.attributes['id']
+            for source in build()
+            for i_s in source.input_schemas
+            for o_s in i_s.output_schemas
+        ]
+
+    cases = [
+        ('build', build),
+        ('build and walk', build_and_walk)
+    ]
+    print('{sources} sources, {objects} objects'.format(sources = args.sources, objects = objects))
+    for (name, fun) in cases:
+        seconds = min(timeit.repeat(fun, number = 1, repeat = args.repeat))
+        print('{name:>16}: {ms:8.2f} ms, {us:6.2f} us per object'.format(
+            name = name,
+            ms = seconds * 1000,
+            us = seconds * 1e6 / objects
+        ))
+
+if __name__ == '__main__':
+    main()
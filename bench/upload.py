@@ -0,0 +1,364 @@
+"""
+Measure upload throughput through Source._chunked_bytes, for each kind of
+thing that can be uploaded (a file, bytes, a str, a generator and a
+DataFrame), across chunk sizes and levels of parallelism. Chunks are sent
+to a local sink that reads and throws them away.
+
+Each case runs in a fresh interpreter, so that its peak RSS and CPU time
+are its own. Results are written out as JSON, and two result files can be
+compared to flag regressions:
+
+    python -m bench.upload run --size-mb 64 --output baseline.json
+    python -m bench.upload run --size-mb 64 --output current.json
+    python -m bench.upload compare baseline.json current.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock
+
+INPUTS = ['file', 'bytes', 'str', 'generator', 'dataframe']
+DEFAULT_CHUNK_SIZES = '256K,1M,4M'
+DEFAULT_PARALLELISM = '1,4,8'
+# Lines handed out at a time by the generator input
+GENERATOR_BATCH_BYTES = 64 * 1024
+
+# (metric, whether bigger is better)
+METRICS = [
+    ('mb_per_second', True),
+    ('cpu_seconds_per_mb', False),
+    ('peak_rss_mb', False)
+]
+
+
+class SinkServer(ThreadingHTTPServer):
+    """
+    Speaks just enough of the upload protocol to take a source's chunks.
+    The preferred chunk size and parallelism handed back by initiate come
+    from the path, so one sink can serve every case.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super(SinkServer, self).__init__(('127.0.0.1', 0), SinkHandler)
+        self.bytes_received = 0
+        self.lock = Lock()
+
+    @property
+    def domain(self):
+        return '127.0.0.1:{port}'.format(port = self.server_address[1])
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        (chunk_size, parallelism) = re.match(r'/bench/(\d+)/(\d+)/', self.path).groups()
+        self.respond(source_response(int(chunk_size), int(parallelism)))
+
+    def do_POST(self):
+        length = int(self.headers.get('content-length', 0))
+        initiate = re.match(r'/bench/(\d+)/(\d+)/initiate', self.path)
+        if initiate:
+            (chunk_size, parallelism) = initiate.groups()
+            response = {
+                'preferred_chunk_size': int(chunk_size),
+                'preferred_upload_parallelism': int(parallelism)
+            }
+            # Whatever compression the client asks for is fine, since the
+            # chunks are thrown away without being decoded
+            content_encoding = json.loads(self.rfile.read(length)).get('content_encoding')
+            if content_encoding:
+                response['content_encoding'] = content_encoding
+            return self.respond(response)
+
+        remaining = length
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        with self.server.lock:
+            self.server.bytes_received += length
+        self.respond({})
+
+    def respond(self, body):
+        body = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def source_response(chunk_size, parallelism):
+    prefix = '/bench/{chunk_size}/{parallelism}'.format(chunk_size = chunk_size, parallelism = parallelism)
+    return {
+        'resource': {'id': 1, 'schemas': []},
+        'links': {
+            'show': prefix + '/show',
+            'initiate': prefix + '/initiate',
+            'chunk': prefix + '/chunk/{seq_num}/{byte_offset}',
+            'commit': prefix + '/commit/{seq_num}/{byte_offset}'
+        }
+    }
+
+def parse_size(size):
+    units = {'': 1, 'K': 1024, 'M': 1024 * 1024}
+    (number, unit) = re.match(r'^(\d+)([KM]?)B?$', size.strip().upper()).groups()
+    return int(number) * units[unit]
+
+def format_size(size):
+    for (unit, scale) in [('M', 1024 * 1024), ('K', 1024)]:
+        if size % scale == 0:
+            return '%d%s' % (size // scale, unit)
+    return str(size)
+
+def write_csv(path, size):
+    with open(path, 'w') as f:
+        f.write('id,name,amount,day\n')
+        written = 0
+        i = 0
+        while written < size:
+            lines = ''.join(
+                '{i},name {n},{amount:.2f},2020-01-{day:02d}\n'.format(i = j, n = j % 997, amount = j * 0.37, day = j % 28 + 1)
+                for j in range(i, i + 10000)
+            )
+            f.write(lines)
+            written += len(lines)
+            i += 10000
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def prepare(kind, path):
+    if kind == 'file':
+        return open(path, 'rb')
+    if kind == 'bytes':
+        with open(path, 'rb') as f:
+            return f.read()
+    if kind == 'str':
+        with open(path, 'r') as f:
+            return f.read()
+    if kind == 'generator':
+        def lines():
+            with open(path, 'rb') as f:
+                for batch in iter(lambda: f.readlines(GENERATOR_BATCH_BYTES), []):
+                    yield b''.join(batch)
+        return lines()
+    if kind == 'dataframe':
+        import pandas
+        return pandas.read_csv(path)
+    raise ValueError('Unknown input %s' % kind)
+
+def run_case(domain, kind, path, chunk_size, parallelism, compression = None):
+    """
+    Upload one input once, in this process, and return its measurements
+    """
+    from socrata.authorization import Authorization
+    from socrata.sources import Source
+
+    auth = Authorization(domain, username = 'bench', password = 'bench')
+    auth.proto = 'http://'
+    source = Source(auth, source_response(chunk_size, parallelism))
+    thing = prepare(kind, path)
+    input_rss_mb = peak_rss_mb()
+
+    mb = os.path.getsize(path) / (1024.0 * 1024.0)
+    cpu_started = cpu_seconds()
+    started = time.time()
+    if kind == 'dataframe':
+        source.df(thing, backoff_seconds = 0, compression = compression)
+    else:
+        source.csv(thing, backoff_seconds = 0, compression = compression)
+    elapsed = time.time() - started
+    cpu = cpu_seconds() - cpu_started
+
+    if hasattr(thing, 'close'):
+        thing.close()
+    auth.close()
+    return {
+        'mb_per_second': mb / elapsed,
+        'cpu_seconds_per_mb': cpu / mb,
+        'peak_rss_mb': peak_rss_mb(),
+        'input_rss_mb': input_rss_mb
+    }
+
+def run_isolated(domain, kind, path, chunk_size, parallelism, compression = None):
+    out = subprocess.run(
+        [
+            sys.executable, '-m', 'bench.upload', 'case',
+            '--domain', domain,
+            '--input', kind,
+            '--path', path,
+            '--chunk-size', str(chunk_size),
+            '--parallelism', str(parallelism)
+        ] + (['--compression', compression] if compression else []),
+        stdout = subprocess.PIPE,
+        check = True
+    )
+    return json.loads(out.stdout.decode())
+
+def best_of(results):
+    best = {}
+    for (metric, bigger_is_better) in METRICS + [('input_rss_mb', False)]:
+        values = [r[metric] for r in results]
+        best[metric] = max(values) if bigger_is_better else min(values)
+    return best
+
+def has_pandas():
+    try:
+        import pandas
+        return True
+    except ImportError:
+        return False
+
+def run(args):
+    inputs = args.inputs.split(',')
+    if 'dataframe' in inputs and not has_pandas():
+        print('pandas is not installed, skipping the dataframe input')
+        inputs.remove('dataframe')
+    chunk_sizes = [parse_size(s) for s in args.chunk_sizes.split(',')]
+    parallelisms = [int(p) for p in args.parallelism.split(',')]
+
+    server = SinkServer()
+    Thread(target = server.serve_forever, daemon = True).start()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.csv')
+        write_csv(path, args.size_mb * 1024 * 1024)
+
+        for kind in inputs:
+            for chunk_size in chunk_sizes:
+                for parallelism in parallelisms:
+                    name = '{kind}/{chunk_size}/{parallelism}'.format(
+                        kind = kind + ('+' + args.compression if args.compression else ''),
+                        chunk_size = format_size(chunk_size),
+                        parallelism = parallelism
+                    )
+                    results[name] = best_of([
+                        run_isolated(server.domain, kind, path, chunk_size, parallelism, args.compression)
+                        for _ in range(args.repeat)
+                    ])
+                    print('{name:>22}: {mb_per_second:8.1f} MB/s {cpu_seconds_per_mb:7.4f} cpu s/MB {peak_rss_mb:8.1f} MB peak RSS'.format(
+                        name = name,
+                        **results[name]
+                    ))
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpus': os.cpu_count(),
+                    'size_mb': args.size_mb,
+                    'repeat': args.repeat,
+                    'compression': args.compression,
+                    'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+                },
+                'results': results
+            }, f, indent = 2, sort_keys = True)
+
+def compare_results(baseline, current, threshold):
+    """
+    Returns a list of (case, metric, baseline value, current value, change)
+    for every metric of every case in both runs, and the subset of those
+    which got worse by more than `threshold`, as a fraction of the baseline.
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        for (metric, bigger_is_better) in METRICS:
+            (before, after) = (baseline[name][metric], current[name][metric])
+            change = (after - before) / before if before else 0.0
+            row = (name, metric, before, after, change)
+            rows.append(row)
+            worse = -change if bigger_is_better else change
+            if worse > threshold:
+                regressions.append(row)
+    return (rows, regressions)
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline['meta']['size_mb'] != current['meta']['size_mb']:
+        print('Warning: the runs uploaded different amounts of data ({before} MB vs {after} MB)'.format(
+            before = baseline['meta']['size_mb'],
+            after = current['meta']['size_mb']
+        ))
+
+    (rows, regressions) = compare_results(baseline['results'], current['results'], args.threshold)
+    for (name, metric, before, after, change) in rows:
+        print('{flag:1} {name:>22} {metric:>18}: {before:10.4f} -> {after:10.4f} ({change:+6.1%})'.format(
+            flag = '!' if (name, metric, before, after, change) in regressions else '',
+            name = name,
+            metric = metric,
+            before = before,
+            after = after,
+            change = change
+        ))
+    for name in sorted(set(baseline['results']) ^ set(current['results'])):
+        print('  {name:>22} is only in one of the runs'.format(name = name))
+
+    if regressions:
+        print('{count} regressions beyond {threshold:.0%}'.format(count = len(regressions), threshold = args.threshold))
+        sys.exit(1)
+    print('No regressions beyond {threshold:.0%}'.format(threshold = args.threshold))
+
+def case(args):
+    print(json.dumps(run_case(args.domain, args.input, args.path, args.chunk_size, args.parallelism, args.compression)))
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark upload throughput')
+    commands = parser.add_subparsers(dest = 'command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help = 'Run the benchmarks')
+    run_parser.add_argument('--size-mb', type = int, default = 32)
+    run_parser.add_argument('--inputs', default = ','.join(INPUTS))
+    run_parser.add_argument('--chunk-sizes', default = DEFAULT_CHUNK_SIZES)
+    run_parser.add_argument('--parallelism', default = DEFAULT_PARALLELISM)
+    run_parser.add_argument('--repeat', type = int, default = 1, help = 'Keep the best of this many runs of each case')
+    run_parser.add_argument('--compression', choices = ['gzip', 'zstd'], help = 'Compress the chunks')
+    run_parser.add_argument('--output', help = 'Write the results to this JSON file')
+    run_parser.set_defaults(func = run)
+
+    compare_parser = commands.add_parser('compare', help = 'Flag regressions between two runs')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type = float, default = 0.1)
+    compare_parser.set_defaults(func = compare)
+
+    case_parser = commands.add_parser('case', help = 'Run a single case in this process')
+    case_parser.add_argument('--domain', required = True)
+    case_parser.add_argument('--input', choices = INPUTS, required = True)
+    case_parser.add_argument('--path', required = True)
+    case_parser.add_argument('--chunk-size', type = int, required = True)
+    case_parser.add_argument('--parallelism', type = int, required = True)
+    case_parser.add_argument('--compression', choices = ['gzip', 'zstd'])
+    case_parser.set_defaults(func = case)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ from socrata.views import Views
 from socrata.revisions import Revisions
 from socrata.operations.configured_job import ConfiguredJob
 from socrata.operations.create import Create
+from socrata.operations.batch import Batch, DEFAULT_UPLOAD_PARALLELISM
 
 class Socrata(Collection):
     """
@@ -58,6 +59,48 @@ class Socrata(Collection):
         config = self.configs.lookup(config_name)
         return ConfiguredJob(self, view=view, config=config)
 
+    def using_configs(self, jobs, upload_parallelism = DEFAULT_UPLOAD_PARALLELISM, **kwargs):
+        """
+        Update many datasets, each using a configuration you previously created,
+        as a pipeline: a few datasets upload at a time, and as each upload
+        finishes its validation is waited on while the next ones upload, then
+        it's applied. One dataset failing doesn't stop the others.
+
+        Args:
+        ```
+            jobs (list): A (config, view, file) tuple for each dataset. The config can be a config name or a Config,
+                the view a View or a view id, and the file anything `Source.csv` takes. A fourth item can name the
+                upload method to use instead of csv, ie: 'tsv' or 'geojson'.
+            upload_parallelism (int): Optional number of datasets uploading at once. Defaults to 4.
+            requests_per_second (float): Optional limit on how many polls are made per second, across all of
+                the datasets being waited on. Defaults to 10.
+            polling (PollingStrategy): Optional strategy for how often each dataset is polled, see `socrata.polling`
+            timeout (int): Optional number of seconds to wait on any one dataset's validation (or job)
+            wait_for_jobs (bool): Optional. Wait for each dataset's job to finish after applying it. Defaults to False.
+            progress (function): Optional function called with each BatchResult as it finishes
+
+            Any other arguments are passed to each upload, as for `Source.csv`, ie: compression
+        ```
+
+        Returns:
+        ```
+            results (list): A BatchResult for each job, in the same order, with the revision, output_schema,
+                job and error for that dataset, and how many seconds it spent in each stage in `timings`
+        ```
+
+        Examples:
+        ```python
+            with open('a.csv', 'rb') as a, open('b.csv', 'rb') as b:
+                results = p.using_configs([
+                    ('my-config', 'abcd-1234', a),
+                    ('my-config', 'wxyz-9876', b)
+                ])
+            for result in results:
+                print(result.view_id, result.error, result.timings)
+        ```
+        """
+        return Batch(self, jobs, upload_parallelism, **kwargs).run()
+
     def create(self, **kwargs):
         """
         Shortcut to create a dataset. Returns a `Create` object,
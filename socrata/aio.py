@@ -0,0 +1,216 @@
+"""
+An asyncio interface to the publishing API.
+
+Each async object wraps the blocking object of the same name, and any
+operation it has (including the ones that come from the `links` in API
+responses) can be awaited. The HTTP calls themselves run on a thread pool
+shared by everything made from one `AsyncSocrata`, but waiting on a
+resource is done on the event loop, so a single process can wait on
+hundreds of revisions at once without a thread for each of them.
+
+```python
+from socrata.aio import AsyncSocrata
+
+async def publish(auth, view_id, filename):
+    socrata = AsyncSocrata(auth)
+    view = await socrata.views.lookup(view_id)
+    rev = await view.revisions.create_replace_revision()
+    source = await rev.create_upload(filename)
+    with open(filename, 'rb') as f:
+        source = await source.csv(f)
+    output_schema = await (await source.get_latest_input_schema()).get_latest_output_schema()
+    job = await rev.apply(output_schema = output_schema)
+    return await job.wait_for_finish()
+```
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import RequestException
+from socrata import Socrata
+from socrata.http import noop, UnexpectedResponseException
+from socrata.resource import Collection, Resource, WaitState
+from socrata.polling import FixedInterval
+from socrata.revisions import Revisions, Revision
+from socrata.sources import Source
+from socrata.input_schema import InputSchema
+from socrata.output_schema import OutputSchema
+from socrata.job import Job
+from socrata.operations.operation import Operation
+
+# How many blocking HTTP calls an AsyncSocrata makes at once, by default
+DEFAULT_MAX_WORKERS = 32
+
+def _holds_resources(value):
+    # Lists of children (ie: `source.input_schemas`) are wrapped like the
+    # children themselves; any other list is handed back as it is, so that
+    # changing it changes the wrapped object's
+    return isinstance(value, (list, tuple)) and any(isinstance(v, (Resource, Collection)) for v in value)
+
+class AsyncWrapper(object):
+    """
+    Wraps a blocking object. Attributes are read from the wrapped object;
+    methods become coroutine functions which run the method on the client's
+    thread pool, and wrap whatever it returns.
+    """
+    def __init__(self, client, wrapped):
+        self._client = client
+        self.wrapped = wrapped
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        value = getattr(self.wrapped, name)
+        if isinstance(value, (Resource, Collection)) or _holds_resources(value):
+            return self._client._wrap(value)
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        async def run(*args, **kwargs):
+            return self._client._wrap(await self._client._run(value, *args, **kwargs))
+        return run
+
+    def __repr__(self):
+        return 'Async' + repr(self.wrapped)
+
+
+class AsyncResource(AsyncWrapper):
+    async def _wait_for_finish(self, is_finished, is_failed, progress, timeout, sleeptime, polling = None):
+        state = WaitState(self.wrapped, is_finished, is_failed, progress, timeout, polling or FixedInterval(sleeptime))
+        while not state.is_done():
+            try:
+                me = await self._client._run(self.wrapped.show)
+            except (RequestException, UnexpectedResponseException) as e:
+                state.on_error(e)
+            else:
+                state.on_response(me)
+            await asyncio.sleep(state.next_delay())
+        return self
+
+
+class AsyncRevisions(AsyncWrapper):
+    pass
+
+
+class AsyncRevision(AsyncResource):
+    async def apply(self, output_schema = None):
+        """
+        Apply the Revision to the view that it was opened on, first waiting
+        (without blocking the event loop) for the output schema to finish.
+        See `Revision.apply`.
+        """
+        if isinstance(output_schema, AsyncOutputSchema):
+            output_schema = output_schema.wrapped
+
+        if output_schema and not output_schema.attributes['finished_at']:
+            source = await self._client._run(output_schema.parent.parent.show)
+            source_type = source.attributes['source_type']
+            if not (source_type['type'] == 'view' and not source_type['loaded']):
+                await self._client._wrap(output_schema).wait_for_finish()
+
+        return self._client._wrap(await self._client._run(self.wrapped.apply, output_schema = output_schema))
+
+
+class AsyncSource(AsyncResource):
+    async def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
+        """
+        See `Source.wait_for_schema`
+        """
+        (is_finished, is_failed) = self.wrapped._schema_conditions()
+        return await self._wait_for_finish(is_finished, is_failed, progress, timeout, sleeptime, polling)
+
+    async def wait_for_finish(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
+        """
+        See `Source.wait_for_finish`
+        """
+        (is_finished, is_failed) = self.wrapped._finish_conditions()
+        return await self._wait_for_finish(is_finished, is_failed, progress, timeout, sleeptime, polling)
+
+    async def get_latest_input_schema(self):
+        """
+        See `Source.get_latest_input_schema`
+        """
+        await self.wait_for_schema()
+        return self._client._wrap(max(self.wrapped.input_schemas, key = lambda s: s.attributes['id']))
+
+
+class AsyncInputSchema(AsyncResource):
+    async def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
+        """
+        See `InputSchema.wait_for_schema`
+        """
+        (is_finished, is_failed) = self.wrapped._schema_conditions()
+        return await self._wait_for_finish(is_finished, is_failed, progress, timeout, sleeptime, polling)
+
+    async def get_latest_output_schema(self):
+        """
+        See `InputSchema.get_latest_output_schema`
+        """
+        await self.wait_for_schema()
+        return self._client._wrap(max(self.wrapped.output_schemas, key = lambda o: o.attributes['id']))
+
+
+class AsyncOutputSchema(AsyncResource):
+    async def wait_for_finish(self, progress = noop, timeout = 10800, sleeptime = 1, polling = None):
+        """
+        See `OutputSchema.wait_for_finish`
+        """
+        (is_finished, is_failed) = self.wrapped._finish_conditions()
+        return await self._wait_for_finish(is_finished, is_failed, progress, timeout, sleeptime, polling)
+
+
+class AsyncJob(AsyncResource):
+    async def wait_for_finish(self, progress = noop, timeout = None, sleeptime = 1, polling = None):
+        """
+        See `Job.wait_for_finish`
+        """
+        if self.wrapped.submitted_for_approval(): return self
+
+        (is_finished, is_failed) = self.wrapped._finish_conditions()
+        return await self._wait_for_finish(is_finished, is_failed, progress, timeout, sleeptime, polling)
+
+
+class AsyncSocrata(AsyncWrapper):
+    """
+    Async counterpart to `Socrata`. All the HTTP calls made by the objects
+    that come from it share a pool of `max_workers` threads.
+    """
+    wrappers = [
+        (Revisions, AsyncRevisions),
+        (Revision, AsyncRevision),
+        (Source, AsyncSource),
+        (InputSchema, AsyncInputSchema),
+        (OutputSchema, AsyncOutputSchema),
+        (Job, AsyncJob),
+        (Resource, AsyncResource),
+        (Collection, AsyncWrapper),
+        # The shortcuts in socrata.operations (ie: `create(...).csv(f)`) run
+        # start to finish on the thread pool
+        (Operation, AsyncWrapper)
+    ]
+
+    def __init__(self, auth, max_workers = DEFAULT_MAX_WORKERS):
+        auth.ensure_pool_size(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers)
+        super(AsyncSocrata, self).__init__(self, Socrata(auth))
+
+    async def _run(self, fun, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            functools.partial(fun, *args, **kwargs)
+        )
+
+    def _wrap(self, thing):
+        if isinstance(thing, (list, tuple)):
+            return type(thing)(self._wrap(t) for t in thing)
+        for (klass, wrapper) in self.wrappers:
+            if isinstance(thing, klass):
+                return wrapper(self, thing)
+        return thing
+
+    def close(self):
+        """
+        Shut down the thread pool
+        """
+        self._executor.shutdown(wait = False)
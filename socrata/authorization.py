@@ -1,5 +1,21 @@
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+# Enough connections for the default upload parallelism, plus a few for
+# whatever else is happening (polling, metadata calls) at the same time
+DEFAULT_POOL_SIZE = 16
+
+class _RejectAllCookies(DefaultCookiePolicy):
+    """
+    Cookies are passed explicitly on every request, so the session
+    should never hold onto anything the server sets.
+    """
+    def set_ok(self, cookie, request):
+        return False
+
 class Authorization(object):
     """
     Manages basic authorization for accessing the socrata API.
@@ -24,8 +40,17 @@ class Authorization(object):
             cookies=dict(cookie_name="cookie-value")
         )
         publishing = Socrata(auth)
+
+    All requests made with an Authorization share one pool of keep-alive
+    connections, so chunk uploads and polling don't pay for a new TCP and
+    TLS handshake on every call. The pool holds `pool_size` connections
+    per host, and grows to match the upload parallelism when needed.
+
+    Pass an `IdentityMap` (from `socrata.identity_map`) as `identity_map` to
+    have lookups of the same source, input schema or output schema reuse and
+    refresh one object, rather than building a new one each time.
     """
-    def __init__(self, domain, /, username=None, password=None, request_id_prefix='', *, cookies=None):
+    def __init__(self, domain, /, username=None, password=None, request_id_prefix='', *, cookies=None, pool_size=DEFAULT_POOL_SIZE, identity_map=None):
         self.domain = domain
 
         if not ((username and password) or cookies):
@@ -42,6 +67,12 @@ class Authorization(object):
 
         self._request_id_prefix = request_id_prefix
 
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = Lock()
+
+        self.identity_map = identity_map
+
         # Set up authentication method
         if username and password:
             self.basic = HTTPBasicAuth(self.username, self.password)
@@ -60,5 +91,61 @@ class Authorization(object):
         requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
         self.verify = False
 
+    def session(self):
+        """
+        The requests Session that all HTTP calls made with this Authorization
+        go through. It is created on first use.
+        """
+        with self._session_lock:
+            if self._session is None:
+                session = Session()
+                session.cookies.set_policy(_RejectAllCookies())
+                self._mount(session, self.pool_size)
+                self._session = session
+            return self._session
+
+    def ensure_pool_size(self, size):
+        """
+        Make sure the connection pool can hold at least `size` connections
+        per host, so that many threads using this Authorization at once
+        don't have to open and throw away connections.
+        """
+        with self._session_lock:
+            if size <= self.pool_size:
+                return
+            self.pool_size = size
+            if self._session is not None:
+                self._mount(self._session, size)
+
+    def close(self):
+        """
+        Close any pooled connections
+        """
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _mount(self, session, size):
+        adapter = HTTPAdapter(pool_maxsize = size)
+        replaced = {session.adapters.get(prefix) for prefix in ('https://', 'http://')}
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        # Closing the old pools drops their idle connections; any that are in
+        # use are closed when they're returned, rather than kept
+        for old in replaced:
+            if old is not None:
+                old.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_session'] = None
+        del state['_session_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._session_lock = Lock()
+
     def request_id_prefix(self):
         return self._request_id_prefix
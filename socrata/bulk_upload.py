@@ -0,0 +1,174 @@
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from socrata.lazy_pool import LazyThreadPoolExecutor
+from socrata.sources import ChunkedUpload
+
+log = logging.getLogger(__name__)
+
+# Chunks in flight at once, across every file, unless told otherwise
+DEFAULT_PARALLELISM = 8
+
+# Handed to a worker instead of a chunk when a file has nothing left to send
+COMMIT = object()
+
+class FileUpload(object):
+    """
+    Where one of the files in a bulk upload has got to
+    """
+    def __init__(self, filename, file_handle, content_type):
+        self.filename = filename
+        self.file_handle = file_handle
+        self.content_type = content_type
+        self.upload = None
+        self.source = None
+        self.error = None
+        self.in_flight = 0
+        self.exhausted = False
+        self.committing = False
+        self.started_at = None
+        self.finished_at = None
+
+    def stats(self):
+        return {
+            'filename': self.filename,
+            'bytes': self.upload.bytes_sent if self.upload else 0,
+            'chunks': self.upload.chunks_sent if self.upload else 0,
+            'seconds': (self.finished_at - self.started_at) if self.started_at and self.finished_at else None,
+            'failed': self.error is not None
+        }
+
+
+class BulkUpload(object):
+    """
+    Uploads several files into new sources on one revision, sending the
+    chunks of all of them on one pool of `parallelism` workers. Files take
+    turns handing out chunks, so a big file doesn't hold up the small ones
+    behind it, and each file is committed as soon as its last chunk has
+    been sent.
+
+    A file failing doesn't stop the others; its error is returned in place
+    of its source.
+    """
+    def __init__(self, revision, files, parallelism = DEFAULT_PARALLELISM, **kwargs):
+        self.revision = revision
+        self.files = [FileUpload(*f) for f in files]
+        self.parallelism = parallelism
+        # The pool is shared, so its size is fixed rather than adapted to
+        # any one upload
+        kwargs.pop('adaptive_parallelism', None)
+        kwargs.pop('max_parallelism', None)
+        self.kwargs = kwargs
+        self._lock = Lock()
+
+    def run(self):
+        """
+        Returns a list of (Source, error) pairs, one per file in the order
+        they were given, where one of the two is None, and a dict of stats
+        """
+        started_at = time.time()
+        self.revision.auth.ensure_pool_size(self.parallelism)
+
+        # Creating the sources and initiating their uploads is a couple of
+        # round trips per file, so that's done a few at a time too
+        with ThreadPoolExecutor(self.parallelism) as starter:
+            list(starter.map(self._start, self.files))
+
+        pool = LazyThreadPoolExecutor(self.parallelism, max_pending = self.parallelism)
+        try:
+            for _ in pool.map(self._work, self._round_robin()):
+                pass
+        finally:
+            for f in self.files:
+                if f.upload and not f.committing:
+                    f.upload.close()
+
+        seconds = time.time() - started_at
+        per_file = [f.stats() for f in self.files]
+        total_bytes = sum(s['bytes'] for s in per_file)
+        stats = {
+            'files': len(self.files),
+            'failed': len([f for f in self.files if f.error is not None]),
+            'bytes': total_bytes,
+            'chunks': sum(s['chunks'] for s in per_file),
+            'seconds': seconds,
+            'bytes_per_second': total_bytes / seconds if seconds else 0,
+            'per_file': per_file
+        }
+        return ([(f.source, f.error) for f in self.files], stats)
+
+    def _start(self, f):
+        f.started_at = time.time()
+        try:
+            source = self.revision.create_upload(f.filename)
+            f.upload = ChunkedUpload(source, f.file_handle, f.content_type, **self.kwargs)
+        except Exception as e:
+            self._fail(f, e)
+
+    def _round_robin(self):
+        # Runs on the workers, one at a time, since the pool guards the
+        # iterator it's taking items from with a lock
+        active = deque(f for f in self.files if f.error is None)
+        while active:
+            f = active.popleft()
+            if f.error is not None:
+                continue
+            try:
+                chunk = next(f.upload.chunks)
+            except StopIteration:
+                with self._lock:
+                    f.exhausted = True
+                    commit = self._ready_to_commit(f)
+                if commit:
+                    yield (f, COMMIT)
+                continue
+            except Exception as e:
+                self._fail(f, e)
+                continue
+
+            with self._lock:
+                f.in_flight += 1
+            active.append(f)
+            yield (f, chunk)
+
+    def _work(self, task):
+        (f, chunk) = task
+        if chunk is COMMIT:
+            return self._commit(f)
+
+        if f.error is None:
+            try:
+                f.upload.send(chunk)
+            except Exception as e:
+                self._fail(f, e)
+        with self._lock:
+            f.in_flight -= 1
+            commit = self._ready_to_commit(f)
+        if commit:
+            self._commit(f)
+
+    def _ready_to_commit(self, f):
+        # Called with the lock held; whichever of the iterator or the
+        # worker sending the last chunk gets here second does the commit
+        if f.exhausted and f.in_flight == 0 and f.error is None and not f.committing:
+            f.committing = True
+            return True
+        return False
+
+    def _commit(self, f):
+        try:
+            f.upload.close()
+            f.source = f.upload.commit()
+        except Exception as e:
+            self._fail(f, e)
+        f.finished_at = time.time()
+
+    def _fail(self, f, e):
+        with self._lock:
+            if f.error is not None:
+                return
+            f.error = e
+            f.finished_at = time.time()
+        log.warning('Upload of %s failed: %s', f.filename, e)
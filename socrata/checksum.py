@@ -0,0 +1,102 @@
+import zlib
+from functools import lru_cache
+from threading import Lock
+
+# Each chunk of an upload carries the CRC32 of its bytes in this header, and
+# the commit carries the CRC32 of the whole upload in the other. They're
+# advisory: a server which supports them can reject data that was corrupted
+# on the way there, but the publishing API doesn't check them today, and
+# ignores them like any other header it doesn't know about. The journal of a
+# resumable upload uses the chunk CRCs either way, to tell whether the file
+# has changed since its chunks were sent.
+CHUNK_CHECKSUM_HEADER = 'x-socrata-chunk-crc32'
+UPLOAD_CHECKSUM_HEADER = 'x-socrata-upload-crc32'
+
+def crc32(data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return zlib.crc32(data) & 0xffffffff
+
+def format_checksum(crc):
+    return '%08x' % crc
+
+def _gf2_times(matrix, vector):
+    total = 0
+    i = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[i]
+        vector >>= 1
+        i += 1
+    return total
+
+def _gf2_multiply(a, b):
+    return [_gf2_times(a, column) for column in b]
+
+@lru_cache(maxsize = 64)
+def _zeros_operator(length):
+    """
+    The matrix which advances a CRC32 over `length` zero bytes. Uploads
+    are mostly chunks of the same size, so these get reused.
+    """
+    # One zero bit, from zlib's crc32_combine
+    operator = [0xedb88320] + [1 << n for n in range(31)]
+    for _ in range(3):
+        operator = _gf2_multiply(operator, operator)
+
+    result = None
+    while length:
+        if length & 1:
+            result = operator if result is None else _gf2_multiply(operator, result)
+        length >>= 1
+        if length:
+            operator = _gf2_multiply(operator, operator)
+    return result
+
+def crc32_combine(crc1, crc2, length2):
+    """
+    The CRC32 of `a + b`, given the CRC32 of `a`, and the CRC32 and length of `b`
+    """
+    if length2 <= 0:
+        return crc1
+    return _gf2_times(_zeros_operator(length2), crc1) ^ crc2
+
+
+class UploadChecksum(object):
+    """
+    Collects the checksums of an upload's chunks as they're sent, in
+    whatever order that happens, and combines them into the checksum of the
+    whole upload.
+
+    Chunks are folded into a running checksum as soon as every chunk before
+    them has arrived, so only the ones that arrived out of order are held
+    on to, however many chunks the upload has.
+    """
+    def __init__(self):
+        # The CRC32 of chunks 0 up to (not including) _next
+        self._total = 0
+        self._next = 0
+        # seq_num => (crc, length) of chunks that arrived ahead of _next
+        self._pending = {}
+        self._lock = Lock()
+
+    def add(self, seq_num, crc, length):
+        with self._lock:
+            if seq_num < self._next:
+                # Already folded in, ie: a chunk that was sent again
+                return
+            self._pending[seq_num] = (crc, length)
+            while self._next in self._pending:
+                (crc, length) = self._pending.pop(self._next)
+                self._total = crc32_combine(self._total, crc, length)
+                self._next += 1
+
+    def value(self):
+        """
+        The CRC32 of everything that was added, or None if there's a gap
+        in the sequence numbers
+        """
+        with self._lock:
+            if self._pending:
+                return None
+            return self._total
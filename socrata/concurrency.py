@@ -0,0 +1,139 @@
+import time
+from threading import Condition
+
+class AdaptiveConcurrency(object):
+    """
+    Decides how many chunks of an upload should be in flight at once, using
+    additive increase and multiplicative decrease (AIMD).
+
+    Completed requests are measured in windows of `limit` requests. If a
+    window moved more bytes per second than the one before it, the limit
+    goes up by one. If throughput fell, or stopped improving while requests
+    got slower, adding more was only queueing requests up somewhere, so the
+    limit goes back down by one. A failure (5xx, timeout, dropped connection)
+    cuts the limit by `decrease_factor` straight away.
+    """
+    def __init__(self, initial, minimum = 1, maximum = None, decrease_factor = 0.5, tolerance = 0.05):
+        self.minimum = minimum
+        self.maximum = maximum or max(initial, 1) * 4
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.decrease_factor = decrease_factor
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self._cond = Condition()
+
+        self._initial = self.limit
+        self._lowest = self.limit
+        self._highest = self.limit
+        self._limit_seconds = 0.0
+        self._limit_changed_at = time.time()
+        self._started_at = self._limit_changed_at
+        self._reset_window(self._limit_changed_at)
+        self._last_throughput = None
+        self._last_latency = None
+
+    def acquire(self):
+        """
+        Block until there is room for another request
+        """
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, nbytes = 0, latency = None):
+        """
+        Give a slot back. Pass the bytes sent and how long the request took
+        to have it counted towards the current window. If `latency` is None,
+        the request isn't measured at all (ie: it never went anywhere).
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None:
+                self._window_bytes += nbytes
+                self._window_latency += latency
+                self._window_count += 1
+                if self._window_count >= self.limit:
+                    self._end_window(time.time())
+            self._cond.notify_all()
+
+    def record_failure(self):
+        """
+        A request failed in a way that suggests we're pushing too hard
+        (5xx, timeout, dropped connection), so back off.
+        """
+        with self._cond:
+            now = time.time()
+            self._set_limit(int(self.limit * self.decrease_factor), now)
+            self._reset_window(now)
+            # Throughput at the old limit isn't a fair comparison anymore
+            self._last_throughput = None
+            self._last_latency = None
+
+    def gate(self, iterable):
+        """
+        Wrap an iterable so that a slot is acquired before each item is
+        taken from it. Every item handed out must be `release`d.
+        """
+        return GatedIterator(self, iterable)
+
+    def report(self):
+        """
+        Summarize the limits chosen so far, ie: for logging at the end of an upload.
+        """
+        with self._cond:
+            now = time.time()
+            elapsed = now - self._started_at
+            weighted = self._limit_seconds + self.limit * (now - self._limit_changed_at)
+            return {
+                'initial': self._initial,
+                'final': self.limit,
+                'lowest': self._lowest,
+                'highest': self._highest,
+                'average': (weighted / elapsed) if elapsed > 0 else float(self.limit)
+            }
+
+    def _end_window(self, now):
+        elapsed = now - self._window_started
+        throughput = self._window_bytes / elapsed if elapsed > 0 else 0
+        latency = self._window_latency / self._window_count
+
+        if self._last_throughput is None or throughput > self._last_throughput * (1 + self.tolerance):
+            self._set_limit(self.limit + 1, now)
+        elif throughput < self._last_throughput * (1 - self.tolerance) or latency > self._last_latency * (1 + self.tolerance):
+            self._set_limit(self.limit - 1, now)
+
+        self._last_throughput = throughput
+        self._last_latency = latency
+        self._reset_window(now)
+
+    def _set_limit(self, limit, now):
+        limit = min(max(limit, self.minimum), self.maximum)
+        self._limit_seconds += self.limit * (now - self._limit_changed_at)
+        self._limit_changed_at = now
+        self.limit = limit
+        self._lowest = min(self._lowest, limit)
+        self._highest = max(self._highest, limit)
+
+    def _reset_window(self, now):
+        self._window_started = now
+        self._window_bytes = 0
+        self._window_latency = 0.0
+        self._window_count = 0
+
+
+class GatedIterator(object):
+    def __init__(self, controller, iterable):
+        self._controller = controller
+        self._it = iter(iterable)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._controller.acquire()
+        try:
+            return next(self._it)
+        except BaseException:
+            self._controller.release()
+            raise
@@ -7,7 +7,8 @@ from socrata.builders.parse_options import ParseOptionBuilder
 
 class Configs(Collection):
     def path(self):
-        return 'https://{domain}/api/publishing/v1/config'.format(
+        return '{proto}{domain}/api/publishing/v1/config'.format(
+            proto = self.auth.proto,
             domain = self.auth.domain
         )
 
@@ -1,8 +1,9 @@
 import json
 import os
-import requests
 import binascii
 import logging
+import time
+from email.utils import parsedate_to_datetime
 from socrata._version import __version__
 
 log = logging.getLogger(__name__)
@@ -14,10 +15,35 @@ class TimeoutException(Exception):
     pass
 
 class UnexpectedResponseException(Exception):
-    def __init__(self, status, body):
+    def __init__(self, status, body, headers = None):
         super(UnexpectedResponseException, self).__init__("Unexpected status {status} {body}".format(status=status, body=body))
         self.body = body
         self.status = status
+        self.headers = headers or {}
+
+    @property
+    def retry_after(self):
+        """
+        The number of seconds the server asked us to wait before trying again,
+        from the `Retry-After` header, or None if it didn't say
+        """
+        return parse_retry_after(self.headers.get('Retry-After'))
+
+def parse_retry_after(value):
+    """
+    Parse a `Retry-After` header, which is either a number of seconds or an
+    HTTP date, into a number of seconds from now
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
 
 def noop(*args, **kwargs):
     pass
@@ -67,9 +93,9 @@ def respond(response, request_id = None):
     else:
         log.warning("Request failed with %s, request_id was %s", response.status_code, request_id)
         if is_json(response):
-            raise UnexpectedResponseException(response.status_code, response.json())
+            raise UnexpectedResponseException(response.status_code, response.json(), response.headers)
         else:
-            raise UnexpectedResponseException(response.status_code, response)
+            raise UnexpectedResponseException(response.status_code, response, response.headers)
 
 def pluck_resource(body):
     return body['resource']
@@ -77,7 +103,7 @@ def pluck_resource(body):
 def post(path, auth = None, data = None, headers = {}, params = {}):
     (headers, request_id) = prepare(headers, auth)
     log.info('POST %s %s', path, request_id)
-    return respond(requests.post(
+    return respond(auth.session().post(
         path,
         headers = headers,
         auth = auth.basic,
@@ -93,7 +119,7 @@ def post(path, auth = None, data = None, headers = {}, params = {}):
 def put(path, auth = None, data = None, headers = {}):
     (headers, request_id) = prepare(headers, auth)
     log.info('PUT %s %s', path, request_id)
-    return respond(requests.put(
+    return respond(auth.session().put(
         path,
         headers = headers,
         auth = auth.basic,
@@ -107,7 +133,7 @@ def put(path, auth = None, data = None, headers = {}):
 def patch(path, auth = None, data = None, headers = {}):
     (headers, request_id) = prepare(headers, auth)
     log.info('PATCH %s %s', path, request_id)
-    return respond(requests.patch(
+    return respond(auth.session().patch(
         path,
         headers = headers,
         auth = auth.basic,
@@ -119,7 +145,7 @@ def patch(path, auth = None, data = None, headers = {}):
 def get(path, auth = None, params = {}, headers = {}, **kwargs):
     (headers, request_id) = prepare(headers, auth)
     log.info('GET %s %s', path, request_id)
-    return respond(requests.get(
+    return respond(auth.session().get(
         path,
         params = params,
         headers = headers,
@@ -133,7 +159,7 @@ def get(path, auth = None, params = {}, headers = {}, **kwargs):
 def delete(path, auth = None, headers = {}):
     (headers, request_id) = prepare(headers, auth)
     log.info('DELETE %s %s', path, request_id)
-    return respond(requests.delete(
+    return respond(auth.session().delete(
         path,
         headers = headers,
         auth = auth.basic,
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class IdentityMap(object):
+    """
+    Keeps one object per resource, so that looking up the same source or
+    input schema again (ie: by listing the sources on a revision) refreshes
+    the object you already have, rather than building a new one, and a new
+    tree of children under it. Output schemas aren't kept, since each one
+    holds its own pending changes (see OutputSchema.add_column).
+
+    Entries expire `ttl` seconds after they were stored, and once there are
+    more than `max_size` of them, the least recently used ones are dropped.
+
+    Pass one in when making the `Authorization` to turn it on:
+
+    ```python
+    auth = Authorization(domain, username, password, identity_map = IdentityMap(ttl = 300))
+    ...
+    print(auth.identity_map.stats())
+    ```
+    """
+    def __init__(self, max_size = 1024, ttl = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        The object stored under `key`, or None if there isn't one or it expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            (stored_at, thing) = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return thing
+
+    def put(self, key, thing):
+        with self._lock:
+            self._entries[key] = (time.time(), thing)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+        ```
+            dict of hits, misses, evictions and the current size
+        ```
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries)
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Objects are only shared within a process, so a copy starts out empty
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
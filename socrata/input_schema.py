@@ -8,6 +8,8 @@ class InputSchema(Resource):
     """
     This represents a schema exactly as it appeared in the source
     """
+    identity_mapped = True
+
     def transform(self, uri, body):
         """
         Transform this InputSchema into an Output. Returns the
@@ -35,19 +37,28 @@ class InputSchema(Resource):
             auth = self.auth,
         ))
 
-    def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1):
+    def _schema_conditions(self):
+        return (
+            lambda m: len(m.attributes['output_schemas']) > 0,
+            lambda m: False
+        )
+
+    def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
         """
-        Wait for this data source to have at least one schema present. Accepts a progress function
-        and a timeout.
+        Wait for this data source to have at least one schema present. Accepts a progress function,
+        a timeout, and a `polling` strategy from `socrata.polling` (without one, it
+        polls every `sleeptime` seconds).
 
         Default timeout is 12 hours
         """
+        (is_finished, is_failed) = self._schema_conditions()
         return self._wait_for_finish(
-            is_finished = lambda m: len(m.attributes['output_schemas']) > 0,
-            is_failed = lambda m: False,
+            is_finished = is_finished,
+            is_failed = is_failed,
             progress = progress,
             timeout = timeout,
-            sleeptime = sleeptime
+            sleeptime = sleeptime,
+            polling = polling
         )
 
     def get_latest_output_schema(self):
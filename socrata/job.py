@@ -15,19 +15,28 @@ class Job(Resource):
         status = self.attributes['status']
         return (status == 'failure' or status == 'successful')
 
-    def wait_for_finish(self, progress = noop, timeout = None, sleeptime = 1):
+    def _finish_conditions(self):
+        return (
+            lambda m: m.submitted_for_approval() or m.attributes['finished_at'],
+            lambda m: m.attributes['status'] == 'failure'
+        )
+
+    def wait_for_finish(self, progress = noop, timeout = None, sleeptime = 1, polling = None):
         """
-        Wait for this dataset to finish transforming and validating. Accepts a progress function
-        and a timeout.
+        Wait for this dataset to finish transforming and validating. Accepts a progress function,
+        a timeout, and a `polling` strategy from `socrata.polling` (without one, it
+        polls every `sleeptime` seconds).
         """
         if self.submitted_for_approval(): return self
 
+        (is_finished, is_failed) = self._finish_conditions()
         return self._wait_for_finish(
-            is_finished = lambda m: m.attributes['finished_at'],
-            is_failed = lambda m: m.attributes['status'] == 'failure',
+            is_finished = is_finished,
+            is_failed = is_failed,
             progress = progress,
             timeout = timeout,
-            sleeptime = sleeptime
+            sleeptime = sleeptime,
+            polling = polling
         )
     
     def submitted_for_approval(self):
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+from threading import Lock
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser('~'), '.socrata-py', 'uploads')
+
+# How much of the start and end of a file goes into its fingerprint
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+
+def fingerprint(file_or_bytes):
+    """
+    Identify the thing being uploaded well enough to tell whether a
+    journal from an earlier attempt applies to it. Files are identified
+    by their size, mtime, starting position and a sample of their contents;
+    bytes are hashed outright. Anything else (generators, streams) can't be
+    replayed, so it returns None.
+    """
+    digest = hashlib.sha1()
+    if type(file_or_bytes) is bytes:
+        digest.update(file_or_bytes)
+        return digest.hexdigest()
+    if type(file_or_bytes) is str:
+        digest.update(file_or_bytes.encode('utf-8'))
+        return digest.hexdigest()
+
+    try:
+        stat = os.fstat(file_or_bytes.fileno())
+        position = file_or_bytes.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    digest.update(json.dumps([stat.st_size, stat.st_mtime_ns, position]).encode('utf-8'))
+    # The samples are bytes read from the file descriptor, whether the file
+    # was opened in text mode or not, since a byte offset can land in the
+    # middle of a character. (The position of a text file is an opaque
+    # number, which is only a byte offset while its decoder has no state.)
+    start = min(position, stat.st_size)
+    for offset in [start, max(start, stat.st_size - FINGERPRINT_SAMPLE_SIZE)]:
+        digest.update(_read_at(file_or_bytes, offset, position))
+    return digest.hexdigest()
+
+def _read_at(file, offset, position):
+    if hasattr(os, 'pread'):
+        # Leaves the file where it was
+        return os.pread(file.fileno(), FINGERPRINT_SAMPLE_SIZE, offset)
+    # No pread (Windows), so read the binary file under a text one, and put
+    # the file back where it was
+    binary = getattr(file, 'buffer', file)
+    try:
+        binary.seek(offset)
+        return binary.read(FINGERPRINT_SAMPLE_SIZE)
+    finally:
+        file.seek(position)
+
+
+class UploadJournal(object):
+    """
+    An append-only record of the chunks of an upload that the server has
+    acknowledged, so that a failed upload can be restarted without sending
+    them again.
+
+    The first line of the file is a header holding the upload parameters
+    the server gave us when the upload was initiated; every line after that
+    is a `[seq_num, byte_offset, end_byte_offset, crc32]` entry. The CRC32
+    lets a resumed upload check that the chunks it skips haven't changed
+    (journals written before it was recorded have triples).
+    """
+    def __init__(self, path, header, acknowledged, checksums = None):
+        self.path = path
+        self.header = header
+        self.acknowledged = acknowledged
+        self.checksums = checksums or {}
+        self._lock = Lock()
+        self._file = None
+
+    @classmethod
+    def open(cls, directory, source_id, fingerprint):
+        """
+        Load the journal for this source and fingerprint, if a previous
+        attempt left one behind.
+        """
+        path = os.path.join(directory or DEFAULT_JOURNAL_DIR, '{source_id}-{fingerprint}.journal'.format(
+            source_id = source_id,
+            fingerprint = fingerprint
+        ))
+
+        header = None
+        acknowledged = {}
+        checksums = {}
+        try:
+            with open(path, 'r') as f:
+                header = json.loads(f.readline())
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        (seq_num, byte_offset, end_byte_offset) = entry[:3]
+                    except (ValueError, TypeError):
+                        # A torn write from the attempt being killed
+                        break
+                    acknowledged[seq_num] = (seq_num, byte_offset, end_byte_offset)
+                    if len(entry) > 3:
+                        checksums[seq_num] = entry[3]
+        except (OSError, ValueError):
+            header = None
+            acknowledged = {}
+            checksums = {}
+
+        return cls(path, header, acknowledged, checksums)
+
+    def is_resumable(self):
+        return self.header is not None
+
+    def start(self, header, acknowledged = None, checksums = None):
+        """
+        Rewrite the journal for an upload with these parameters. Passing in
+        the chunks that were already acknowledged (and their checksums)
+        carries them over, which also drops any torn line left behind by a
+        killed process.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        with self._lock:
+            self._close()
+            self.header = header
+            self.acknowledged = dict(acknowledged or {})
+            self.checksums = {
+                seq_num: crc for (seq_num, crc) in (checksums or {}).items()
+                if seq_num in self.acknowledged
+            }
+            self._file = open(self.path, 'w')
+            self._write(header)
+            for triple in sorted(self.acknowledged.values()):
+                self._write(self._entry(*triple))
+
+    def record(self, seq_num, byte_offset, end_byte_offset, crc = None):
+        with self._lock:
+            if self._file is None:
+                # Closed out from under a worker that was still sending;
+                # forgetting this chunk just means it gets sent again
+                return
+            self.acknowledged[seq_num] = (seq_num, byte_offset, end_byte_offset)
+            if crc is None:
+                self.checksums.pop(seq_num, None)
+            else:
+                self.checksums[seq_num] = crc
+            self._write(self._entry(seq_num, byte_offset, end_byte_offset))
+
+    def _entry(self, seq_num, byte_offset, end_byte_offset):
+        entry = [seq_num, byte_offset, end_byte_offset]
+        if seq_num in self.checksums:
+            entry.append(self.checksums[seq_num])
+        return entry
+
+    def remove(self):
+        """
+        The upload was committed, so there is nothing left to resume
+        """
+        with self._lock:
+            self._close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _write(self, thing):
+        self._file.write(json.dumps(thing) + '\n')
+        self._file.flush()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
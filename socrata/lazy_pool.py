@@ -1,23 +1,51 @@
-from threading import Thread, Lock, Semaphore, Event, TIMEOUT_MAX
-from queue import Queue
+from threading import Thread, Lock, Semaphore, Event, TIMEOUT_MAX, get_ident
+from queue import Queue, Full
 
 
 THREAD_DONE = object()
 
+# How often a worker blocked on a full result queue checks whether the
+# pool was shut down underneath it
+PUT_POLL_SECONDS = 0.1
+
 class ExceptionBox(object):
-    def __init__(self, exc):
+    def __init__(self, exc, item):
         self.exc = exc
+        self.item = item
 
 class LazyThreadPoolExecutor(object):
-    def __init__(self, num_workers=1):
+    """
+    Maps a function over an iterable using `num_workers` threads, pulling
+    items from the iterable only as workers free up.
+
+    Results are handed back through a queue, which by default is unbounded.
+    With `max_pending` set, at most that many results can be waiting for
+    the consumer; past that, workers block until it catches up, so they
+    don't keep pulling items from the iterable either.
+
+    The first exception raised by the mapped function shuts the pool down:
+    workers finish whatever they are working on and then exit without
+    taking anything else from the iterable. The item that failed is kept
+    in `failed_item`, and the items that were still being worked on at
+    that moment in `in_flight_at_failure`.
+    """
+    def __init__(self, num_workers=1, max_pending=None):
         self.num_workers = num_workers
-        self.result_queue = Queue()
+        self.result_queue = Queue(max_pending or 0)
         self.thread_sem = Semaphore(num_workers)
         self._shutdown = Event()
         self.threads = []
+        self._in_flight = {}
+        self._in_flight_lock = Lock()
+        self.failed_item = None
+        self.in_flight_at_failure = []
+        self._failure = None
 
     def map(self, predicate, iterable):
         self._shutdown.clear()
+        self._failure = None
+        self.failed_item = None
+        self.in_flight_at_failure = []
         self.iterable = ThreadSafeIterator(iterable)
         self._start_threads(predicate)
         return self._result_iterator()
@@ -38,19 +66,70 @@ class LazyThreadPoolExecutor(object):
             self.threads.append(t)
             t.start()
 
+    def in_flight(self):
+        """
+        The items workers are currently running the mapped function on
+        """
+        with self._in_flight_lock:
+            return list(self._in_flight.values())
+
     def _make_worker(self, predicate):
         def _w():
+            me = get_ident()
             with self.thread_sem:
-                for thing in self.iterable:
+                while not self._shutdown.is_set():
                     try:
-                        self.result_queue.put(predicate(thing))
+                        thing = next(self.iterable)
+                    except StopIteration:
+                        break
                     except Exception as e:
-                        self.result_queue.put(ExceptionBox(e))
-                    if self._shutdown.is_set():
+                        self._put(self._failed(ExceptionBox(e, None)))
                         break
-            self.result_queue.put(THREAD_DONE)
+
+                    with self._in_flight_lock:
+                        self._in_flight[me] = thing
+                    try:
+                        result = predicate(thing)
+                    except Exception as e:
+                        result = self._failed(ExceptionBox(e, thing))
+                    finally:
+                        with self._in_flight_lock:
+                            del self._in_flight[me]
+                    self._put(result)
+            self._put(THREAD_DONE)
         return _w
 
+    def _put(self, result):
+        # A bounded queue can fill up once the consumer stops reading because
+        # something failed, so don't block on it forever
+        while True:
+            try:
+                self.result_queue.put(result, True, PUT_POLL_SECONDS)
+                return
+            except Full:
+                if self._shutdown.is_set():
+                    return
+
+    def _failed(self, box):
+        # Called by the worker that hit the exception, so the pool is shut
+        # down before that worker (or any other) can take another item,
+        # rather than once the consumer gets around to the exception
+        me = get_ident()
+        with self._in_flight_lock:
+            if self._failure is None:
+                self._failure = box
+                self.failed_item = box.item
+                self.in_flight_at_failure = [
+                    thing for (ident, thing) in self._in_flight.items() if ident != me
+                ]
+                self._shutdown.set()
+        return box
+
+    def _fail(self, box):
+        # If several items failed, the first one is what's raised, since
+        # that's the one in `failed_item`
+        raise (self._failure or box).exc
+
     def _result_iterator(self):
         done_threads = 0
         while 1:
@@ -61,7 +140,7 @@ class LazyThreadPoolExecutor(object):
             result = self.result_queue.get(True, TIMEOUT_MAX)
             if result is not THREAD_DONE:
                 if isinstance(result, ExceptionBox):
-                    raise result.exc
+                    self._fail(result)
                 else:
                     yield result
             else:
@@ -0,0 +1,223 @@
+"""
+Publish many datasets using their import configs at once.
+
+`ConfiguredJob` creates a revision, uploads into it, waits for the upload
+to be validated and applies it, one step after the other. A `Batch` runs
+those steps for many datasets as a pipeline: a few uploads at a time on a
+pool of threads, and, as each upload finishes, its validation is waited on
+from the calling thread (with `socrata.wait.Waiter`), so uploading one
+dataset overlaps with waiting on the ones before it. Each dataset is
+applied as soon as it has been validated.
+
+```python
+from socrata.polling import ExponentialBackoff
+
+with open('a.csv', 'rb') as a, open('b.csv', 'rb') as b:
+    results = socrata.using_configs([
+        ('my-config', socrata.views.lookup('abcd-1234'), a),
+        ('my-config', 'wxyz-9876', b)
+    ], upload_parallelism = 4, polling = ExponentialBackoff(maximum = 30))
+
+for result in results:
+    print(result.view_id, result.error, result.timings)
+```
+"""
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from socrata.http import noop, UnexpectedResponseException
+from socrata.operations.configured_job import ConfiguredJob
+from socrata.wait import Waiter, DEFAULT_REQUESTS_PER_SECOND
+
+log = logging.getLogger(__name__)
+
+# Datasets uploading at once, unless told otherwise
+DEFAULT_UPLOAD_PARALLELISM = 4
+
+def _lasting(error):
+    # Whether looking a config up again would fail the same way
+    return isinstance(error, UnexpectedResponseException) and 400 <= error.status <= 499
+
+class BatchResult(object):
+    """
+    How one dataset in a batch got on. `error` is None if it was applied,
+    otherwise it's the exception that stopped it, and `stage` is the stage
+    it got to: 'queued', 'uploading', 'validating', 'applying', 'running'
+    (when waiting for jobs) or 'done'.
+
+    `timings` holds how many seconds the dataset spent in each stage it
+    got through: 'queued' (waiting for an upload slot), 'upload',
+    'validation', 'apply', 'job' (when waiting for jobs) and 'total'.
+    """
+    def __init__(self, config, view, file_handle, upload_method = 'csv'):
+        self.config = config
+        self.view = view
+        self.file_handle = file_handle
+        self.upload_method = upload_method
+        self.revision = None
+        self.output_schema = None
+        self.job = None
+        self.error = None
+        self.stage = 'queued'
+        self.timings = {}
+        self._stage_started = time.time()
+        self._created = self._stage_started
+
+    @property
+    def view_id(self):
+        return self.view if isinstance(self.view, str) else self.view.attributes['id']
+
+    def _next_stage(self, stage, timing):
+        now = time.time()
+        self.timings[timing] = now - self._stage_started
+        self._stage_started = now
+        self.stage = stage
+
+    def _finish(self, error = None):
+        self.error = error
+        if error is None:
+            self.stage = 'done'
+        self.timings['total'] = time.time() - self._created
+
+    def __repr__(self):
+        return 'BatchResult({view_id}, {stage}, error = {error!r})'.format(
+            view_id = self.view_id,
+            stage = self.stage,
+            error = self.error
+        )
+
+
+class Batch(object):
+    """
+    Runs a `ConfiguredJob` for each (config, view, file) in `jobs`, as a
+    pipeline. See `Socrata.using_configs`.
+    """
+    def __init__(
+        self,
+        socrata,
+        jobs,
+        upload_parallelism = DEFAULT_UPLOAD_PARALLELISM,
+        requests_per_second = DEFAULT_REQUESTS_PER_SECOND,
+        polling = None,
+        timeout = None,
+        wait_for_jobs = False,
+        progress = noop,
+        **upload_kwargs
+    ):
+        self.socrata = socrata
+        self.results = [BatchResult(*job) for job in jobs]
+        self.upload_parallelism = upload_parallelism
+        self.wait_for_jobs = wait_for_jobs
+        self.progress = progress
+        self.upload_kwargs = upload_kwargs
+        self.waiter = Waiter(timeout = timeout, polling = polling, requests_per_second = requests_per_second)
+        # Config name => Future of the config
+        self._configs = {}
+        self._lock = Lock()
+        self._uploads_left = len(self.results)
+        # The resource being waited on => the result it belongs to
+        self._waiting_on = {}
+
+    def run(self):
+        """
+        Returns a list of BatchResults, in the same order as the jobs
+        """
+        if not self.results:
+            return []
+
+        with ThreadPoolExecutor(self.upload_parallelism) as uploads:
+            for result in self.results:
+                uploads.submit(self._upload, result)
+
+            for (resource, error) in self.waiter:
+                result = self._waiting_on.pop(id(resource))
+                if error is not None:
+                    self._done(result, error)
+                elif result.stage == 'validating':
+                    self._apply(result)
+                else:
+                    result._next_stage('done', 'job')
+                    self._done(result)
+        return self.results
+
+    def _config(self, config):
+        # Every dataset in a batch commonly uses the same few configs, so
+        # each is only looked up once: the first thread to want one looks
+        # it up, outside the lock, and any others wanting it at the same
+        # time wait on its future. A config that doesn't exist (a 4xx)
+        # fails every dataset using it, but anything else going wrong (a
+        # 5xx, or the connection) only fails the dataset that was looking
+        # it up, and the next one to want it tries again.
+        if not isinstance(config, str):
+            return config
+        while True:
+            with self._lock:
+                future = self._configs.get(config)
+                lookup = future is None
+                if lookup:
+                    future = self._configs[config] = Future()
+            if not lookup:
+                try:
+                    return future.result()
+                except Exception as e:
+                    if _lasting(e):
+                        raise
+                    continue
+
+            try:
+                future.set_result(self.socrata.configs.lookup(config))
+            except Exception as e:
+                if not _lasting(e):
+                    with self._lock:
+                        del self._configs[config]
+                future.set_exception(e)
+            return future.result()
+
+    def _upload(self, result):
+        result._next_stage('uploading', 'queued')
+        try:
+            view = result.view
+            if isinstance(view, str):
+                view = result.view = self.socrata.views.lookup(view)
+            job = ConfiguredJob(self.socrata, view = view, config = self._config(result.config))
+            (result.revision, result.output_schema) = job.upload(
+                result.file_handle,
+                lambda source: getattr(source, result.upload_method)(result.file_handle, **self.upload_kwargs)
+            )
+            result._next_stage('validating', 'upload')
+            self._wait_on(result.output_schema, result)
+        except Exception as e:
+            self._done(result, e)
+        finally:
+            with self._lock:
+                self._uploads_left -= 1
+                if self._uploads_left == 0:
+                    # Once nothing else can be added, the waiter stops when
+                    # it runs out of things to wait on
+                    self.waiter.close()
+
+    def _wait_on(self, resource, result):
+        self._waiting_on[id(resource)] = result
+        self.waiter.add(resource)
+
+    def _apply(self, result):
+        result._next_stage('applying', 'validation')
+        try:
+            result.job = result.revision.apply(output_schema = result.output_schema)
+        except Exception as e:
+            return self._done(result, e)
+        if self.wait_for_jobs:
+            result._next_stage('running', 'apply')
+            self._wait_on(result.job, result)
+        else:
+            result._next_stage('done', 'apply')
+            self._done(result)
+
+    def _done(self, result, error = None):
+        result._finish(error)
+        if error is None:
+            log.info('Published %s in %.1fs', result.view_id, result.timings['total'])
+        else:
+            log.warning('Publishing %s failed while %s: %s', result.view_id, result.stage, error)
+        self.progress(result)
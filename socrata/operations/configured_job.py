@@ -3,6 +3,17 @@ from socrata.operations.operation import Operation
 
 class ConfiguredJob(Operation):
     def run(self, data, put_bytes, filename = None):
+        (rev, output_schema) = self.upload(data, put_bytes, filename)
+        output_schema = output_schema.wait_for_finish()
+        job = rev.apply(output_schema = output_schema)
+        return (rev, job)
+
+    def upload(self, data, put_bytes, filename = None):
+        """
+        The first half of `run`: create the revision and upload the data
+        into it, returning the revision and the output schema the config
+        produced, without waiting for it to be validated
+        """
         filename = get_filename(data, filename)
         rev = self.properties['view'].revisions.create_using_config(
             self.properties['config']
@@ -10,6 +21,4 @@ class ConfiguredJob(Operation):
         source = rev.create_upload(filename)
         source = put_bytes(source)
         output_schema = source.get_latest_input_schema().get_latest_output_schema()
-        output_schema = output_schema.wait_for_finish()
-        job = rev.apply(output_schema = output_schema)
-        return (rev, job)
+        return (rev, output_schema)
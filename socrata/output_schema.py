@@ -1,5 +1,11 @@
+import re
+import csv
 import time
 import json
+import codecs
+from collections import deque, namedtuple, Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from copy import deepcopy
 from socrata.resource import Resource
 from socrata.configs import Config
@@ -48,10 +54,103 @@ class SortChange(object):
         self._output_schema.new_sort_by = self._accumulated_columns
         return self._output_schema
 
+SchemaErrorRow = namedtuple('SchemaErrorRow', ['line', 'values', 'errors'])
+SchemaError = namedtuple('SchemaError', ['column', 'message', 'value'])
+
+# In the errors CSV, the messages for a column are in a column named after it
+# with one of these, and messages about the whole row are in one named `error`
+ERROR_COLUMN_SUFFIXES = (' error', '_error')
+
+def _error_columns(header):
+    """
+    The columns of an errors CSV which hold error messages, mapped to the
+    column of values each one is about (None for the whole row)
+    """
+    names = set(header)
+    error_columns = {}
+    for name in header:
+        if name.lower() == 'error':
+            error_columns[name] = None
+        for suffix in ERROR_COLUMN_SUFFIXES:
+            if name.lower().endswith(suffix) and name[:-len(suffix)] in names:
+                error_columns[name] = name[:-len(suffix)]
+    return error_columns
+
+def _charset(response):
+    content_type = response.headers.get('Content-Type', '')
+    for param in content_type.split(';')[1:]:
+        (name, _, value) = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return 'utf-8-sig'
+
+def _tee(chunks, spill):
+    for chunk in chunks:
+        spill.write(chunk)
+        yield chunk
+
+def _csv_lines(chunks, encoding):
+    """
+    Decode a stream of bytes incrementally and split it into lines for the
+    csv module. Only splits on '\n', since a quoted field can contain any
+    other line breaking character (and the csv module takes care of quoted
+    newlines itself).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors = 'replace')
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final = True)
+    if pending:
+        yield pending
+
+def _error_type(message):
+    message = re.sub(r'"[^"]*"|\'[^\']*\'|`[^`]*`', '"..."', message)
+    return re.sub(r'\d+(\.\d+)?', 'N', message)
+
+TIMESTAMP_SOQL_TYPES = {'calendar_date', 'fixed_timestamp', 'floating_timestamp', 'date'}
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("pandas is required to get rows as a DataFrame, `pip install pandas`")
+    return pandas
+
+def _ok_value(cell):
+    # Cells are {'ok': value} or {'error': ...}; errors become missing values
+    if isinstance(cell, dict):
+        return cell.get('ok')
+    return cell
+
+def _to_checkbox(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.lower() == 'true'
+    return bool(value)
+
+def _to_series(pandas, values, soql_type):
+    if soql_type == 'number':
+        return pandas.to_numeric(pandas.Series(values, dtype = object), errors = 'coerce').astype('float64')
+    if soql_type == 'checkbox':
+        return pandas.Series(pandas.array([_to_checkbox(v) for v in values], dtype = 'boolean'))
+    if soql_type in TIMESTAMP_SOQL_TYPES:
+        return pandas.Series(pandas.to_datetime(pandas.Series(values, dtype = object), errors = 'coerce'))
+    return pandas.Series(values, dtype = object)
+
 class OutputSchema(Resource):
     """
         This is data as transformed from an InputSchema
     """
+    # Not shared through the identity map: each OutputSchema holds the
+    # changes made to it with `add_column`, `change_column_metadata` and so
+    # on until `run`, and looking one up shouldn't hand back the changes
+    # someone else is part way through making
+    identity_mapped = False
 
     def __init__(self, *args, **kwargs):
         super(OutputSchema, self).__init__(*args, **kwargs)
@@ -59,6 +158,16 @@ class OutputSchema(Resource):
         self.column_additions = []
         self.column_deletions = []
         self.new_sort_by = None
+        self._remember_owners()
+
+    def _remember_owners(self):
+        # Tell the revision this output schema's source is in (if it was
+        # reached through one) where to find it, see Revision.get_output_schema
+        input_schema = self.parent
+        source = getattr(input_schema, 'parent', None)
+        remember = getattr(getattr(source, 'parent', None), '_remember_output_schema', None)
+        if remember is not None:
+            remember(self.attributes['id'], source, input_schema)
 
     def build_config(self, uri, name, data_action):
         """
@@ -105,29 +214,82 @@ class OutputSchema(Resource):
         return self.attributes['error_count'] > 0
 
 
-    def wait_for_finish(self, progress = noop, timeout = 10800, sleeptime = 1):
+    def _finish_conditions(self):
+        return (
+            lambda m: m.attributes['completed_at'],
+            lambda m: m.any_failed()
+        )
+
+    def _progress(self):
+        # Transforms run over the rows in order, so the output schema is as
+        # far along as its slowest column
+        total_rows = self.attributes.get('total_rows')
+        columns = self.attributes.get('output_columns') or []
+        if not total_rows or not columns:
+            return None
+        processed = min(
+            (oc.get('transform') or {}).get('contiguous_rows_processed') or 0
+            for oc in columns
+        )
+        return min(processed / total_rows, 1.0)
+
+    def wait_for_finish(self, progress = noop, timeout = 10800, sleeptime = 1, polling = None):
         """
-        Wait for this dataset to finish transforming and validating. Accepts a progress function
-        and a timeout.
+        Wait for this dataset to finish transforming and validating. Accepts a progress function,
+        a timeout, and a `polling` strategy from `socrata.polling` (without one, it
+        polls every `sleeptime` seconds).
 
         Default timeout is 3 hours
         """
+        (is_finished, is_failed) = self._finish_conditions()
         return self._wait_for_finish(
-            is_finished = lambda m: m.attributes['completed_at'],
-            is_failed = lambda m: m.any_failed(),
+            is_finished = is_finished,
+            is_failed = is_failed,
             progress = progress,
             timeout = timeout,
-            sleeptime = sleeptime
+            sleeptime = sleeptime,
+            polling = polling
         )
 
-    def _munge_row(self, row):
-        row = row['row']
-        columns = sorted(self.attributes['output_columns'], key = lambda oc: oc['position'])
-        field_names = [oc['field_name'] for oc in columns]
-        return {k: v for k, v in zip(field_names, row)}
+    def _on_response(self, response):
+        super(OutputSchema, self)._on_response(response)
+        # Invalidate the column order computed from the last response
+        self._field_names = None
 
+    def field_names(self):
+        """
+        The field names of the output columns, ordered by position, which is
+        the order values come back in from `rows` and `schema_errors`
 
-    def _get_rows(self, uri, offset, limit):
+        Returns:
+        ```
+            tuple of field names
+        ```
+        """
+        if self._field_names is None:
+            columns = sorted(self.attributes['output_columns'], key = lambda oc: oc['position'])
+            self._field_names = tuple(oc['field_name'] for oc in columns)
+        return self._field_names
+
+    def _munge_row(self, row):
+        return dict(zip(self.field_names(), row['row']))
+
+    def _shape_rows(self, rows, row_format):
+        if row_format == 'dict':
+            field_names = self.field_names()
+            return [dict(zip(field_names, row['row'])) for row in rows]
+        if row_format == 'tuple':
+            return [tuple(row['row']) for row in rows]
+        if row_format == 'columns':
+            columns = {name: [] for name in self.field_names()}
+            appends = [columns[name].append for name in self.field_names()]
+            for row in rows:
+                for (append, value) in zip(appends, row['row']):
+                    append(value)
+            return columns
+        raise ValueError("row_format must be one of 'dict', 'tuple', or 'columns', not %s" % row_format)
+
+    def _get_rows(self, uri, offset, limit, row_format = 'dict'):
         resp = get(
             self.path(uri),
             params = {'limit': limit, 'offset': offset},
@@ -135,22 +297,147 @@ class OutputSchema(Resource):
         )
 
         rows = resp[1:]
-        return [self._munge_row(row) for row in rows]
+        return self._shape_rows(rows, row_format)
 
-    def rows(self, uri, offset = 0, limit = 500):
+    def rows(self, uri, offset = 0, limit = 500, row_format = 'dict'):
         """
         Get the rows for this OutputSchema. Acceps `offset` and `limit` params
         for paging through the data.
+
+        By default each row is a dict of field name to value. For big pages it's
+        cheaper to ask for a `row_format` of 'tuple', where each row is a tuple of
+        values in the order of `field_names()`, or 'columns', which returns a
+        single dict of field name to the list of that column's values.
         """
-        return self._get_rows(uri, offset, limit)
+        return self._get_rows(uri, offset, limit, row_format)
 
 
-    def schema_errors(self, uri, offset = 0, limit = 500):
+    def iter_rows(self, page_size = 500, prefetch = 4, offset = 0, row_format = 'dict'):
+        """
+        Iterate over all the rows in this OutputSchema, in order. Pages of
+        `page_size` rows are fetched `prefetch` at a time, so the next few
+        pages are usually already downloaded by the time they're needed.
+
+        Args:
+        ```
+            page_size (int): Number of rows to fetch per request. Defaults to 500.
+            prefetch (int): Number of pages to have in flight at once. Defaults to 4.
+            offset (int): The row to start at. Defaults to 0.
+            row_format (str): 'dict' or 'tuple', see `rows`. Defaults to 'dict'.
+        ```
+
+        Returns:
+        ```
+            generator of rows, the same as the ones returned by `rows`
+        ```
+
+        Examples:
+        ```python
+            for row in output_schema.iter_rows(page_size = 1000, prefetch = 8):
+                print(row)
+        ```
+        """
+        if row_format not in ('dict', 'tuple'):
+            raise ValueError("row_format must be one of 'dict' or 'tuple', not %s" % row_format)
+        with closing(self._iter_pages(page_size, prefetch, offset, row_format)) as pages:
+            for page in pages:
+                for row in page:
+                    yield row
+
+    def _iter_pages(self, page_size, prefetch, offset, row_format):
+        total_rows = self.attributes.get('total_rows')
+        self.auth.ensure_pool_size(prefetch)
+        pool = ThreadPoolExecutor(prefetch)
+        window = deque()
+        next_offset = offset
+
+        def fill():
+            nonlocal next_offset
+            while len(window) < prefetch and (total_rows is None or next_offset < total_rows):
+                window.append(pool.submit(self.rows, offset = next_offset, limit = page_size, row_format = row_format))
+                next_offset += page_size
+
+        try:
+            fill()
+            while window:
+                page = window.popleft().result()
+                fill()
+                yield page
+                if len(page) < page_size:
+                    # Without a total_rows to go by, a short page is the end
+                    return
+        finally:
+            for future in window:
+                future.cancel()
+            pool.shutdown(wait = False)
+
+    def iter_dataframes(self, page_size = 10000, prefetch = 4, offset = 0):
+        """
+        Iterate over the rows in this OutputSchema as pandas DataFrames, one
+        per page of `page_size` rows. Pages are prefetched like `iter_rows`.
+
+        Columns are built straight from the row values, with a dtype picked
+        from each output column's soql type: numbers are float64, checkboxes
+        are nullable booleans, dates and timestamps are datetime64, and
+        everything else is object. Values that failed to transform (see
+        `schema_errors`) come back as missing values.
+
+        Args:
+        ```
+            page_size (int): Number of rows per DataFrame. Defaults to 10000.
+            prefetch (int): Number of pages to have in flight at once. Defaults to 4.
+            offset (int): The row to start at. Defaults to 0.
+        ```
+
+        Returns:
+        ```
+            generator of pandas.DataFrame
+        ```
+        """
+        pandas = _import_pandas()
+        with closing(self._iter_pages(page_size, prefetch, offset, 'tuple')) as pages:
+            for page in pages:
+                yield self._page_to_dataframe(pandas, page)
+
+    def to_dataframe(self, page_size = 10000, prefetch = 4):
+        """
+        Get all the rows in this OutputSchema as a single pandas DataFrame.
+        See `iter_dataframes` for how the columns are typed.
+
+        Returns:
+        ```
+            pandas.DataFrame
+        ```
+
+        Examples:
+        ```python
+            df = output_schema.wait_for_finish().to_dataframe()
+        ```
+        """
+        pandas = _import_pandas()
+        frames = list(self.iter_dataframes(page_size = page_size, prefetch = prefetch))
+        if not frames:
+            return self._page_to_dataframe(pandas, [])
+        return pandas.concat(frames, ignore_index = True)
+
+    def _page_to_dataframe(self, pandas, page):
+        soql_types = {
+            oc['field_name']: oc.get('transform', {}).get('output_soql_type')
+            for oc in self.attributes['output_columns']
+        }
+        field_names = self.field_names()
+        cells_by_column = zip(*page) if page else [() for _ in field_names]
+        return pandas.DataFrame({
+            name: _to_series(pandas, [_ok_value(cell) for cell in cells], soql_types.get(name))
+            for (name, cells) in zip(field_names, cells_by_column)
+        }, columns = list(field_names))
+
+    def schema_errors(self, uri, offset = 0, limit = 500, row_format = 'dict'):
         """
         Get the errors that resulted in transforming into this output schema.
-        Accepts `offset` and `limit` params
+        Accepts `offset` and `limit` params, and a `row_format` like `rows`
         """
-        return self._get_rows(uri, offset, limit)
+        return self._get_rows(uri, offset, limit, row_format)
 
     def schema_errors_csv(self):
         """
@@ -167,6 +454,98 @@ class OutputSchema(Resource):
             stream = True
         )
 
+    def iter_schema_errors_csv(self, spill_to = None, chunk_size = 64 * 1024):
+        """
+        Stream the errors CSV (see `schema_errors_csv`), parsing it as it
+        downloads rather than loading the whole thing into memory.
+
+        Args:
+        ```
+            spill_to (str or file): Optional path or binary file to also write the raw CSV to as it
+                downloads, so it can be read again later without another request
+            chunk_size (int): Optional number of bytes to read from the response at a time. Defaults to 64KiB.
+        ```
+
+        Returns:
+        ```
+            generator of SchemaErrorRow, which have a `line` (the row number in the CSV, after the header),
+            `values` (a dict of column name to the value in the row) and `errors` (a list of SchemaError,
+            which have the `column` the error is in, or None if it's about the whole row, its `message`
+            and the `value` it's about)
+        ```
+
+        Examples:
+        ```python
+            for row in output_schema.iter_schema_errors_csv(spill_to = 'errors.csv'):
+                for error in row.errors:
+                    print(row.line, error.column, error.message)
+        ```
+        """
+        with closing(self.schema_errors_csv()) as response:
+            spill = spill_to
+            if isinstance(spill_to, str):
+                spill = open(spill_to, 'wb')
+            try:
+                raw = response.iter_content(chunk_size)
+                if spill is not None:
+                    raw = _tee(raw, spill)
+                reader = csv.reader(_csv_lines(raw, _charset(response)))
+                header = next(reader, None)
+                if header is None:
+                    return
+                error_columns = _error_columns(header)
+                for (line, row) in enumerate(reader, 1):
+                    values = {}
+                    messages = []
+                    for (name, value) in zip(header, row):
+                        if name in error_columns:
+                            if value:
+                                messages.append((error_columns[name], value))
+                        else:
+                            values[name] = value
+                    errors = [SchemaError(column, message, values.get(column)) for (column, message) in messages]
+                    yield SchemaErrorRow(line, values, errors)
+            finally:
+                if isinstance(spill_to, str):
+                    spill.close()
+
+    def summarize_schema_errors_csv(self, spill_to = None):
+        """
+        Count the errors in the errors CSV without holding it in memory (see
+        `iter_schema_errors_csv`).
+
+        Errors are counted per column, and per type of error, where the type is
+        the error message with any quoted text and numbers in it blanked out, so
+        that `Unable to convert "abc" to number` and `Unable to convert "xyz"
+        to number` are counted together.
+
+        Args:
+        ```
+            spill_to (str or file): Optional path or binary file to also write the raw CSV to
+        ```
+
+        Returns:
+        ```
+            dict with `rows` (the number of rows in the CSV), `errors` (the number of errors in them),
+            `columns` (column name to error count, where None counts errors about a whole row) and
+            `error_types` (error type to count)
+        ```
+        """
+        columns = Counter()
+        error_types = Counter()
+        rows = 0
+        for row in self.iter_schema_errors_csv(spill_to = spill_to):
+            rows += 1
+            for error in row.errors:
+                columns[error.column] += 1
+                error_types[_error_type(error.message)] += 1
+        return {
+            'rows': rows,
+            'errors': sum(columns.values()),
+            'columns': dict(columns),
+            'error_types': dict(error_types)
+        }
+
     def validate_row_id(self, uri, field_name):
         """
         Set the row id. Note you must call `validate_row_id` before doing this.
@@ -0,0 +1,73 @@
+"""
+How long to sleep between polls while waiting on a resource to finish.
+
+Every `wait_for_finish` (and `wait_for_schema`) takes a `polling` argument.
+Without one, it polls every `sleeptime` seconds like it always has. For long
+running work, an `ExponentialBackoff` makes far fewer requests:
+
+```python
+from socrata.polling import ExponentialBackoff
+
+output_schema.wait_for_finish(polling = ExponentialBackoff(initial = 1, maximum = 30))
+```
+
+Whatever the strategy, a `Retry-After` header on a 429 or 5xx response is
+respected, and the wait never sleeps past its timeout.
+"""
+import random
+
+class PollingStrategy(object):
+    """
+    Decides how long to sleep before the next poll. Strategies hold no state
+    of their own, so one can be shared by any number of waits.
+    """
+    def delay(self, state):
+        """
+        Seconds to sleep before polling again, given the `WaitState` of the
+        wait so far
+        """
+        raise NotImplementedError("%s does not implement delay" % self.__class__.__name__)
+
+
+class FixedInterval(PollingStrategy):
+    """
+    Poll every `seconds` seconds
+    """
+    def __init__(self, seconds = 1):
+        self.seconds = seconds
+
+    def delay(self, state):
+        return self.seconds
+
+
+class ExponentialBackoff(PollingStrategy):
+    """
+    Poll quickly at first, then back off by `multiplier` after every poll, up
+    to `maximum` seconds between polls.
+
+    Each delay is shortened by a random amount of up to `jitter` (a fraction
+    of the delay), so that many waits started at the same time don't all poll
+    in lockstep.
+
+    When the resource reports how far along it is, the time it will take to
+    finish at the current rate is used as an upper bound on the delay, so that
+    a resource that is almost done isn't slept past.
+    """
+    def __init__(self, initial = 1, maximum = 60, multiplier = 2, jitter = 0.5, use_eta = True):
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.use_eta = use_eta
+
+    def delay(self, state):
+        # The first poll has been made by the time there's a delay to work
+        # out, so that delay is `initial`. Capping the exponent keeps this
+        # from overflowing on very long waits.
+        exponent = min(max(state.polls - 1, 0), 64)
+        seconds = min(self.maximum, self.initial * (self.multiplier ** exponent))
+        if self.use_eta:
+            eta = state.eta()
+            if eta is not None:
+                seconds = min(seconds, max(self.initial, eta))
+        return seconds * (1 - self.jitter * random.random())
@@ -1,6 +1,8 @@
 import time
 import pprint
+import functools
 from socrata.http import noop, get, TimeoutException, UnexpectedResponseException
+from socrata.polling import FixedInterval
 from requests.exceptions import RequestException
 import requests
 
@@ -9,20 +11,65 @@ class Collection(object):
         self.auth = auth
 
     def _subresources(self, klass, resources):
-        return [klass(self.auth, res, self) for res in resources]
+        return [build(klass, self.auth, res, self) for res in resources]
 
     def _subresource(self, klass, res):
-        return klass(self.auth, res, self)
+        return build(klass, self.auth, res, self)
+
+
+def build(klass, auth, response, parent, **kwargs):
+    """
+    Make a `klass` from an API response. If the auth has an identity map and
+    already holds an object for this resource, that object is refreshed
+    with the response and returned instead.
+    """
+    identity_map = getattr(auth, 'identity_map', None)
+    if identity_map is None or not klass.identity_mapped or kwargs:
+        return klass(auth, response, parent, **kwargs)
+
+    attributes = response['resource'] if 'resource' in response else response
+    if not isinstance(attributes, dict) or attributes.get('id') is None:
+        return klass(auth, response, parent)
+
+    key = (klass, attributes['id'])
+    existing = identity_map.get(key)
+    if existing is None:
+        thing = klass(auth, response, parent)
+        identity_map.put(key, thing)
+        return thing
+
+    existing.parent = parent
+    links = response['links'] if 'resource' in response else response.get('links', {})
+    # Rebuilding the operations and children is the expensive part, and
+    # there's nothing to rebuild if the resource hasn't changed
+    if existing.attributes != attributes or existing.links != links:
+        existing._on_response(response)
+    return existing
+
+
+class LinkTemplates(object):
+    """
+    A tree of links with an `{id_name}` placeholder in them, split up around
+    the placeholder once, so that filling them in for each of many children
+    is only a join per link.
+    """
+    def __init__(self, links, id_name):
+        placeholder = '{%s}' % id_name
+        self._compiled = [
+            (name, uri.split(placeholder) if type(uri) == str else LinkTemplates(uri, id_name))
+            for name, uri in links.items()
+        ]
+
+    def fill(self, id_val):
+        id_val = str(id_val)
+        return {
+            name: id_val.join(parts) if type(parts) == list else parts.fill(id_val)
+            for name, parts in self._compiled
+        }
 
 
 def parameterize_links(links, id_name, id_val):
-    d = {}
-    for name, uri in links.items():
-        if type(uri) == str:
-            d[name] = uri.replace('{%s}' % id_name, str(id_val))
-        else:
-            d[name] = parameterize_links(uri, id_name, id_val)
-    return d
+    return LinkTemplates(links, id_name).fill(id_val)
 
 class ResourceFailedException(Exception):
     def __init__(self, body):
@@ -48,21 +95,17 @@ class ChildResourceSpec(object):
 
 
     def build_children_from(self, parent_response):
-        def build_links(child):
-
-            child_link_templates = self._parent.child_ops[self._links_namespace]
-            return parameterize_links(
-                child_link_templates,
-                self._link_id_attr,
-                child['id']
-            )
+        templates = LinkTemplates(
+            self._parent.links.get(self._links_namespace, {}),
+            self._link_id_attr
+        )
 
         subresources = []
         # This is the actual list of data in the parent response
         response_list = parent_response['resource'][self._response_namespace]
         for child in response_list:
             child_response = {
-                'links': build_links(child),
+                'links': templates.fill(child['id']),
                 'resource': child
             }
 
@@ -72,15 +115,95 @@ class ChildResourceSpec(object):
         return self._child_list_name, subresources
 
 
+class ChildList(object):
+    """
+    A list of child resources (ie: `source.input_schemas`), built from the
+    parent's last response the first time it's read, then kept on the
+    parent until the next response comes in.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner = None):
+        if instance is None:
+            return self
+        response = instance.__dict__.get('_children_response')
+        if response is not None:
+            for spec in instance.child_specs():
+                if spec._child_list_name == self.name:
+                    (_, children) = spec.build_children_from(response)
+                    instance.__dict__[self.name] = children
+                    return children
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(instance).__name__, self.name))
+
+
+class LinkOperation(object):
+    """
+    A method whose first argument is the uri of the link of the same name
+    in the resource's `links`. When the resource has that link, the uri is
+    filled in, so `source.show()` calls `show(links['show'])`. Otherwise the
+    method is returned as it is, and the caller has to pass a uri.
+
+    These are set up once per class, rather than making a closure for every
+    link on every object each time a response comes back.
+    """
+    def __init__(self, fun):
+        self.fun = fun
+        self.name = fun.__name__
+        functools.update_wrapper(self, fun)
+
+    def __get__(self, instance, owner = None):
+        if instance is None:
+            return self.fun
+        method = self.fun.__get__(instance, owner)
+        uri = (instance.__dict__.get('links') or {}).get(self.name)
+        if type(uri) == str:
+            return functools.partial(method, uri)
+        return method
+
+
+def _takes_uri(fun):
+    code = getattr(fun, '__code__', None)
+    return code is not None and code.co_argcount >= 2 and code.co_varnames[1] == 'uri'
+
+def _compile_operations(cls):
+    for name, value in list(vars(cls).items()):
+        if name.startswith('_') or name == 'path':
+            continue
+        if _takes_uri(value):
+            setattr(cls, name, LinkOperation(value))
+
+
 class Resource(object):
+    # Whether objects of this type are shared through the auth's identity map
+    identity_mapped = False
+
     def __init__(self, auth, response, parent = None, *args, **kwargs):
         self.auth = auth
         self._on_response(response)
         self.parent = parent
 
+    def __init_subclass__(cls, **kwargs):
+        super(Resource, cls).__init_subclass__(**kwargs)
+        _compile_operations(cls)
+
+    def __getattr__(self, name):
+        # Only called for names that aren't otherwise defined: a link that
+        # there is no method for, or the `*_uri` of a link
+        links = self.__dict__.get('links') or {}
+        uri = links.get(name)
+        if type(uri) == str:
+            return functools.partial(self._noop, uri)
+        if name.endswith('_uri'):
+            uri = links.get(name[:-len('_uri')])
+            if type(uri) == str:
+                return uri
+        raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+
     @classmethod
     def from_uri(cls, auth, uri):
-        path = 'https://{domain}{uri}'.format(
+        path = '{proto}{domain}{uri}'.format(
+            proto = auth.proto,
             domain = auth.domain,
             uri = uri
         )
@@ -89,7 +212,7 @@ class Resource(object):
 
 
     def _clone(self, res):
-        return self.__class__(self.auth, res, self.parent)
+        return build(self.__class__, self.auth, res, self.parent)
     
     def _handle_non_standard_responses(self, response):
         resp_non_standard = 'resource' not in response
@@ -104,44 +227,50 @@ class Resource(object):
         response = self._handle_non_standard_responses(response)
         self.attributes = response['resource']
         self.links = response['links']
-        self._define_operations(self.links)
         self._define_children(response)
 
     def _define_children(self, response):
-        for child_list_name, child_list in [
-            spec.build_children_from(response)
-            for spec in self.child_specs()
-        ]:
-            setattr(self, child_list_name, child_list)
+        # Children are built the first time they're asked for (see
+        # ChildList), so that polling a source doesn't build a tree of
+        # schemas on every response. Any that were built from the last
+        # response are thrown away here.
+        cls = self.__class__
+        if '_child_list_names' not in cls.__dict__:
+            cls._child_list_names = [spec._child_list_name for spec in self.child_specs()]
+            for name in cls._child_list_names:
+                setattr(cls, name, ChildList(name))
+        for name in cls._child_list_names:
+            self.__dict__.pop(name, None)
+        self._children_response = response
 
     def child_specs(self):
         return []
 
     def path(self, uri):
-        return 'https://{domain}{uri}'.format(
+        return '{proto}{domain}{uri}'.format(
+            proto = self.auth.proto,
             domain = self.auth.domain,
             uri = uri
         )
 
     def _subresource(self, klass, res, **kwargs):
-        return klass(self.auth, res, self, **kwargs)
+        return build(klass, self.auth, res, self, **kwargs)
 
     def _subresources(self, klass, resources):
-        return [klass(self.auth, res, self) for res in resources]
+        return [build(klass, self.auth, res, self) for res in resources]
 
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, pprint.pformat(self.attributes))
 
-    def _define_operations(self, links):
-        self_ops = {name: uri for name, uri in links.items() if type(uri) == str}
-        child_ops = {name: d for name, d in links.items() if type(d) == dict}
+    @property
+    def available_operations(self):
+        # The operations themselves are looked up in `links` when they're
+        # called, see LinkOperation
+        return [name for name, uri in self.links.items() if type(uri) == str]
 
-        for name, uri in self_ops.items():
-            setattr(self, name, self._dispatch(name, uri))
-            setattr(self, '%s_uri' % name, uri)
-
-        setattr(self, 'available_operations', self_ops.keys())
-        setattr(self, 'child_ops', child_ops)
+    @property
+    def child_ops(self):
+        return {name: d for name, d in self.links.items() if type(d) == dict}
 
     def list_operations(self):
         """
@@ -149,20 +278,7 @@ class Resource(object):
         object. These map directly onto what's returned from the API
         in the `links` section of each resource
         """
-        return getattr(self, 'available_operations', [])
-
-    # Yes this is kind of terrifying and bad and magic but i can't
-    # think of a less obnoxious way to inject the uri
-    def _dispatch(self, name, uri):
-        og_method_name = '_' + name
-        if not hasattr(self, og_method_name):
-            og_method = getattr(self, name, self._noop)
-            setattr(self, og_method_name, og_method)
-
-        old = getattr(self, og_method_name, self._noop)
-        def f(*args, **kwargs):
-            return old(uri, *args, **kwargs)
-        return f
+        return self.available_operations
 
     def _noop(self, uri, *args, **kwargs):
         raise NotImplementedError("%s is not implemented" % uri)
@@ -178,31 +294,131 @@ class Resource(object):
             auth = self.auth
         ))
 
-    def _wait_for_finish(self, is_finished, is_failed, progress, timeout, sleeptime):
-        consecutive_failures = 0
-        last_exception = None
-        started = time.time();
-        while not is_finished(self):
-            current = time.time()
-            if timeout and (current - started > timeout):
-                raise TimeoutException("Timed out after %s seconds waiting for completion for %s" % (timeout, str(self)))
-            if consecutive_failures > 5 and last_exception is not None:
-                raise last_exception
+    def _finish_conditions(self):
+        """
+        The (is_finished, is_failed) predicates that `wait_for_finish` waits on
+        """
+        raise NotImplementedError("%s cannot be waited on" % self.__class__.__name__)
+
+    def _progress(self):
+        """
+        How far along this resource is, as a fraction between 0 and 1, or None
+        if it doesn't say. Used to estimate when it will finish.
+        """
+        return None
+
+    def _wait_for_finish(self, is_finished, is_failed, progress, timeout, sleeptime, polling = None):
+        state = WaitState(self, is_finished, is_failed, progress, timeout, polling or FixedInterval(sleeptime))
+        while not state.is_done():
             try:
                 me = self.show()
-            except RequestException as e:
-                last_exception = e
-                consecutive_failures += 1
-                continue
-            except UnexpectedResponseException as e:
-                if 500 <= e.status <= 599:
-                    last_exception = e
-                    consecutive_failures += 1
-                    continue
-                raise e
-            consecutive_failures = 0
-            progress(self)
-            if is_failed(self):
-                raise ResourceFailedException(me)
-            time.sleep(sleeptime)
+            except (RequestException, UnexpectedResponseException) as e:
+                state.on_error(e)
+            else:
+                state.on_response(me)
+            time.sleep(state.next_delay())
         return self
+
+# Subclasses are compiled by __init_subclass__
+_compile_operations(Resource)
+
+
+class WaitState(object):
+    """
+    The bookkeeping for waiting on a resource to finish: timing out, giving
+    up after repeated transient failures, reporting progress, noticing when
+    the resource failed, and deciding how long to sleep between polls. It
+    doesn't do any waiting itself, so the same rules apply whether the
+    polling is driven by a blocking loop or an event loop.
+    """
+    def __init__(self, resource, is_finished, is_failed, progress, timeout, polling = None):
+        self.resource = resource
+        self.is_finished = is_finished
+        self.is_failed = is_failed
+        self.progress = progress
+        self.timeout = timeout
+        self.polling = polling or FixedInterval()
+        self.polls = 0
+        self.consecutive_failures = 0
+        self.last_exception = None
+        self.started = time.time()
+        self._first_progress = None
+        self._last_progress = None
+
+    def is_done(self):
+        """
+        Whether the resource has finished. Raises if we've waited too long, or
+        the last few polls all failed.
+        """
+        if self.is_finished(self.resource):
+            return True
+        current = time.time()
+        if self.timeout and (current - self.started > self.timeout):
+            raise TimeoutException("Timed out after %s seconds waiting for completion for %s" % (self.timeout, str(self.resource)))
+        if self.consecutive_failures > 5 and self.last_exception is not None:
+            raise self.last_exception
+        return False
+
+    def on_error(self, e):
+        """
+        Polling raised `e`. Connection errors, 5xx and 429 responses are
+        retried, anything else is re-raised.
+        """
+        if isinstance(e, UnexpectedResponseException) and not (500 <= e.status <= 599 or e.status == 429):
+            raise e
+        self.polls += 1
+        self.last_exception = e
+        self.consecutive_failures += 1
+
+    def on_response(self, me):
+        """
+        Polling succeeded, and `me` is the refreshed resource
+        """
+        self.polls += 1
+        self.consecutive_failures = 0
+        self.last_exception = None
+        self._record_progress()
+        self.progress(self.resource)
+        if self.is_failed(self.resource):
+            raise ResourceFailedException(me)
+
+    def eta(self):
+        """
+        Seconds until the resource finishes, going by the rate its progress
+        has moved at so far, or None if that can't be told
+        """
+        if self._first_progress is None or self._last_progress is None:
+            return None
+        (first_at, first) = self._first_progress
+        (last_at, last) = self._last_progress
+        if last_at <= first_at or last <= first:
+            return None
+        rate = (last - first) / (last_at - first_at)
+        return max(1.0 - last, 0.0) / rate
+
+    def next_delay(self):
+        """
+        Seconds to sleep before the next poll. The polling strategy decides,
+        but a `Retry-After` from the server is always honored, and we never
+        sleep past the timeout.
+        """
+        if self.is_finished(self.resource):
+            return 0
+        seconds = self.polling.delay(self)
+        retry_after = getattr(self.last_exception, 'retry_after', None)
+        if retry_after is not None:
+            seconds = max(seconds, retry_after)
+        if self.timeout:
+            remaining = self.timeout - (time.time() - self.started)
+            # Sleep just past the deadline, so the next check times out
+            seconds = min(seconds, max(remaining, 0) + 0.01)
+        return max(seconds, 0)
+
+    def _record_progress(self):
+        fraction = self.resource._progress()
+        if fraction is None:
+            return
+        sample = (time.time(), fraction)
+        if self._first_progress is None:
+            self._first_progress = sample
+        self._last_progress = sample
@@ -1,8 +1,10 @@
 import json
 import requests
-from socrata.http import post, put, delete, get, pluck_resource
-from socrata.resource import Collection, Resource
+from socrata.http import post, put, delete, get, pluck_resource, UnexpectedResponseException
+from socrata.resource import Collection, Resource, parameterize_links
+from socrata.output_schema import OutputSchema
 from socrata.sources import Source
+from socrata.bulk_upload import BulkUpload, DEFAULT_PARALLELISM
 from socrata.job import Job
 import webbrowser
 
@@ -13,7 +15,8 @@ class Revisions(Collection):
 
 
     def path(self):
-        return 'https://{domain}/api/publishing/v1/revision/{fourfour}'.format(
+        return '{proto}{domain}/api/publishing/v1/revision/{fourfour}'.format(
+            proto = self.auth.proto,
             domain = self.auth.domain,
             fourfour = self.fourfour
         )
@@ -126,7 +129,8 @@ class Revisions(Collection):
 
     @staticmethod
     def new(auth, metadata, deleted_at = None):
-        path = 'https://{domain}/api/publishing/v1/revision'.format(
+        path = '{proto}{domain}/api/publishing/v1/revision'.format(
+            proto = auth.proto,
             domain = auth.domain,
         )
 
@@ -179,6 +183,11 @@ class Revision(Resource):
     """
     A revision is a change to a dataset
     """
+    def __init__(self, *args, **kwargs):
+        # output_schema_id => (source, input_schema) for the output schemas
+        # we've seen in this revision, see get_output_schema
+        self._output_schema_owners = {}
+        super(Revision, self).__init__(*args, **kwargs)
 
     def create_upload(self, filename, parse_options = {}):
         """
@@ -198,6 +207,42 @@ class Revision(Resource):
             'filename': filename
         }, parse_options)
 
+    def bulk_upload(self, files, parallelism = DEFAULT_PARALLELISM, **kwargs):
+        """
+        Upload several files into new sources within this revision at once.
+        Rather than each upload running a pool of its own, the chunks of every
+        file are sent on one pool of `parallelism` workers, with the files
+        taking turns, and each file is committed as soon as it's all been sent.
+        A file that fails doesn't stop the others.
+
+        Args:
+        ```
+            files (list): A (filename, file handle, content type) tuple for each file. The file handle can be
+                anything `Source.csv` takes (a file, str, bytes or generator).
+            parallelism (int): Optional number of chunks in flight at once, across all the files. Defaults to 8.
+
+            Any other arguments are passed to each upload, as for `Source.csv`, ie: max_retries, compression
+        ```
+        Returns:
+        ```
+            (list, dict): A (Source, error) pair for each file, in the order they were given, where one
+                of the two is None; and stats for the whole thing: the number of files, failed files, bytes,
+                chunks, seconds and bytes_per_second, with per_file bytes, chunks and seconds
+        ```
+
+        Examples:
+        ```python
+            with open('a.csv', 'rb') as a, open('b.tsv', 'rb') as b:
+                (results, stats) = revision.bulk_upload([
+                    ('a.csv', a, 'text/csv'),
+                    ('b.tsv', b, 'text/tab-separated-values')
+                ])
+            for (source, error) in results:
+                ...
+        ```
+        """
+        return BulkUpload(self, files, parallelism, **kwargs).run()
+
     def source_from_url(self, url, parse_options = {}):
         """
         Create a URL source
@@ -261,21 +306,72 @@ class Revision(Resource):
         ))
 
     def get_output_schema(self):
+        """
+        Get the output schema that was set on this revision, which is the one
+        that will be applied if `apply` isn't given one.
+
+        The source and input schema that own each output schema in this
+        revision are remembered as it's uploaded to, transformed and listed,
+        so an output schema seen any of those ways is fetched on its own.
+        Only one that hasn't been seen (or is no longer there) means listing
+        every source in the revision.
+
+        Returns:
+        ```
+            OutputSchema, or None if the revision doesn't have one set
+        ```
+        """
         self.show()
         output_schema_id = self.attributes['output_schema_id']
         if not output_schema_id:
             return None
 
+        output_schema = self._show_output_schema(output_schema_id)
+        if output_schema is not None:
+            return output_schema
+
         sources = self.list_sources()
-        output_schemas = [o_s for source in sources for i_s in source.input_schemas for o_s in i_s.output_schemas]
         output_schema = None
-
-        for o_s in output_schemas:
-            if o_s.attributes['id'] == output_schema_id:
-                output_schema = o_s
+        for source in sources:
+            for i_s in source.input_schemas:
+                for o_s in i_s.output_schemas:
+                    self._remember_output_schema(o_s.attributes['id'], source, i_s)
+                    if o_s.attributes['id'] == output_schema_id:
+                        output_schema = o_s
 
         return output_schema
 
+    def _remember_output_schema(self, output_schema_id, source, input_schema):
+        # Called by each OutputSchema built under one of this revision's
+        # sources, however it came about
+        self._output_schema_owners[output_schema_id] = (source, input_schema)
+
+    def _show_output_schema(self, output_schema_id):
+        # If we've seen this output schema before, we know which input schema
+        # it belongs to, so it can be fetched through that input schema's
+        # output schema link template
+        owners = self._output_schema_owners.get(output_schema_id)
+        if owners is None:
+            return None
+
+        (source, input_schema) = owners
+        templates = input_schema.links.get('output_schema_links', {})
+        if 'show' not in templates:
+            return None
+        links = parameterize_links(templates, 'output_schema_id', output_schema_id)
+        try:
+            response = get(self.path(links['show']), auth = self.auth)
+        except UnexpectedResponseException as e:
+            if e.status != 404:
+                raise
+            # It's gone, so go looking for it
+            self._output_schema_owners.pop(output_schema_id, None)
+            return None
+
+        if not response.get('links'):
+            response = {'resource': response.get('resource', response), 'links': links}
+        return input_schema._subresource(OutputSchema, response)
+
     def set_output_schema(self, output_schema_id):
         """
         Set the output schema id on the revision. This is what will get applied when
@@ -1,5 +1,9 @@
 import json
 import io
+import os
+import mmap
+import time
+import logging
 import webbrowser
 import types
 from time import sleep
@@ -8,13 +12,20 @@ from socrata.resource import Resource, Collection, ChildResourceSpec
 from socrata.input_schema import InputSchema
 from socrata.builders.parse_options import ParseOptionBuilder
 from socrata.lazy_pool import LazyThreadPoolExecutor
+from socrata.journal import UploadJournal, fingerprint
+from socrata.concurrency import AdaptiveConcurrency
+from socrata.compression import compressor
+from socrata.checksum import crc32, format_checksum, UploadChecksum, CHUNK_CHECKSUM_HEADER, UPLOAD_CHECKSUM_HEADER
 from threading import Lock
 from requests.exceptions import RequestException
 
+log = logging.getLogger(__name__)
+
 
 class Sources(Collection):
     def path(self):
-        return 'https://{domain}/api/publishing/v1/source'.format(
+        return '{proto}{domain}/api/publishing/v1/source'.format(
+            proto = self.auth.proto,
             domain = self.auth.domain
         )
 
@@ -70,11 +81,26 @@ class Sources(Collection):
         ))
 
 
+def skips(skip, seq_num, data):
+    """
+    Whether the chunk `seq_num` can be stepped over. `skip` is either a set
+    of sequence numbers, or a dict of them to the CRC32 the chunk had when
+    it was sent, in which case the chunk is only skipped if it still has it.
+    """
+    if seq_num not in skip:
+        return False
+    expected = skip.get(seq_num) if isinstance(skip, dict) else None
+    if expected is None or crc32(data) == expected:
+        return True
+    log.warning('Chunk %s has changed since it was sent, sending it again', seq_num)
+    return False
+
 class ChunkIterator(object):
-    def __init__(self, filelike, chunk_size):
+    def __init__(self, filelike, chunk_size, skip = ()):
         self._filelike = filelike
         self.lock = Lock()
         self._chunk_size = chunk_size
+        self._skip = skip
         self.seq_num = 0
         self.byte_offset = 0
 
@@ -83,113 +109,429 @@ class ChunkIterator(object):
 
     def __next__(self):
         with self.lock:
-            read = self._filelike.read(self._chunk_size)
-            if not read:
-                raise StopIteration
+            while True:
+                read = self._filelike.read(self._chunk_size)
+                if not read:
+                    raise StopIteration
+
+                this_seq = self.seq_num
+                this_byte_offset = self.byte_offset
+                self.seq_num = self.seq_num + 1
+                self.byte_offset = self.byte_offset + len(read)
+                if not skips(self._skip, this_seq, read):
+                    return (this_seq, this_byte_offset, self.byte_offset, read)
 
-            this_seq = self.seq_num
-            this_byte_offset = self.byte_offset
-            self.seq_num = self.seq_num + 1
-            self.byte_offset = self.byte_offset + len(read)
-            return (this_seq, this_byte_offset, self.byte_offset, read)
+    def next(self):
+        return self.__next__()
+
+class MmapChunkIterator(object):
+    """
+    Iterates over a real file in chunks without reading it. Each chunk is a
+    memoryview onto a read-only mapping of the file, so the only thing done
+    under the lock is offset arithmetic, and the bytes are paged in by
+    whichever worker thread sends them.
+    """
+    def __init__(self, fileobj, chunk_size, skip = ()):
+        self._fileobj = fileobj
+        self._start = fileobj.tell()
+        self._end = os.fstat(fileobj.fileno()).st_size
+        self._mmap = mmap.mmap(fileobj.fileno(), 0, access = mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self.lock = Lock()
+        self._chunk_size = chunk_size
+        self._skip = skip
+        self.seq_num = 0
+        self.byte_offset = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self.lock:
+            while True:
+                start = self._start + self.byte_offset
+                if start >= self._end:
+                    raise StopIteration
+
+                end = min(start + self._chunk_size, self._end)
+                this_seq = self.seq_num
+                this_byte_offset = self.byte_offset
+                self.seq_num = self.seq_num + 1
+                self.byte_offset = self.byte_offset + (end - start)
+                if not skips(self._skip, this_seq, self._view[start:end]):
+                    return (this_seq, this_byte_offset, self.byte_offset, self._view[start:end])
 
     def next(self):
         return self.__next__()
 
+    def close(self):
+        with self.lock:
+            # Leave the file where reading it would have left it, and
+            # stop handing out chunks
+            self._fileobj.seek(self._start + self.byte_offset)
+            self._end = 0
+            self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A chunk is still referenced somewhere (ie: we're unwinding
+            # from a failed upload); the mapping is closed when it's collected
+            pass
+
+# What open() returns for a file opened in binary mode. Other things with a
+# fileno, like gzip or bz2 files, don't read the bytes of the file they're
+# on, so they can't be mapped.
+MAPPABLE_FILE_TYPES = (io.BufferedReader, io.BufferedRandom, io.FileIO)
+
+def chunk_iterator(file_handle, chunk_size, skip = ()):
+    """
+    Real, binary files get mapped into memory rather than read, anything
+    else is read through a lock one chunk at a time. Chunks whose seq_num
+    is in `skip` are stepped over (see `skips`).
+    """
+    if type(file_handle) in MAPPABLE_FILE_TYPES:
+        try:
+            return MmapChunkIterator(file_handle, chunk_size, skip)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            # Not mappable (pipes, sockets), or empty
+            pass
+    return ChunkIterator(file_handle, chunk_size, skip)
+
+# Characters read from a text file at a time, to be encoded
+TEXT_READ_SIZE = 64 * 1024
+
+def text_pieces(text_handle):
+    """
+    Read a file opened in text mode a piece at a time, for a
+    FileLikeGenerator to encode, so that it's chunked by bytes rather than
+    by characters
+    """
+    return iter(lambda: text_handle.read(TEXT_READ_SIZE), '')
+
 class FileLikeGenerator(object):
+    """
+    Reads a generator as though it were a file. The generator can yield
+    bytes, memoryviews or strs, which are encoded as UTF-8 as they're read.
+    Every read is exactly `how_much` bytes until the generator runs out: the
+    piece that would go over is split, and the rest of it is carried into
+    the next read as a view rather than a copy. So each byte is copied once, when the pieces
+    of a read are joined, and not at all when a read is one whole `bytes`.
+
+    Pieces are held on to until they've been read, so the generator must
+    not modify something it has yielded.
+    """
     def __init__(self, gen):
         self.gen = gen
         self.done = False
+        self._leftover = None
 
     def read(self, how_much):
-        if self.done:
-            return None
-
-        buf = []
-        consumed = 0
-        while consumed < how_much:
-            try:
-                chunk = next(self.gen)
-                consumed += len(chunk)
-                buf.append(chunk)
-            except StopIteration:
+        parts = []
+        have = 0
+        if self._leftover is not None:
+            parts.append(self._leftover)
+            have = len(self._leftover)
+            self._leftover = None
+
+        if have < how_much and not self.done:
+            append = parts.append
+            for piece in self.gen:
+                kind = type(piece)
+                if kind is not bytes:
+                    piece = piece.encode('utf-8') if kind is str else self._as_bytes(piece)
+                append(piece)
+                have += len(piece)
+                if have >= how_much:
+                    break
+            else:
                 self.done = True
-                break
 
-        return b''.join(buf)
+        if have > how_much:
+            last = memoryview(parts[-1])
+            keep = len(last) - (have - how_much)
+            parts[-1] = last[:keep]
+            self._leftover = last[keep:]
 
+        if len(parts) == 1 and type(parts[0]) is bytes:
+            return parts[0]
+        return b''.join(parts)
 
-class Source(Resource, ParseOptionBuilder):
-    def initiate(self, uri, content_type):
-        return post(
-            self.path(uri),
-            auth = self.auth,
-            data = json.dumps({ 'content_type': content_type })
-        )
+    @staticmethod
+    def _as_bytes(piece):
+        # Something whose len is its size in bytes
+        if type(piece) is memoryview and piece.format != 'B':
+            return piece.cast('B')
+        return piece
 
-    def chunk(self, uri, seq_num, byte_offset, bytes):
-        return post(
-            self.path(uri).format(seq_num=seq_num, byte_offset=byte_offset),
-            auth = self.auth,
-            data = bytes,
-            headers = { 'content-type': 'application/octet-stream' }
-        )
 
-    def commit(self, uri, seq_num, byte_offset):
-        return post(
-            self.path(uri).format(seq_num=seq_num, byte_offset=byte_offset),
-            auth = self.auth
-        )
+# Rows of a DataFrame turned into CSV at a time when streaming it
+DATAFRAME_BATCH_ROWS = 10000
 
+def dataframe_csv_batches(dataframe, batch_rows):
+    """
+    Yields a DataFrame as CSV bytes, `batch_rows` rows at a time, so that
+    only one batch of it is ever rendered in memory.
+    """
+    for start in range(0, max(len(dataframe), 1), batch_rows):
+        batch = dataframe.iloc[start:start + batch_rows]
+        yield batch.to_csv(index = False, header = (start == 0)).encode()
 
-    def _chunked_bytes(self, file_or_string_or_bytes_or_generator, content_type, **kwargs):
 
+class ChunkedUpload(object):
+    """
+    One upload of a file (or string, bytes or generator) into a source:
+    initiating it, the chunks that still need to be sent, sending one of
+    them with retries, and committing it once they've all been sent.
+
+    `run` sends the chunks on a pool of the upload's own, which is what the
+    upload methods on Source do. Anything else can send them some other way,
+    as long as it calls `close` and then `commit` when they've all been sent
+    (see socrata.bulk_upload).
+    """
+    def __init__(self, source, file_or_string_or_bytes_or_generator, content_type, **kwargs):
+        # Chunks are sent with the byte offsets they start and end at, so
+        # text is encoded before it's chunked rather than as it's sent
         if type(file_or_string_or_bytes_or_generator) is str:
-            file_handle = io.StringIO(file_or_string_or_bytes_or_generator)
+            file_handle = io.BytesIO(file_or_string_or_bytes_or_generator.encode('utf-8'))
         elif type(file_or_string_or_bytes_or_generator) is bytes:
             file_handle = io.BytesIO(file_or_string_or_bytes_or_generator)
         elif isinstance(file_or_string_or_bytes_or_generator, types.GeneratorType):
             file_handle = FileLikeGenerator(file_or_string_or_bytes_or_generator)
+        elif isinstance(file_or_string_or_bytes_or_generator, io.TextIOBase):
+            file_handle = FileLikeGenerator(text_pieces(file_or_string_or_bytes_or_generator))
         elif hasattr(file_or_string_or_bytes_or_generator, 'read'):
             file_handle = file_or_string_or_bytes_or_generator
         else:
             raise ValueError("The thing to upload must be a file, string, bytes, or generator which yields bytes")
 
+        self.source = source
+        self._lock = Lock()
+        compress = compressor(kwargs.get('compression'))
+
+        journal = None
+        if kwargs.get('resumable', False):
+            file_fingerprint = fingerprint(file_or_string_or_bytes_or_generator)
+            if file_fingerprint is None:
+                raise ValueError("Only files, strings, and bytes can be uploaded with resumable = True")
+            journal = UploadJournal.open(kwargs.get('journal_dir'), source.attributes['id'], file_fingerprint)
+
+        if journal and journal.is_resumable():
+            # The server already handed out upload parameters for this
+            # file, and has some of its chunks; initiating again would
+            # start the upload over
+            init = journal.header
+            journal.start(init, journal.acknowledged, journal.checksums)
+        else:
+            init = source.initiate(content_type, content_encoding = compress.encoding if compress else None)
+            if journal:
+                journal.start({
+                    'preferred_chunk_size': init['preferred_chunk_size'],
+                    'preferred_upload_parallelism': init['preferred_upload_parallelism'],
+                    'content_encoding': init.get('content_encoding')
+                })
+
+        if compress and init.get('content_encoding') != compress.encoding:
+            log.info('The server does not take %s compressed chunks, sending them uncompressed', compress.encoding)
+            compress = None
+
+        self.journal = journal
+        self.compress = compress
+        self.chunk_size = init['preferred_chunk_size']
+        self.parallelism = init['preferred_upload_parallelism']
+        self.max_retries = kwargs.get('max_retries', 5)
+        self.backoff_seconds = kwargs.get('backoff_seconds', 2)
+        self.upload_checksum = UploadChecksum() if kwargs.get('checksums', True) else None
+        # Bytes (before compression) and chunks the server has acknowledged
+        self.bytes_sent = 0
+        self.chunks_sent = 0
+
+        self.controller = None
+        if kwargs.get('adaptive_parallelism', False):
+            self.controller = AdaptiveConcurrency(
+                self.parallelism,
+                maximum = kwargs.get('max_parallelism', self.parallelism * 4)
+            )
 
-        init = self.initiate(content_type)
-        chunk_size = init['preferred_chunk_size']
-        parallelism = init['preferred_upload_parallelism']
-        max_retries = kwargs.get('max_retries', 5)
-        backoff_seconds = kwargs.get('backoff_seconds', 2)
-
-        def sendit(chunk, attempts = 0):
-            (seq_num, byte_offset, end_byte_offset, bytes) = chunk
-            try:
-                self.chunk(seq_num, byte_offset, bytes)
-            except RequestException as e:
-                return retry(chunk, e, attempts)
-            except UnexpectedResponseException as e:
-                if 500 <= e.status <= 599:
-                    return retry(chunk, e, attempts)
-                else:
-                    raise e
-
-            return (seq_num, byte_offset, end_byte_offset)
-
-        def retry(chunk, e, attempts):
-            if attempts < max_retries:
-                attempts = attempts + 1
-                sleep(attempts * attempts * backoff_seconds)
-                return sendit(chunk, attempts)
+        already_sent = list(journal.acknowledged.values()) if journal else []
+        # Chunks the server already has are skipped if they still match the
+        # checksum they were sent with; ones that don't are sent again
+        skip = {seq: journal.checksums.get(seq) for (seq, _, _) in already_sent}
+        if self.upload_checksum:
+            for (seq, byte_offset, end_byte_offset) in already_sent:
+                if journal.checksums.get(seq) is not None:
+                    self.upload_checksum.add(seq, journal.checksums[seq], end_byte_offset - byte_offset)
+        self.chunks = chunk_iterator(file_handle, self.chunk_size, skip = skip)
+        # Only the last chunk matters for the commit, so keep track of that
+        # rather than holding on to every result
+        self.last = max(already_sent, default = None)
+
+    def send(self, chunk, attempts = 0):
+        """
+        Send one chunk, as handed out by `chunks`, retrying it if that fails
+        in a way that might not happen again
+        """
+        (seq_num, byte_offset, end_byte_offset, bytes) = chunk
+        checksum = None
+        if self.upload_checksum:
+            # Worked out by the worker sending the chunk, so the
+            # checksums of several chunks are computed at once
+            checksum = crc32(bytes)
+            self.upload_checksum.add(seq_num, checksum, len(bytes))
+        body = bytes
+        if self.compress:
+            # Chunks are compressed on their own, by the worker which
+            # sends them, so the checksum and offsets are still those
+            # of the uncompressed bytes
+            body = self.compress.compress(bytes)
+        controller = self.controller
+        try:
+            started = time.time()
+            self.source.chunk(
+                seq_num,
+                byte_offset,
+                body,
+                checksum = checksum,
+                content_encoding = self.compress.encoding if self.compress else None
+            )
+            if controller:
+                controller.release(end_byte_offset - byte_offset, time.time() - started)
+            if isinstance(bytes, memoryview):
+                bytes.release()
+        except RequestException as e:
+            return self._retry(chunk, e, attempts)
+        except UnexpectedResponseException as e:
+            if 500 <= e.status <= 599:
+                return self._retry(chunk, e, attempts)
             else:
+                if controller:
+                    controller.release()
                 raise e
 
+        if self.journal:
+            self.journal.record(seq_num, byte_offset, end_byte_offset, checksum)
+        result = (seq_num, byte_offset, end_byte_offset)
+        with self._lock:
+            self.bytes_sent += end_byte_offset - byte_offset
+            self.chunks_sent += 1
+            if self.last is None or seq_num > self.last[0]:
+                self.last = result
+        return result
+
+    def _retry(self, chunk, e, attempts):
+        controller = self.controller
+        if controller:
+            controller.record_failure()
+        if attempts < self.max_retries:
+            attempts = attempts + 1
+            sleep(attempts * attempts * self.backoff_seconds)
+            return self.send(chunk, attempts)
+        else:
+            if controller:
+                controller.release()
+            raise e
+
+    def run(self):
+        """
+        Send every chunk on a pool of the upload's own, then commit it
+        """
+        controller = self.controller
+        source = self.source
+        if controller:
+            # Every worker the limit could possibly need is started up front,
+            # but they only take a chunk when the controller has room
+            source.auth.ensure_pool_size(controller.maximum)
+            pool = LazyThreadPoolExecutor(controller.maximum, max_pending = controller.maximum)
+            to_send = controller.gate(self.chunks)
+        else:
+            source.auth.ensure_pool_size(self.parallelism)
+            pool = LazyThreadPoolExecutor(self.parallelism, max_pending = self.parallelism)
+            to_send = self.chunks
+        try:
+            for _ in pool.map(self.send, to_send):
+                pass
+        except Exception:
+            # The pool has stopped handing out chunks; the ones that were
+            # already being sent finish on their own
+            if pool.failed_item is not None:
+                log.warning(
+                    'Upload of source %s failed on chunk %s, abandoning chunks %s which were in flight',
+                    source.attributes['id'],
+                    pool.failed_item[:3],
+                    [chunk[:3] for chunk in pool.in_flight_at_failure]
+                )
+            raise
+        finally:
+            self.close()
+        return self.commit()
+
+    def close(self):
+        """
+        Let go of the file and the journal, whether or not the upload worked
+        """
+        if self.controller:
+            self.source.upload_parallelism = self.controller.report()
+            log.info('Upload of source %s used parallelism %s', self.source.attributes['id'], self.source.upload_parallelism)
+        if hasattr(self.chunks, 'close'):
+            self.chunks.close()
+        if self.journal:
+            self.journal.close()
+
+    def commit(self):
+        """
+        Tell the server every chunk has been sent, and return the source
+        """
+        if self.last is None:
+            raise ValueError("There was nothing to upload")
+        (seq_num, byte_offset, end_byte_offset) = self.last
+        # None if the checksum of a chunk sent by an earlier attempt wasn't
+        # journaled, in which case the server can't be told the whole thing
+        self.source.commit(seq_num, end_byte_offset, checksum = self.upload_checksum.value() if self.upload_checksum else None)
+        if self.journal:
+            self.journal.remove()
+        return self.source.show()
 
-        pool = LazyThreadPoolExecutor(parallelism)
-        results = [r for r in pool.map(sendit, ChunkIterator(file_handle, chunk_size))]
-        (seq_num, byte_offset, end_byte_offset) = sorted(results, key=lambda x: x[0])[-1]
-        self.commit(seq_num, end_byte_offset)
-        return self.show()
+
+class Source(Resource, ParseOptionBuilder):
+    identity_mapped = True
+
+    def initiate(self, uri, content_type, content_encoding = None):
+        body = { 'content_type': content_type }
+        if content_encoding is not None:
+            # The server says whether it will take chunks compressed this
+            # way by handing the content_encoding back
+            body['content_encoding'] = content_encoding
+        return post(
+            self.path(uri),
+            auth = self.auth,
+            data = json.dumps(body)
+        )
+
+    def chunk(self, uri, seq_num, byte_offset, bytes, checksum = None, content_encoding = None):
+        headers = { 'content-type': 'application/octet-stream' }
+        if checksum is not None:
+            headers[CHUNK_CHECKSUM_HEADER] = format_checksum(checksum)
+        if content_encoding is not None:
+            headers['content-encoding'] = content_encoding
+        return post(
+            self.path(uri).format(seq_num=seq_num, byte_offset=byte_offset),
+            auth = self.auth,
+            data = bytes,
+            headers = headers
+        )
+
+    def commit(self, uri, seq_num, byte_offset, checksum = None):
+        headers = {}
+        if checksum is not None:
+            headers[UPLOAD_CHECKSUM_HEADER] = format_checksum(checksum)
+        return post(
+            self.path(uri).format(seq_num=seq_num, byte_offset=byte_offset),
+            auth = self.auth,
+            headers = headers
+        )
+
+
+    def _chunked_bytes(self, file_or_string_or_bytes_or_generator, content_type, **kwargs):
+        return ChunkedUpload(self, file_or_string_or_bytes_or_generator, content_type, **kwargs).run()
 
 
     """
@@ -239,6 +581,12 @@ class Source(Resource, ParseOptionBuilder):
         Uploads a Blob dataset. A blob is a file that will not be parsed as a data file,
         ie: an image, video, etc.
 
+        Args:
+        ```
+            file_handle: The file handle, as returned by the python function `open()`
+
+            See `Source.csv` for the upload options.
+        ```
 
         Returns:
         ```
@@ -262,12 +610,27 @@ class Source(Resource, ParseOptionBuilder):
         """
         Upload a CSV, returns the new input schema.
 
+        The options after `file_handle` are taken by every upload method (`blob`, `xls`, `xlsx`,
+        `tsv`, `shapefile`, `kml`, `geojson` and `df`) too.
+
         Args:
         ```
             file_handle: The file handle, as returned by the python function `open()`
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+            resumable (bool): Optional. Record acknowledged chunks in a journal on disk, so that if the upload fails,
+                uploading the same file to the same source again only sends the chunks the server doesn't have. Defaults to False.
+            journal_dir (str): Optional directory for resumable upload journals. Defaults to ~/.socrata-py/uploads
+            adaptive_parallelism (bool): Optional. Rather than always keeping the server's preferred number of chunks
+                in flight, start there and adjust it as the upload goes, based on throughput and failures. Defaults to False.
+            max_parallelism (integer): Optional upper bound for adaptive_parallelism. Defaults to 4x the server's preference.
+            checksums (bool): Optional. Send the CRC32 of each chunk, and of the whole upload when it's committed.
+                These are advisory: a server which checks them rejects data that was corrupted on the way,
+                and one which doesn't ignores them. Defaults to True.
+            compression (str): Optional. Compress each chunk before it's sent, with 'gzip', or 'zstd' (which needs
+                the zstandard package), if the server supports it. Text formats shrink a lot, which speeds up uploads
+                over slow links. Defaults to None.
         ```
 
         Returns:
@@ -293,6 +656,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -318,6 +683,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -343,6 +710,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -368,6 +737,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -393,6 +764,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -419,6 +792,8 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -445,6 +820,12 @@ class Source(Resource, ParseOptionBuilder):
 
             max_retries (integer): Optional retry limit per chunk in the upload. Defaults to 5.
             backoff_seconds (integer): Optional amount of time to backoff upon a chunk upload failure. Defaults to 2.
+            stream (bool): Optional. Serialize the DataFrame to CSV `batch_rows` rows at a time as the upload
+                consumes it, rather than rendering the whole thing up front. Defaults to True, unless the upload is resumable,
+                which needs the whole CSV to be able to replay it.
+            batch_rows (integer): Optional number of rows serialized at once when streaming. Defaults to 10000.
+
+            See `Source.csv` for the other upload options.
         ```
 
         Returns:
@@ -459,6 +840,11 @@ class Source(Resource, ParseOptionBuilder):
             upload = upload.df(df)
         ```
         """
+        stream = kwargs.pop('stream', not kwargs.get('resumable', False))
+        batch_rows = kwargs.pop('batch_rows', DATAFRAME_BATCH_ROWS)
+        if stream:
+            return self._chunked_bytes(dataframe_csv_batches(dataframe, batch_rows), "text/csv", **kwargs)
+
         s = io.StringIO()
         dataframe.to_csv(s, index=False)
         return self._chunked_bytes(bytes(s.getvalue().encode()),"text/csv", **kwargs)
@@ -497,34 +883,52 @@ class Source(Resource, ParseOptionBuilder):
         self.wait_for_schema()
         return max(self.input_schemas, key = lambda s: s.attributes['id'])
 
-    def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1):
+    def _schema_conditions(self):
+        return (
+            lambda m: len(m.attributes['schemas']) > 0,
+            lambda m: m.attributes['failed_at']
+        )
+
+    def _finish_conditions(self):
+        return (
+            lambda m: m.attributes['finished_at'],
+            lambda m: m.attributes['failed_at']
+        )
+
+    def wait_for_schema(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
         """
-        Wait for this data source to have at least one schema present. Accepts a progress function
-        and a timeout.
+        Wait for this data source to have at least one schema present. Accepts a progress function,
+        a timeout, and a `polling` strategy from `socrata.polling` (without one, it
+        polls every `sleeptime` seconds).
 
         Default timeout is 12 hours
         """
+        (is_finished, is_failed) = self._schema_conditions()
         return self._wait_for_finish(
-            is_finished = lambda m: len(m.attributes['schemas']) > 0,
-            is_failed = lambda m: m.attributes['failed_at'],
+            is_finished = is_finished,
+            is_failed = is_failed,
             progress = progress,
             timeout = timeout,
-            sleeptime = sleeptime
+            sleeptime = sleeptime,
+            polling = polling
         )
 
-    def wait_for_finish(self, progress = noop, timeout = 43200, sleeptime = 1):
+    def wait_for_finish(self, progress = noop, timeout = 43200, sleeptime = 1, polling = None):
         """
-        Wait for this data source to finish transforming and validating. Accepts a progress function
-        and a timeout.
+        Wait for this data source to finish transforming and validating. Accepts a progress function,
+        a timeout, and a `polling` strategy from `socrata.polling` (without one, it
+        polls every `sleeptime` seconds).
 
         Default timeout is 12 hours
         """
+        (is_finished, is_failed) = self._finish_conditions()
         return self._wait_for_finish(
-            is_finished = lambda m: m.attributes['finished_at'],
-            is_failed = lambda m: m.attributes['failed_at'],
+            is_finished = is_finished,
+            is_failed = is_failed,
             progress = progress,
             timeout = timeout,
-            sleeptime = sleeptime
+            sleeptime = sleeptime,
+            polling = polling
         )
 
     def ui_url(self):
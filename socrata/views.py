@@ -1,5 +1,4 @@
 import json
-import requests
 from socrata.http import post, put, delete, get, gen_headers
 from socrata.resource import Collection, Resource
 from socrata.sources import Source
@@ -52,7 +51,7 @@ class View(CoreResource):
             domain = self.auth.domain,
             ff = self.attributes['id']
         )
-        response = requests.delete(
+        response = self.auth.session().delete(
             path,
             headers = gen_headers(),
             auth = self.auth.basic,
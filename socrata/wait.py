@@ -0,0 +1,185 @@
+"""
+Wait on many resources at once, from one thread.
+
+Calling `wait_for_finish` on each of hundreds of jobs means hundreds of
+threads, each sleeping and polling on its own. `as_completed` polls all of
+them from the calling thread instead, soonest due first, and spaces out the
+requests so that all of them together stay within a budget.
+
+```python
+from socrata.wait import as_completed
+from socrata.polling import ExponentialBackoff
+
+jobs = [revision.apply() for revision in revisions]
+for (job, error) in as_completed(jobs, polling = ExponentialBackoff(maximum = 30)):
+    if error:
+        print("Failed", job, error)
+```
+"""
+import heapq
+import time
+from itertools import count
+from threading import Condition
+from requests.exceptions import RequestException
+from socrata.http import noop, TimeoutException, UnexpectedResponseException
+from socrata.resource import WaitState, ResourceFailedException
+from socrata.polling import FixedInterval
+
+# How many polls a batch of waits makes per second, at most, by default
+DEFAULT_REQUESTS_PER_SECOND = 10
+
+class RequestBudget(object):
+    """
+    Spaces requests out so that no more than `per_second` of them are made
+    each second. None means no limit.
+    """
+    def __init__(self, per_second):
+        self.interval = (1.0 / per_second) if per_second else 0.0
+        self._next_at = 0.0
+
+    def wait(self):
+        """
+        Block until the budget allows another request
+        """
+        now = time.time()
+        if self._next_at > now:
+            time.sleep(self._next_at - now)
+            now = self._next_at
+        self._next_at = now + self.interval
+
+
+def as_completed(resources, progress = noop, timeout = None, polling = None, requests_per_second = DEFAULT_REQUESTS_PER_SECOND):
+    """
+    Wait for all of these resources (Jobs, OutputSchemas, Sources) to finish,
+    yielding each one as soon as it's done.
+
+    Args:
+    ```
+        resources (list): The resources to wait on
+        progress (function): Called with each resource every time it's polled
+        timeout (int): Give up on any resource that hasn't finished after this many seconds
+        polling (PollingStrategy): How long to wait between polls of any one resource,
+            see `socrata.polling`. Defaults to every second.
+        requests_per_second (float): How many polls to make per second, at most, across
+            all of the resources. None for no limit.
+    ```
+
+    Returns:
+    ```
+        A generator of (resource, error) tuples, in the order the resources finished.
+        `error` is None if the resource finished, otherwise it's the exception that
+        `wait_for_finish` would have raised for it (ie: a ResourceFailedException
+        or a TimeoutException).
+    ```
+    """
+    waiter = Waiter(progress, timeout, polling, requests_per_second)
+    for resource in resources:
+        waiter.add(resource)
+    waiter.close()
+    return iter(waiter)
+
+
+class Waiter(object):
+    """
+    What `as_completed` runs on: a queue of resources being waited on, each
+    due to be polled at some time, and polled from whichever thread iterates
+    over it. Resources can be added from other threads while that's going on,
+    so a pipeline can start waiting on things as it creates them. Iterating
+    yields (resource, error) tuples as they finish, and stops once `close`
+    has been called and everything added has finished.
+
+    Takes the same arguments as `as_completed`.
+    """
+    def __init__(self, progress = noop, timeout = None, polling = None, requests_per_second = DEFAULT_REQUESTS_PER_SECOND):
+        self.progress = progress
+        self.timeout = timeout
+        self.polling = polling or FixedInterval()
+        self.budget = RequestBudget(requests_per_second)
+        # The counter breaks ties between polls that are due at the same time,
+        # since WaitStates can't be compared
+        self._tiebreak = count()
+        self._queue = []
+        self._condition = Condition()
+        self._closed = False
+
+    def add(self, resource):
+        (is_finished, is_failed) = resource._finish_conditions()
+        state = WaitState(resource, is_finished, is_failed, self.progress, self.timeout, self.polling)
+        self._push(time.time(), state)
+
+    def close(self):
+        """
+        Nothing else is going to be added
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _push(self, due, state):
+        with self._condition:
+            heapq.heappush(self._queue, (due, next(self._tiebreak), state))
+            self._condition.notify()
+
+    def _next_due(self):
+        # Sleeps until the soonest poll is due, waking up early if something
+        # is added that might be due sooner
+        with self._condition:
+            while True:
+                if self._queue:
+                    wait = self._queue[0][0] - time.time()
+                    if wait <= 0:
+                        return heapq.heappop(self._queue)[2]
+                    self._condition.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def __iter__(self):
+        while True:
+            state = self._next_due()
+            if state is None:
+                return
+            try:
+                if state.is_done():
+                    yield (state.resource, None)
+                    continue
+            except (TimeoutException, RequestException, UnexpectedResponseException) as e:
+                yield (state.resource, e)
+                continue
+
+            self.budget.wait()
+
+            try:
+                me = state.resource.show()
+            except (RequestException, UnexpectedResponseException) as e:
+                try:
+                    state.on_error(e)
+                except UnexpectedResponseException as e:
+                    yield (state.resource, e)
+                    continue
+            else:
+                try:
+                    state.on_response(me)
+                except ResourceFailedException as e:
+                    yield (state.resource, e)
+                    continue
+
+            self._push(time.time() + state.next_delay(), state)
+
+
+def wait_all(resources, progress = noop, timeout = None, polling = None, requests_per_second = DEFAULT_REQUESTS_PER_SECOND):
+    """
+    Wait for all of these resources to finish. Takes the same arguments as
+    `as_completed`.
+
+    Returns:
+    ```
+        A list of (resource, error) tuples, in the same order as `resources`
+    ```
+    """
+    resources = list(resources)
+    errors = {}
+    for (resource, error) in as_completed(resources, progress, timeout, polling, requests_per_second):
+        errors[id(resource)] = error
+    return [(resource, errors[id(resource)]) for resource in resources]
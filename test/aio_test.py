@@ -0,0 +1,27 @@
+import asyncio
+from socrata.aio import AsyncSocrata, AsyncJob
+from test.auth import auth, TestCase
+
+class TestAio(TestCase):
+    def test_upload_and_apply(self):
+        async def publish():
+            client = AsyncSocrata(auth)
+            view = await client.views.lookup(self.view.attributes['id'])
+            rev = await view.revisions.create_update_revision()
+            self.rev = rev.wrapped
+            source = await rev.create_upload('foo.csv')
+            with open('test/fixtures/simple.csv', 'rb') as f:
+                source = await source.csv(f)
+            input_schema = await source.get_latest_input_schema()
+            output_schema = await input_schema.get_latest_output_schema()
+            output_schema = await output_schema.wait_for_finish(timeout = 300)
+            job = await rev.apply(output_schema = output_schema)
+            job = await job.wait_for_finish()
+            client.close()
+            return (output_schema, job)
+
+        (output_schema, job) = asyncio.run(publish())
+        names = sorted([oc['field_name'] for oc in output_schema.attributes['output_columns']])
+        self.assertEqual(['a', 'b', 'c'], names)
+        self.assertIsInstance(job, AsyncJob)
+        self.assertEqual(job.attributes['status'], 'successful')
@@ -0,0 +1,37 @@
+import pickle
+import unittest
+from socrata.authorization import Authorization
+
+class TestAuthorization(unittest.TestCase):
+    def test_session_is_shared(self):
+        auth = Authorization('example.com', username = 'u', password = 'p')
+        self.assertIs(auth.session(), auth.session())
+
+    def test_pool_only_grows(self):
+        auth = Authorization('example.com', username = 'u', password = 'p', pool_size = 4)
+        auth.session()
+        auth.ensure_pool_size(32)
+        self.assertEqual(auth.pool_size, 32)
+        self.assertEqual(auth.session().get_adapter('https://example.com')._pool_maxsize, 32)
+        auth.ensure_pool_size(8)
+        self.assertEqual(auth.pool_size, 32)
+
+    def test_resizing_closes_old_pools(self):
+        auth = Authorization('example.com', username = 'u', password = 'p', pool_size = 4)
+        old = auth.session().get_adapter('https://example.com')
+        old.poolmanager.connection_from_url('https://example.com')
+        auth.ensure_pool_size(32)
+        self.assertIsNot(auth.session().get_adapter('https://example.com'), old)
+        self.assertEqual(len(old.poolmanager.pools), 0)
+
+    def test_session_ignores_server_cookies(self):
+        auth = Authorization('example.com', username = 'u', password = 'p')
+        jar = auth.session().cookies
+        self.assertFalse(jar._policy.set_ok(None, None))
+
+    def test_pickle_drops_session(self):
+        auth = Authorization('example.com', username = 'u', password = 'p')
+        auth.session()
+        copied = pickle.loads(pickle.dumps(auth))
+        self.assertEqual(copied.domain, 'example.com')
+        self.assertIsNot(copied.session(), auth.session())
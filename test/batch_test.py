@@ -0,0 +1,79 @@
+import io
+import time
+import unittest
+from socrata import Socrata
+from socrata.http import UnexpectedResponseException
+from socrata.polling import FixedInterval
+from test.fake_server import FakePublishingServer
+
+def csv_file(rows):
+    f = io.BytesIO(b'a,b\n' + b'1,2\n' * rows)
+    f.name = 'data.csv'
+    return f
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = FakePublishingServer(processing_time = 0.2).start()
+        self.socrata = Socrata(self.server.auth())
+        self.socrata.configs.create('test-config', 'replace')
+        self.view_ids = [self.socrata.new({'name': 'view %d' % i}).view_id() for i in range(3)]
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_batch(self, jobs, **kwargs):
+        return self.socrata.using_configs(
+            jobs,
+            polling = FixedInterval(0.02),
+            requests_per_second = None,
+            **kwargs
+        )
+
+    def test_uploads_overlap_with_validation(self):
+        started = time.time()
+        results = self.run_batch(
+            [('test-config', view_id, csv_file(10)) for view_id in self.view_ids],
+            upload_parallelism = 1
+        )
+        elapsed = time.time() - started
+
+        self.assertEqual([(r.view_id, r.error, r.stage) for r in results], [(v, None, 'done') for v in self.view_ids])
+        for result in results:
+            self.assertIsNotNone(result.job)
+            self.assertEqual(sorted(result.timings), ['apply', 'queued', 'total', 'upload', 'validation'])
+        # One upload at a time, but each dataset's validation overlaps
+        # with the next one's upload
+        serial = sum(r.timings['upload'] + r.timings['validation'] for r in results)
+        self.assertLess(elapsed, serial)
+
+    def test_failures_are_per_dataset(self):
+        results = self.run_batch([
+            ('test-config', self.view_ids[0], csv_file(10)),
+            ('test-config', 'nope-nope', csv_file(10)),
+            ('no-such-config', self.view_ids[1], csv_file(10)),
+            ('no-such-config', self.view_ids[2], csv_file(10))
+        ])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, UnexpectedResponseException)
+        self.assertEqual(results[1].stage, 'uploading')
+        self.assertIsInstance(results[2].error, UnexpectedResponseException)
+        self.assertIs(results[3].error, results[2].error)
+        # A config that couldn't be found isn't looked up again
+        self.assertEqual(self.server.request_count('no-such-config'), 1)
+
+    def test_config_lookups_are_retried_after_server_errors(self):
+        self.server.inject_failure('/config/test-config', status = 503)
+        results = self.run_batch([('test-config', view_id, csv_file(10)) for view_id in self.view_ids])
+        self.assertEqual(len([r for r in results if r.error is not None]), 1)
+        self.assertEqual(self.server.request_count('/config/test-config'), 2)
+
+    def test_wait_for_jobs(self):
+        finished = []
+        [result] = self.run_batch(
+            [('test-config', self.view_ids[0], csv_file(10))],
+            wait_for_jobs = True,
+            progress = finished.append
+        )
+        self.assertEqual(result.stage, 'done')
+        self.assertIn('job', result.timings)
+        self.assertEqual(finished, [result])
@@ -0,0 +1,37 @@
+import os
+import zlib
+import unittest
+from socrata.checksum import crc32, crc32_combine, UploadChecksum
+
+class TestChecksum(unittest.TestCase):
+    def test_combine_matches_zlib(self):
+        first = os.urandom(100)
+        for length in [0, 1, 7, 4096, 1024 * 1024 + 3]:
+            second = os.urandom(length)
+            self.assertEqual(
+                crc32_combine(crc32(first), crc32(second), length),
+                zlib.crc32(first + second)
+            )
+
+    def test_chunks_in_any_order(self):
+        data = os.urandom(10000)
+        checksum = UploadChecksum()
+        for start in reversed(range(0, len(data), 1024)):
+            chunk = data[start:start + 1024]
+            checksum.add(start // 1024, crc32(chunk), len(chunk))
+        self.assertEqual(checksum.value(), zlib.crc32(data))
+
+    def test_gaps_have_no_checksum(self):
+        checksum = UploadChecksum()
+        checksum.add(0, crc32(b'abc'), 3)
+        checksum.add(2, crc32(b'ghi'), 3)
+        self.assertIsNone(checksum.value())
+
+    def test_only_out_of_order_chunks_are_held(self):
+        data = os.urandom(10000)
+        checksum = UploadChecksum()
+        for start in range(0, len(data), 100):
+            chunk = data[start:start + 100]
+            checksum.add(start // 100, crc32(chunk), len(chunk))
+            self.assertEqual(len(checksum._pending), 0)
+        self.assertEqual(checksum.value(), zlib.crc32(data))
@@ -0,0 +1,95 @@
+import io
+import array
+import gzip
+import os
+import tempfile
+import unittest
+from socrata.checksum import crc32
+from socrata.sources import chunk_iterator, ChunkIterator, MmapChunkIterator, FileLikeGenerator
+
+class TestChunkIterator(unittest.TestCase):
+    def setUp(self):
+        self.data = os.urandom(10000)
+        with tempfile.NamedTemporaryFile(delete = False) as f:
+            f.write(self.data)
+            self.filename = f.name
+
+    def tearDown(self):
+        os.unlink(self.filename)
+
+    def test_real_files_are_mapped(self):
+        with open(self.filename, 'rb') as f:
+            chunks = chunk_iterator(f, 4096)
+            self.assertIsInstance(chunks, MmapChunkIterator)
+            results = list(chunks)
+            self.assertEqual([(s, b, e) for (s, b, e, _) in results], [
+                (0, 0, 4096),
+                (1, 4096, 8192),
+                (2, 8192, 10000)
+            ])
+            self.assertEqual(b''.join(bytes(v) for (_, _, _, v) in results), self.data)
+            for (_, _, _, view) in results:
+                view.release()
+            chunks.close()
+            self.assertEqual(f.tell(), len(self.data))
+
+    def test_mapping_starts_at_file_position(self):
+        with open(self.filename, 'rb') as f:
+            f.read(100)
+            chunks = chunk_iterator(f, 4096)
+            [first] = [c for c in chunks if c[0] == 0]
+            self.assertEqual(first[1], 0)
+            self.assertEqual(bytes(first[3]), self.data[100:4196])
+            first[3].release()
+            chunks.close()
+
+    def test_other_things_are_read(self):
+        self.assertIsInstance(chunk_iterator(io.BytesIO(self.data), 4096), ChunkIterator)
+        with open(self.filename, 'r', encoding = 'latin-1') as f:
+            self.assertIsInstance(chunk_iterator(f, 4096), ChunkIterator)
+
+    def test_compressed_files_are_read(self):
+        with tempfile.NamedTemporaryFile(suffix = '.gz', delete = False) as f:
+            f.write(gzip.compress(self.data))
+        try:
+            with gzip.open(f.name, 'rb') as compressed:
+                chunks = chunk_iterator(compressed, 4096)
+                self.assertIsInstance(chunks, ChunkIterator)
+                self.assertEqual(b''.join(c for (_, _, _, c) in chunks), self.data)
+        finally:
+            os.unlink(f.name)
+
+    def test_skipped_chunks_are_checked(self):
+        first = crc32(self.data[:4096])
+        with open(self.filename, 'rb') as f:
+            # The second chunk isn't what was sent last time, so it's sent again
+            chunks = chunk_iterator(f, 4096, skip = {0: first, 1: 0, 2: None})
+            self.assertEqual([c[0] for c in chunks], [1])
+            chunks.close()
+        chunks = chunk_iterator(io.BytesIO(self.data), 4096, skip = {0: first, 1: 0})
+        self.assertEqual([c[0] for c in chunks], [1, 2])
+
+
+class TestFileLikeGenerator(unittest.TestCase):
+    def read_all(self, gen, how_much):
+        f = FileLikeGenerator(gen)
+        reads = []
+        while True:
+            read = f.read(how_much)
+            if not read:
+                return reads
+            reads.append(read)
+
+    def test_reads_are_exactly_the_size_asked_for(self):
+        data = os.urandom(10000)
+        pieces = (data[i:i + 700] for i in range(0, len(data), 700))
+        reads = self.read_all(pieces, 4096)
+        self.assertEqual([len(r) for r in reads], [4096, 4096, 1808])
+        self.assertEqual(b''.join(reads), data)
+
+    def test_strs_and_memoryviews(self):
+        numbers = array.array('i', range(100))
+        pieces = iter(['caf\u00e9,', '\u00fcber\n', memoryview(numbers), b'end'])
+        reads = self.read_all(pieces, 7)
+        self.assertEqual(set(len(r) for r in reads[:-1]), {7})
+        self.assertEqual(b''.join(reads), 'caf\u00e9,\u00fcber\n'.encode('utf-8') + numbers.tobytes() + b'end')
@@ -0,0 +1,32 @@
+import zlib
+import unittest
+from socrata.compression import compressor, Gzip, Zstd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class TestCompression(unittest.TestCase):
+    def test_gzip(self):
+        data = b'a,b,c\n1,2,3\n' * 1000
+        compressed = compressor('gzip').compress(memoryview(data))
+        self.assertLess(len(compressed), len(data) // 10)
+        self.assertEqual(zlib.decompress(compressed, 31), data)
+
+    def test_compressors(self):
+        self.assertIsNone(compressor(None))
+        gzip = Gzip(level = 9)
+        self.assertIs(compressor(gzip), gzip)
+        with self.assertRaises(ValueError):
+            compressor('lzma')
+
+    @unittest.skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        data = b'a,b,c\n1,2,3\n' * 1000
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(Zstd().compress(data)), data)
+
+    @unittest.skipIf(zstandard, 'zstandard is installed')
+    def test_zstd_needs_zstandard(self):
+        with self.assertRaises(ImportError):
+            compressor('zstd')
@@ -0,0 +1,42 @@
+import unittest
+from socrata.concurrency import AdaptiveConcurrency
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def test_first_full_window_increases_the_limit(self):
+        controller = AdaptiveConcurrency(2, maximum = 8)
+        for _ in range(2):
+            controller.acquire()
+        for _ in range(2):
+            controller.release(1024, 0.01)
+        self.assertEqual(controller.limit, 3)
+
+    def test_failures_cut_the_limit(self):
+        controller = AdaptiveConcurrency(8, maximum = 16)
+        controller.record_failure()
+        self.assertEqual(controller.limit, 4)
+        controller.record_failure()
+        controller.record_failure()
+        controller.record_failure()
+        self.assertEqual(controller.limit, 1)
+
+        report = controller.report()
+        self.assertEqual(report['initial'], 8)
+        self.assertEqual(report['final'], 1)
+        self.assertEqual(report['lowest'], 1)
+        self.assertEqual(report['highest'], 8)
+
+    def test_limit_stays_in_bounds(self):
+        controller = AdaptiveConcurrency(100, minimum = 2, maximum = 10)
+        self.assertEqual(controller.limit, 10)
+        for _ in range(5):
+            controller.record_failure()
+        self.assertEqual(controller.limit, 2)
+
+    def test_gate_gives_back_the_slot_when_exhausted(self):
+        controller = AdaptiveConcurrency(1)
+        gated = controller.gate([1])
+        self.assertEqual(next(gated), 1)
+        self.assertEqual(controller.in_flight, 1)
+        controller.release()
+        self.assertEqual(list(gated), [])
+        self.assertEqual(controller.in_flight, 0)
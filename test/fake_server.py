@@ -0,0 +1,939 @@
+"""
+An in-process stand-in for the publishing API, for tests and benchmarks
+that shouldn't need a real Socrata domain.
+
+It implements the endpoints this library uses: creating views and
+revisions, sources with chunked uploads, input and output schemas with
+(a few) transforms, rows and errors, import configs, and applying a
+revision. Uploaded CSVs are parsed for real, so the rows that come back are
+the rows that went up.
+It is not a faithful copy of the real API; the point is to exercise the
+client's code paths, and to measure them reproducibly.
+
+```python
+from socrata import Socrata
+from test.fake_server import FakePublishingServer
+
+with FakePublishingServer(latency = 0.01, bandwidth = 10 * 1024 * 1024) as server:
+    socrata = Socrata(server.auth())
+    revision = socrata.new({'name': 'a dataset'})
+    ...
+```
+
+Things that make it behave more like a real server over a real network:
+
+* `latency` seconds are added to every response
+* `bandwidth` caps the bytes per second moving through the server, in
+  both directions, shared between all connections
+* `processing_time` is how long sources, output schemas and jobs take to
+  finish after they're created, so polling has something to wait for
+* `failure_rate` makes that fraction of requests fail with a 503, chosen
+  with a seeded random number generator so runs are repeatable, and
+  `inject_failure` fails specific requests
+* `inject_corruption` flips a byte of the body of specific requests, as if
+  it had been damaged on the way
+
+Chunks and commits which carry one of the CRC32 headers from
+socrata.checksum are checked against it, and rejected with a 400 if they
+don't match, as a server which supports those headers would; the real
+API ignores them. Uploads can be gzip compressed, or zstd if zstandard is
+installed; pass `content_encodings` to change which encodings it agrees to.
+"""
+import csv
+import io
+import json
+import random
+import re
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread, Lock, RLock
+from urllib.parse import urlparse, parse_qs
+from socrata.authorization import Authorization
+from socrata.checksum import crc32, format_checksum, CHUNK_CHECKSUM_HEADER, UPLOAD_CHECKSUM_HEADER
+
+API = '/api/publishing/v1'
+
+# How much of a request or response body moves between bandwidth checks
+THROTTLE_BLOCK_SIZE = 16 * 1024
+
+def now_iso():
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+
+
+class Throttle(object):
+    """
+    A link that moves `bytes_per_second`, shared by everyone who sends
+    through it. None means no cap.
+    """
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._free_at = 0.0
+        self._lock = Lock()
+
+    def consume(self, nbytes):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            current = time.time()
+            start = max(current, self._free_at)
+            self._free_at = start + nbytes / self.bytes_per_second
+            done_at = self._free_at
+        delay = done_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FailureRule(object):
+    def __init__(self, pattern, status, times, method):
+        self.pattern = re.compile(pattern)
+        self.status = status
+        self.times = times
+        self.method = method
+
+    def matches(self, method, path):
+        if self.times is not None and self.times <= 0:
+            return False
+        if self.method is not None and self.method != method:
+            return False
+        return self.pattern.search(path) is not None
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super(HttpError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class FakePublishingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency = 0,
+        bandwidth = None,
+        processing_time = 0,
+        failure_rate = 0.0,
+        seed = 0,
+        preferred_chunk_size = 1024 * 1024,
+        preferred_upload_parallelism = 4,
+        content_encodings = ('gzip', 'zstd')
+    ):
+        super(FakePublishingServer, self).__init__(('127.0.0.1', 0), FakeHandler)
+        self.latency = latency
+        self.throttle = Throttle(bandwidth)
+        self.processing_time = processing_time
+        self.failure_rate = failure_rate
+        self.preferred_chunk_size = preferred_chunk_size
+        self.preferred_upload_parallelism = preferred_upload_parallelism
+        self.content_encodings = [e for e in content_encodings if e in DECODERS]
+
+        # Handlers run with this held, so it has to be reentrant
+        self.lock = RLock()
+        self.random = random.Random(seed)
+        self.failure_rules = []
+        self.corruption_rules = []
+        self.requests = []
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+        self.views = {}
+        self.configs = {}
+        self.revisions = {}
+        self.sources = {}
+        self.jobs = {}
+        self._next_id = 1
+        self._thread = None
+
+    # Running it
+
+    def start(self):
+        # A short poll interval, so that stopping the server is quick
+        self._thread = Thread(target = self.serve_forever, kwargs = {'poll_interval': 0.05}, daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def domain(self):
+        return '127.0.0.1:%d' % self.server_address[1]
+
+    def auth(self, **kwargs):
+        """
+        An Authorization that talks to this server
+        """
+        auth = Authorization(self.domain, username = 'fake', password = 'fake', **kwargs)
+        auth.proto = 'http://'
+        return auth
+
+    def inject_failure(self, pattern, status = 503, times = 1, method = None):
+        """
+        Fail the next `times` requests (None for all of them) whose path
+        matches the regex `pattern` with `status`
+        """
+        with self.lock:
+            self.failure_rules.append(FailureRule(pattern, status, times, method))
+
+    def inject_corruption(self, pattern, times = 1, method = None):
+        """
+        Flip the first byte of the body of the next `times` requests (None
+        for all of them) whose path matches the regex `pattern`
+        """
+        with self.lock:
+            self.corruption_rules.append(FailureRule(pattern, None, times, method))
+
+    def request_count(self, pattern = '', method = None):
+        """
+        How many requests have been made whose path matches `pattern`
+        """
+        regex = re.compile(pattern)
+        with self.lock:
+            return len([
+                1 for (m, path) in self.requests
+                if (method is None or m == method) and regex.search(path)
+            ])
+
+    def _should_fail(self, method, path):
+        with self.lock:
+            self.requests.append((method, path))
+            for rule in self.failure_rules:
+                if rule.matches(method, path):
+                    if rule.times is not None:
+                        rule.times -= 1
+                    return rule.status
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                return 503
+        return None
+
+    def _corrupt(self, method, path, body):
+        with self.lock:
+            for rule in self.corruption_rules:
+                if body and rule.matches(method, path):
+                    if rule.times is not None:
+                        rule.times -= 1
+                    return bytes([body[0] ^ 0xff]) + body[1:]
+        return body
+
+    def _new_id(self):
+        with self.lock:
+            next_id = self._next_id
+            self._next_id += 1
+            return next_id
+
+    def _finished(self, created):
+        return time.time() - created >= self.processing_time
+
+    def _fraction_done(self, created):
+        if not self.processing_time:
+            return 1.0
+        return min((time.time() - created) / self.processing_time, 1.0)
+
+    # Views and revisions
+
+    def _fourfour(self):
+        n = self._new_id()
+        return 'fake-%04d' % n
+
+    def new_view(self, metadata):
+        fourfour = self._fourfour()
+        self.views[fourfour] = {
+            'id': fourfour,
+            'name': metadata.get('name', 'untitled'),
+            'metadata': metadata
+        }
+        return fourfour
+
+    def new_revision(self, fourfour, action, metadata):
+        seq = len([1 for (ff, _) in self.revisions if ff == fourfour])
+        revision = {
+            'id': self._new_id(),
+            'fourfour': fourfour,
+            'revision_seq': seq,
+            'action': action,
+            'metadata': metadata,
+            'output_schema_id': None,
+            'created_at': now_iso(),
+            'closed_at': None,
+            'discarded_at': None,
+            'task_sets': [],
+            'notes': None
+        }
+        self.revisions[(fourfour, seq)] = revision
+        return revision
+
+    def revision_response(self, revision):
+        prefix = '{api}/revision/{ff}/{seq}'.format(api = API, ff = revision['fourfour'], seq = revision['revision_seq'])
+        return {
+            'resource': revision,
+            'links': {
+                'show': prefix,
+                'update': prefix,
+                'discard': prefix,
+                'apply': prefix + '/apply',
+                'plan': prefix + '/plan',
+                'create_source': prefix + '/source',
+                'list_sources': prefix + '/source'
+            }
+        }
+
+    # Sources and schemas
+
+    def new_source(self, source_type, parse_options, revision = None):
+        source_id = self._new_id()
+        options = {'parse_source': True, 'header_count': 1, 'column_header': 1}
+        options.update(parse_options or {})
+        self.sources[source_id] = {
+            'resource': {
+                'id': source_id,
+                'source_type': source_type,
+                'parse_options': options,
+                'content_type': None,
+                'schemas': [],
+                'created_at': now_iso(),
+                'finished_at': None,
+                'failed_at': None,
+                'revision': revision
+            },
+            'chunks': {},
+            'committed_at': None,
+            'input_schemas': {}
+        }
+        return self.sources[source_id]
+
+    def source_response(self, source):
+        resource = source['resource']
+        self._refresh_source(source)
+        prefix = '{api}/source/{id}'.format(api = API, id = resource['id'])
+        schema = prefix + '/schema/{input_schema_id}'
+        output = schema + '/output/{output_schema_id}'
+        return {
+            'resource': resource,
+            'links': {
+                'show': prefix,
+                'update': prefix,
+                'add_to_revision': prefix,
+                'initiate': prefix + '/upload',
+                'chunk': prefix + '/upload/{seq_num}/{byte_offset}',
+                'commit': prefix + '/commit/{seq_num}/{byte_offset}',
+                'show_input_schema': schema,
+                'input_schema_links': {
+                    'show': schema,
+                    'transform': schema,
+                    'latest_output': schema + '/output/latest',
+                    'output_schema_links': {
+                        'show': output,
+                        'rows': output + '/rows',
+                        'schema_errors': output + '/errors'
+                    }
+                }
+            }
+        }
+
+    def output_schema_response(self, source, input_schema_id, output_schema):
+        self._refresh_output_schema(output_schema)
+        prefix = '{api}/source/{sid}/schema/{isid}/output/{osid}'.format(
+            api = API,
+            sid = source['resource']['id'],
+            isid = input_schema_id,
+            osid = output_schema['id']
+        )
+        return {
+            'resource': output_schema,
+            'links': {
+                'show': prefix,
+                'rows': prefix + '/rows',
+                'schema_errors': prefix + '/errors'
+            }
+        }
+
+    def _commit(self, source, end_byte_offset, checksum = None):
+        chunks = source['chunks']
+        data = b''.join(chunks[offset] for offset in sorted(chunks))
+        if len(data) != end_byte_offset:
+            raise HttpError(400, 'Expected %d bytes, have %d' % (end_byte_offset, len(data)))
+        if checksum is not None and format_checksum(crc32(data)) != checksum.lower():
+            raise HttpError(400, 'The upload does not match its checksum')
+        source['committed_at'] = time.time()
+        source['chunks'] = {}
+        source['data'] = data
+
+        resource = source['resource']
+        if not resource['parse_options'].get('parse_source', True):
+            return
+
+        text = data.decode('utf-8-sig', errors = 'replace')
+        delimiter = '\t' if 'tab-separated' in (resource['content_type'] or '') else ','
+        rows = list(csv.reader(io.StringIO(text), delimiter = delimiter, skipinitialspace = True))
+        header = rows[0] if rows else []
+        input_schema_id = self._new_id()
+        input_columns = [
+            {'id': self._new_id(), 'field_name': field_name(name), 'display_name': name.strip(), 'position': i, 'soql_type': 'text'}
+            for (i, name) in enumerate(header)
+        ]
+        source['input_schemas'][input_schema_id] = {
+            'rows': rows[1:],
+            'input_columns': input_columns,
+            'created': time.time()
+        }
+        resource['schemas'].append({
+            'id': input_schema_id,
+            'input_columns': input_columns,
+            'total_rows': len(rows) - 1,
+            'output_schemas': []
+        })
+        self._transform(source, input_schema_id, [
+            {
+                'field_name': column['field_name'],
+                'display_name': column['display_name'],
+                'position': column['position'],
+                'transform': {'transform_expr': '`%s`' % column['field_name']}
+            }
+            for column in input_columns
+        ])
+
+    def _refresh_source(self, source):
+        resource = source['resource']
+        if source['committed_at'] and not resource['finished_at'] and self._finished(source['committed_at']):
+            resource['finished_at'] = now_iso()
+        for schema in resource['schemas']:
+            for output_schema in schema['output_schemas']:
+                self._refresh_output_schema(output_schema)
+
+    def _refresh_output_schema(self, output_schema):
+        created = output_schema['_created']
+        done = int(output_schema['total_rows'] * self._fraction_done(created))
+        finished = self._finished(created)
+        for column in output_schema['output_columns']:
+            column['transform']['contiguous_rows_processed'] = done
+            if finished and not column['transform']['completed_at']:
+                column['transform']['completed_at'] = now_iso()
+        if finished and not output_schema['completed_at']:
+            output_schema['completed_at'] = now_iso()
+            output_schema['finished_at'] = output_schema['completed_at']
+
+    def _find_input_schema(self, source, input_schema_id):
+        for schema in source['resource']['schemas']:
+            if schema['id'] == input_schema_id:
+                return schema
+        raise HttpError(404, 'No input schema %s' % input_schema_id)
+
+    def _find_output_schema(self, source, input_schema_id, output_schema_id):
+        schema = self._find_input_schema(source, input_schema_id)
+        if output_schema_id == 'latest':
+            return max(schema['output_schemas'], key = lambda o: o['id'])
+        for output_schema in schema['output_schemas']:
+            if output_schema['id'] == int(output_schema_id):
+                return output_schema
+        raise HttpError(404, 'No output schema %s' % output_schema_id)
+
+    def _transform(self, source, input_schema_id, output_columns):
+        schema = self._find_input_schema(source, input_schema_id)
+        parsed = source['input_schemas'][input_schema_id]
+        field_names = [c['field_name'] for c in parsed['input_columns']]
+
+        columns = []
+        values = []
+        for (i, column) in enumerate(sorted(output_columns, key = lambda c: c.get('position', 0))):
+            expr = column['transform']['transform_expr']
+            (soql_type, convert) = compile_transform(expr, field_names)
+            columns.append({
+                'id': self._new_id(),
+                'field_name': column['field_name'],
+                'display_name': column.get('display_name', column['field_name']),
+                'description': column.get('description', ''),
+                'position': column.get('position', i),
+                'transform': {
+                    'transform_expr': expr,
+                    'output_soql_type': soql_type,
+                    'completed_at': None,
+                    'failed_at': None,
+                    'contiguous_rows_processed': 0
+                }
+            })
+            values.append([convert(row) for row in parsed['rows']])
+
+        rows = [list(cells) for cells in zip(*values)] if values else [[] for _ in parsed['rows']]
+        error_rows = [i for (i, cells) in enumerate(rows) if any('error' in cell for cell in cells)]
+        error_count = sum(1 for cells in rows for cell in cells if 'error' in cell)
+        for (column, column_values) in zip(columns, values):
+            column['transform']['error_count'] = sum(1 for cell in column_values if 'error' in cell)
+
+        output_schema = {
+            'id': self._new_id(),
+            'input_schema_id': input_schema_id,
+            'output_columns': columns,
+            'sort_bys': [],
+            'total_rows': len(rows),
+            'error_count': error_count,
+            'created_at': now_iso(),
+            'completed_at': None,
+            'finished_at': None,
+            '_created': time.time(),
+            '_rows': rows,
+            '_error_rows': error_rows
+        }
+        schema['output_schemas'].append(output_schema)
+        return output_schema
+
+    # Jobs
+
+    def new_job(self, revision, output_schema_id):
+        job_id = self._new_id()
+        job = {
+            'id': job_id,
+            'fourfour': revision['fourfour'],
+            'revision_seq': revision['revision_seq'],
+            'output_schema_id': output_schema_id,
+            'status': 'initializing',
+            'created_at': now_iso(),
+            'finished_at': None,
+            'log': [],
+            '_created': time.time()
+        }
+        self.jobs[job_id] = job
+        revision['task_sets'].append(job)
+        return job
+
+    def job_response(self, job):
+        if not job['finished_at'] and self._finished(job['_created']):
+            job['status'] = 'successful'
+            job['finished_at'] = now_iso()
+            job['log'].insert(0, {'stage': 'upsert_complete', 'time': job['finished_at'], 'details': {}})
+            revision = self.revisions[(job['fourfour'], job['revision_seq'])]
+            revision['closed_at'] = job['finished_at']
+        elif not job['finished_at']:
+            job['status'] = 'in_progress'
+        return {
+            'resource': job,
+            'links': {
+                'show': '{api}/job/{id}'.format(api = API, id = job['id'])
+            }
+        }
+
+
+def _zstd_decoder():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return lambda body: zstandard.ZstdDecompressor().decompress(body)
+
+DECODERS = {
+    name: decoder for (name, decoder) in [
+        ('gzip', lambda body: zlib.decompress(body, 31)),
+        ('zstd', _zstd_decoder())
+    ]
+    if decoder is not None
+}
+
+def field_name(header):
+    # The API makes a field name out of each column header like this
+    return re.sub(r'[^a-z0-9]+', '_', header.strip().lower()).strip('_')
+
+def strip_private(thing):
+    """
+    Leave out the bookkeeping (keys starting with `_`) that the fake keeps
+    in the resources it hands out
+    """
+    if isinstance(thing, dict):
+        return {k: strip_private(v) for (k, v) in thing.items() if not k.startswith('_')}
+    if isinstance(thing, list):
+        return [strip_private(v) for v in thing]
+    return thing
+
+
+CONVERSIONS = {
+    'to_number': 'number',
+    'to_text': 'text',
+    'to_boolean': 'checkbox',
+    'to_floating_timestamp': 'floating_timestamp',
+    'to_fixed_timestamp': 'fixed_timestamp'
+}
+
+def compile_transform(expr, field_names):
+    """
+    Turn a transform expression into (output soql type, function from an
+    input row to an output cell). Only column references and the to_*
+    conversions are supported.
+    """
+    match = re.match(r'^\s*(?:(\w+)\(\s*)?`?([^`()]+?)`?\s*\)?\s*$', expr)
+    if not match or match.group(2) not in field_names:
+        raise HttpError(400, 'Unsupported transform %s' % expr)
+    (function, field_name) = match.groups()
+    index = field_names.index(field_name)
+    if function is not None and function not in CONVERSIONS:
+        raise HttpError(400, 'Unsupported function %s' % function)
+
+    def convert(row):
+        value = row[index] if index < len(row) else None
+        if value is None or value == '':
+            return {'ok': None}
+        if function == 'to_number':
+            try:
+                float(value)
+            except ValueError:
+                return {'error': {'message': 'Unable to convert "%s" to number' % value, 'inputs': {field_name: {'ok': value}}}}
+            return {'ok': value}
+        if function == 'to_boolean':
+            if value.lower() not in ('true', 'false'):
+                return {'error': {'message': 'Unable to convert "%s" to boolean' % value, 'inputs': {field_name: {'ok': value}}}}
+            return {'ok': value.lower() == 'true'}
+        return {'ok': value}
+
+    return (CONVERSIONS.get(function, 'text'), convert)
+
+
+def error_csv_value(cell):
+    # Cells in error hold the input they couldn't convert
+    if 'error' in cell:
+        inputs = list(cell['error']['inputs'].values())
+        return inputs[0]['ok'] if inputs else ''
+    value = cell['ok']
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    routes = [
+        ('GET', r'^/api/views/(?P<fourfour>[\w-]+)$', 'show_view'),
+        ('DELETE', r'^/api/views/(?P<fourfour>[\w-]+)$', 'delete_view'),
+        ('POST', r'^{api}/revision$'.format(api = API), 'create_view'),
+        ('POST', r'^{api}/revision/(?P<fourfour>[\w-]+)$'.format(api = API), 'create_revision'),
+        ('GET', r'^{api}/revision/(?P<fourfour>[\w-]+)$'.format(api = API), 'list_revisions'),
+        ('GET', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)$'.format(api = API), 'show_revision'),
+        ('PUT', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)$'.format(api = API), 'update_revision'),
+        ('DELETE', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)$'.format(api = API), 'discard_revision'),
+        ('PUT', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)/apply$'.format(api = API), 'apply_revision'),
+        ('GET', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)/plan$'.format(api = API), 'plan_revision'),
+        ('POST', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)/source$'.format(api = API), 'create_revision_source'),
+        ('GET', r'^{api}/revision/(?P<fourfour>[\w-]+)/(?P<seq>\d+)/source$'.format(api = API), 'list_sources'),
+        ('POST', r'^{api}/source$'.format(api = API), 'create_source'),
+        ('GET', r'^{api}/source/(?P<source_id>\d+)$'.format(api = API), 'show_source'),
+        ('POST', r'^{api}/source/(?P<source_id>\d+)$'.format(api = API), 'update_source'),
+        ('PATCH', r'^{api}/source/(?P<source_id>\d+)$'.format(api = API), 'add_source_to_revision'),
+        ('POST', r'^{api}/source/(?P<source_id>\d+)/upload$'.format(api = API), 'initiate_upload'),
+        ('POST', r'^{api}/source/(?P<source_id>\d+)/upload/(?P<seq_num>\d+)/(?P<byte_offset>\d+)$'.format(api = API), 'upload_chunk'),
+        ('POST', r'^{api}/source/(?P<source_id>\d+)/commit/(?P<seq_num>\d+)/(?P<byte_offset>\d+)$'.format(api = API), 'commit_upload'),
+        ('GET', r'^{api}/source/(?P<source_id>\d+)/schema/(?P<input_schema_id>\d+)$'.format(api = API), 'show_input_schema'),
+        ('POST', r'^{api}/source/(?P<source_id>\d+)/schema/(?P<input_schema_id>\d+)$'.format(api = API), 'transform'),
+        ('GET', r'^{api}/source/(?P<source_id>\d+)/schema/(?P<input_schema_id>\d+)/output/(?P<output_schema_id>\d+|latest)$'.format(api = API), 'show_output_schema'),
+        ('GET', r'^{api}/source/(?P<source_id>\d+)/schema/(?P<input_schema_id>\d+)/output/(?P<output_schema_id>\d+)/rows$'.format(api = API), 'rows'),
+        ('GET', r'^{api}/source/(?P<source_id>\d+)/schema/(?P<input_schema_id>\d+)/output/(?P<output_schema_id>\d+)/errors$'.format(api = API), 'schema_errors'),
+        ('GET', r'^{api}/job/(?P<job_id>\d+)$'.format(api = API), 'show_job'),
+        ('POST', r'^{api}/config$'.format(api = API), 'create_config'),
+        ('GET', r'^{api}/config/(?P<name>[^/]+)$'.format(api = API), 'show_config')
+    ]
+    compiled_routes = [(method, re.compile(pattern), name) for (method, pattern, name) in routes]
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def dispatch(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        body = self.read_body()
+        if server.latency:
+            time.sleep(server.latency)
+        body = server._corrupt(method, url.path, body)
+
+        status = server._should_fail(method, url.path)
+        if status:
+            return self.reply(status, {'message': 'Injected failure'})
+
+        for (route_method, pattern, name) in self.compiled_routes:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                break
+        else:
+            return self.reply(404, {'message': 'No route for %s %s' % (method, url.path)})
+
+        params = {k: v[0] for (k, v) in parse_qs(url.query).items()}
+        try:
+            with server.lock:
+                result = getattr(self, name)(body = body, params = params, **match.groupdict())
+        except HttpError as e:
+            return self.reply(e.status, {'message': e.message})
+        except KeyError as e:
+            return self.reply(404, {'message': 'Not found: %s' % e})
+
+        if isinstance(result, tuple):
+            (content_type, payload) = result
+            return self.reply(200, payload, content_type)
+        return self.reply(200, result)
+
+    def read_body(self):
+        remaining = int(self.headers.get('content-length', 0))
+        parts = []
+        while remaining > 0:
+            part = self.rfile.read(min(remaining, THROTTLE_BLOCK_SIZE))
+            if not part:
+                break
+            self.server.throttle.consume(len(part))
+            parts.append(part)
+            remaining -= len(part)
+        body = b''.join(parts)
+        with self.server.lock:
+            self.server.bytes_received += len(body)
+        return body
+
+    def reply(self, status, payload, content_type = 'application/json'):
+        if content_type == 'application/json':
+            data = json.dumps(strip_private(payload)).encode('utf-8')
+        else:
+            data = payload
+        self.send_response(status)
+        self.send_header('content-type', content_type)
+        self.send_header('content-length', str(len(data)))
+        self.end_headers()
+        for start in range(0, len(data), THROTTLE_BLOCK_SIZE):
+            block = data[start:start + THROTTLE_BLOCK_SIZE]
+            self.server.throttle.consume(len(block))
+            self.wfile.write(block)
+        with self.server.lock:
+            self.server.bytes_sent += len(data)
+
+    def json_body(self, body):
+        return json.loads(body.decode('utf-8')) if body else {}
+
+    def revision(self, fourfour, seq):
+        return self.server.revisions[(fourfour, int(seq))]
+
+    def source(self, source_id):
+        return self.server.sources[int(source_id)]
+
+    # Views
+
+    def show_view(self, fourfour, **kwargs):
+        return self.server.views[fourfour]
+
+    def delete_view(self, fourfour, **kwargs):
+        del self.server.views[fourfour]
+        return {}
+
+    # Revisions
+
+    def create_view(self, body, **kwargs):
+        request = self.json_body(body)
+        fourfour = self.server.new_view(request.get('metadata', {}))
+        revision = self.server.new_revision(fourfour, request.get('action', {}), request.get('metadata', {}))
+        return self.server.revision_response(revision)
+
+    def create_revision(self, fourfour, body, **kwargs):
+        self.server.views[fourfour]
+        request = self.json_body(body)
+        action = request.get('action', {})
+        if 'config' in request:
+            action = {'type': self.server.configs[request['config']]['data_action']}
+        revision = self.server.new_revision(fourfour, action, request.get('metadata', {}))
+        return self.server.revision_response(revision)
+
+    def list_revisions(self, fourfour, **kwargs):
+        return [
+            self.server.revision_response(revision)
+            for ((ff, _), revision) in sorted(self.server.revisions.items())
+            if ff == fourfour
+        ]
+
+    def show_revision(self, fourfour, seq, **kwargs):
+        return self.server.revision_response(self.revision(fourfour, seq))
+
+    def update_revision(self, fourfour, seq, body, **kwargs):
+        revision = self.revision(fourfour, seq)
+        revision.update(self.json_body(body))
+        return self.server.revision_response(revision)
+
+    def discard_revision(self, fourfour, seq, **kwargs):
+        revision = self.revision(fourfour, seq)
+        revision['discarded_at'] = now_iso()
+        revision['closed_at'] = revision['discarded_at']
+        return self.server.revision_response(revision)
+
+    def plan_revision(self, fourfour, seq, **kwargs):
+        return {'resource': [{'type': 'upsert_task'}, {'type': 'publish'}]}
+
+    def apply_revision(self, fourfour, seq, body, **kwargs):
+        revision = self.revision(fourfour, seq)
+        request = self.json_body(body)
+        output_schema_id = request.get('output_schema_id', revision['output_schema_id'])
+        job = self.server.new_job(revision, output_schema_id)
+        return self.server.job_response(job)
+
+    # Configs
+
+    def create_config(self, body, **kwargs):
+        config = self.json_body(body)
+        self.server.configs[config['name']] = config
+        return self.config_response(config)
+
+    def show_config(self, name, **kwargs):
+        return self.config_response(self.server.configs[name])
+
+    def config_response(self, config):
+        return {
+            'resource': config,
+            'links': {'show': '{api}/config/{name}'.format(api = API, name = config['name'])}
+        }
+
+    def show_job(self, job_id, **kwargs):
+        return self.server.job_response(self.server.jobs[int(job_id)])
+
+    # Sources
+
+    def create_revision_source(self, fourfour, seq, body, **kwargs):
+        revision = self.revision(fourfour, seq)
+        request = self.json_body(body)
+        source = self.server.new_source(
+            request.get('source_type', {}),
+            request.get('parse_options', {}),
+            {'fourfour': fourfour, 'revision_seq': revision['revision_seq']}
+        )
+        return self.server.source_response(source)
+
+    def list_sources(self, fourfour, seq, **kwargs):
+        return [
+            self.server.source_response(source)
+            for (_, source) in sorted(self.server.sources.items())
+            if source['resource']['revision'] == {'fourfour': fourfour, 'revision_seq': int(seq)}
+        ]
+
+    def create_source(self, body, **kwargs):
+        request = self.json_body(body)
+        source = self.server.new_source(request.get('source_type', {}), request.get('parse_options', {}))
+        return self.server.source_response(source)
+
+    def show_source(self, source_id, **kwargs):
+        return self.server.source_response(self.source(source_id))
+
+    def update_source(self, source_id, body, **kwargs):
+        source = self.source(source_id)
+        request = self.json_body(body)
+        source['resource']['parse_options'].update(request.get('parse_options', {}))
+        return self.server.source_response(source)
+
+    def add_source_to_revision(self, source_id, body, **kwargs):
+        source = self.source(source_id)
+        source['resource']['revision'] = self.json_body(body)['revision']
+        return self.server.source_response(source)
+
+    def initiate_upload(self, source_id, body, **kwargs):
+        source = self.source(source_id)
+        body = self.json_body(body)
+        source['resource']['content_type'] = body.get('content_type')
+        source['chunks'] = {}
+        response = {
+            'preferred_chunk_size': self.server.preferred_chunk_size,
+            'preferred_upload_parallelism': self.server.preferred_upload_parallelism
+        }
+        if body.get('content_encoding') in self.server.content_encodings:
+            response['content_encoding'] = body['content_encoding']
+        return response
+
+    def upload_chunk(self, source_id, seq_num, byte_offset, body, **kwargs):
+        encoding = self.headers.get('content-encoding')
+        if encoding is not None:
+            if encoding not in self.server.content_encodings:
+                raise HttpError(415, 'Unsupported content-encoding %s' % encoding)
+            try:
+                body = DECODERS[encoding](body)
+            except Exception:
+                raise HttpError(400, 'Chunk %s could not be decoded as %s' % (seq_num, encoding))
+        checksum = self.headers.get(CHUNK_CHECKSUM_HEADER)
+        if checksum is not None and format_checksum(crc32(body)) != checksum.lower():
+            raise HttpError(400, 'Chunk %s does not match its checksum' % seq_num)
+        self.source(source_id)['chunks'][int(byte_offset)] = body
+        return {}
+
+    def commit_upload(self, source_id, seq_num, byte_offset, **kwargs):
+        source = self.source(source_id)
+        self.server._commit(source, int(byte_offset), self.headers.get(UPLOAD_CHECKSUM_HEADER))
+        return {}
+
+    # Schemas
+
+    def show_input_schema(self, source_id, input_schema_id, **kwargs):
+        source = self.source(source_id)
+        self.server._refresh_source(source)
+        schema = self.server._find_input_schema(source, int(input_schema_id))
+        links = self.server.source_response(source)['links']['input_schema_links']
+        return {
+            'resource': schema,
+            'links': json.loads(json.dumps(links).replace('{input_schema_id}', input_schema_id))
+        }
+
+    def transform(self, source_id, input_schema_id, body, **kwargs):
+        source = self.source(source_id)
+        output_schema = self.server._transform(source, int(input_schema_id), self.json_body(body)['output_columns'])
+        return self.server.output_schema_response(source, int(input_schema_id), output_schema)
+
+    def show_output_schema(self, source_id, input_schema_id, output_schema_id, **kwargs):
+        source = self.source(source_id)
+        output_schema = self.server._find_output_schema(source, int(input_schema_id), output_schema_id)
+        return self.server.output_schema_response(source, int(input_schema_id), output_schema)
+
+    def rows(self, source_id, input_schema_id, output_schema_id, params, **kwargs):
+        output_schema = self.server._find_output_schema(self.source(source_id), int(input_schema_id), output_schema_id)
+        return self.page(output_schema, range(len(output_schema['_rows'])), params)
+
+    def schema_errors(self, source_id, input_schema_id, output_schema_id, params, **kwargs):
+        output_schema = self.server._find_output_schema(self.source(source_id), int(input_schema_id), output_schema_id)
+        if 'text/csv' in self.headers.get('accept', ''):
+            return ('text/csv', self.errors_csv(output_schema))
+        return self.page(output_schema, output_schema['_error_rows'], params)
+
+    def page(self, output_schema, row_indexes, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 500))
+        rows = output_schema['_rows']
+        return [{'output_columns': output_schema['output_columns']}] + [
+            {'row': rows[i], 'offset': i}
+            for i in row_indexes[offset:offset + limit]
+        ]
+
+    def errors_csv(self, output_schema):
+        s = io.StringIO()
+        writer = csv.writer(s)
+        # The value of each column, as it was uploaded, then the error
+        # message for each column
+        columns = sorted(output_schema['output_columns'], key = lambda c: c['position'])
+        writer.writerow(
+            [c['field_name'] for c in columns] +
+            [c['field_name'] + ' error' for c in columns]
+        )
+        for i in output_schema['_error_rows']:
+            cells = output_schema['_rows'][i]
+            writer.writerow(
+                [error_csv_value(cell) for cell in cells] +
+                [cell['error']['message'] if 'error' in cell else '' for cell in cells]
+            )
+        return s.getvalue().encode('utf-8')
@@ -0,0 +1,266 @@
+import os
+import asyncio
+import time
+import tempfile
+import unittest
+from socrata import Socrata
+from socrata.aio import AsyncSocrata, AsyncInputSchema, AsyncJob
+from socrata.http import UnexpectedResponseException
+from socrata.output_schema import SchemaError
+from socrata.polling import ExponentialBackoff
+from socrata.wait import wait_all
+from test.fake_server import FakePublishingServer
+
+def create_source(socrata, filename = 'simple.csv', **kwargs):
+    revision = socrata.new({'name': 'test-view'})
+    source = revision.create_upload('foo.csv')
+    with open('test/fixtures/%s' % filename, 'rb') as f:
+        return (revision, source.csv(f, **kwargs))
+
+class TestFakeServer(unittest.TestCase):
+    def test_publish(self):
+        with FakePublishingServer(preferred_chunk_size = 16) as server:
+            socrata = Socrata(server.auth())
+            (revision, source) = create_source(socrata)
+            input_schema = source.get_latest_input_schema()
+            self.assertEqual([c['field_name'] for c in input_schema.attributes['input_columns']], ['a', 'b', 'c'])
+
+            output_schema = input_schema.get_latest_output_schema().wait_for_finish()
+            self.assertEqual(output_schema.rows(limit = 1), [{'a': {'ok': '1'}, 'b': {'ok': 'b'}, 'c': {'ok': '2'}}])
+
+            numbers = input_schema.transform({'output_columns': [
+                {'field_name': 'b', 'position': 0, 'transform': {'transform_expr': 'to_number(b)'}}
+            ]}).wait_for_finish()
+            self.assertTrue(numbers.any_errors())
+            self.assertEqual(numbers.summarize_schema_errors_csv()['rows'], numbers.attributes['error_count'])
+
+            revision.set_output_schema(numbers.attributes['id'])
+            self.assertEqual(revision.get_output_schema().attributes['id'], numbers.attributes['id'])
+
+            job = revision.apply(output_schema = numbers).wait_for_finish()
+            self.assertEqual(job.attributes['status'], 'successful')
+
+    def test_async_publish(self):
+        async def publish(server):
+            client = AsyncSocrata(server.auth())
+            try:
+                rev = await client.new({'name': 'test-view'})
+                source = await rev.create_upload('foo.csv')
+                with open('test/fixtures/simple.csv', 'rb') as f:
+                    source = await source.csv(f)
+                source = await source.wait_for_finish(sleeptime = 0.02)
+                [input_schema] = source.input_schemas
+                self.assertIsInstance(input_schema, AsyncInputSchema)
+                output_schema = await (await input_schema.get_latest_output_schema()).wait_for_finish(sleeptime = 0.02)
+                job = await rev.apply(output_schema = output_schema)
+                return await job.wait_for_finish(sleeptime = 0.02)
+            finally:
+                client.close()
+
+        with FakePublishingServer(processing_time = 0.1) as server:
+            job = asyncio.run(publish(server))
+        self.assertIsInstance(job, AsyncJob)
+        self.assertEqual(job.attributes['status'], 'successful')
+
+    def test_summarize_errors_csv(self):
+        data = b'a,b,c\n1,x,true\n2,3,nope\nz,4,false\n'
+        with FakePublishingServer() as server:
+            source = Socrata(server.auth()).new({'name': 'test-view'}).create_upload('foo.csv').csv(data)
+            output_schema = source.get_latest_input_schema().transform({'output_columns': [
+                {'field_name': 'a', 'position': 0, 'transform': {'transform_expr': 'to_number(a)'}},
+                {'field_name': 'b', 'position': 1, 'transform': {'transform_expr': 'to_number(b)'}},
+                {'field_name': 'c', 'position': 2, 'transform': {'transform_expr': 'to_boolean(c)'}}
+            ]}).wait_for_finish()
+
+            rows = list(output_schema.iter_schema_errors_csv())
+            self.assertEqual([row.values for row in rows], [
+                {'a': '1', 'b': 'x', 'c': 'true'},
+                {'a': '2', 'b': '3', 'c': 'nope'},
+                {'a': 'z', 'b': '4', 'c': 'false'}
+            ])
+            self.assertEqual(rows[0].errors, [SchemaError('b', 'Unable to convert "x" to number', 'x')])
+
+            summary = output_schema.summarize_schema_errors_csv()
+            self.assertEqual(summary, {
+                'rows': 3,
+                'errors': 3,
+                'columns': {'a': 1, 'b': 1, 'c': 1},
+                'error_types': {'Unable to convert "..." to number': 2, 'Unable to convert "..." to boolean': 1}
+            })
+
+    def test_get_output_schema_without_listing_sources(self):
+        with FakePublishingServer() as server:
+            (revision, source) = create_source(Socrata(server.auth()))
+            input_schema = source.get_latest_input_schema()
+            transformed = input_schema.transform({'output_columns': [
+                {'field_name': 'a', 'position': 0, 'transform': {'transform_expr': 'a'}}
+            ]})
+            for output_schema in [input_schema.get_latest_output_schema(), transformed]:
+                revision.set_output_schema(output_schema.attributes['id'])
+                self.assertEqual(revision.get_output_schema().attributes['id'], output_schema.attributes['id'])
+            self.assertEqual(server.request_count(r'/source$', method = 'GET'), 0)
+
+            server.inject_failure('/output/', status = 403)
+            with self.assertRaises(UnexpectedResponseException):
+                revision.get_output_schema()
+
+            server.inject_failure('/output/', status = 404)
+            self.assertEqual(revision.get_output_schema().attributes['id'], transformed.attributes['id'])
+            self.assertEqual(server.request_count(r'/source$', method = 'GET'), 1)
+
+    def test_chunk_failures_are_retried(self):
+        with FakePublishingServer(preferred_chunk_size = 8) as server:
+            server.inject_failure('/upload/2/', times = 2)
+            (_, source) = create_source(Socrata(server.auth()), backoff_seconds = 0)
+            self.assertEqual(server.request_count('/upload/2/'), 3)
+            self.assertEqual(len(source.input_schemas), 1)
+
+    def test_client_errors_are_not_retried(self):
+        with FakePublishingServer(preferred_chunk_size = 8) as server:
+            server.inject_failure('/upload/1/', status = 400)
+            with self.assertRaises(UnexpectedResponseException):
+                create_source(Socrata(server.auth()), backoff_seconds = 0)
+
+    def test_corrupted_chunks_fail_fast(self):
+        with FakePublishingServer(preferred_chunk_size = 8) as server:
+            server.inject_corruption('/upload/1/')
+            with self.assertRaises(UnexpectedResponseException) as e:
+                create_source(Socrata(server.auth()), backoff_seconds = 0)
+            self.assertEqual(e.exception.status, 400)
+            self.assertEqual(server.request_count('/commit/'), 0)
+
+    def test_corruption_goes_unnoticed_without_checksums(self):
+        with FakePublishingServer(preferred_chunk_size = 8) as server:
+            server.inject_corruption('/upload/1/')
+            (_, source) = create_source(Socrata(server.auth()), checksums = False)
+            self.assertEqual(server.request_count('/commit/'), 1)
+
+    def test_compressed_upload(self):
+        data = b'a,b,c\n' + b'1,some text,2\n' * 20000
+        with FakePublishingServer(preferred_chunk_size = 64 * 1024) as server:
+            socrata = Socrata(server.auth())
+            source = socrata.new({'name': 'test-view'}).create_upload('foo.csv').csv(data, compression = 'gzip')
+            self.assertEqual(source.get_latest_input_schema().attributes['total_rows'], 20000)
+            self.assertLess(server.bytes_received, len(data) // 10)
+
+    def test_compression_is_negotiated(self):
+        data = b'a,b,c\n' + b'1,some text,2\n' * 2000
+        with FakePublishingServer(content_encodings = ()) as server:
+            socrata = Socrata(server.auth())
+            source = socrata.new({'name': 'test-view'}).create_upload('foo.csv').csv(data, compression = 'gzip')
+            self.assertEqual(source.get_latest_input_schema().attributes['total_rows'], 2000)
+            self.assertGreater(server.bytes_received, len(data))
+
+    def test_non_ascii_text_upload(self):
+        data = 'a,b\ncafé,ü\nnaïve,日本\n'
+        with FakePublishingServer(preferred_chunk_size = 8) as server:
+            socrata = Socrata(server.auth())
+            revision = socrata.new({'name': 'test-view'})
+            source = revision.create_upload('foo.csv').csv(data)
+            self.assertEqual(source.get_latest_input_schema().attributes['total_rows'], 2)
+
+            with tempfile.NamedTemporaryFile('w', encoding = 'utf-8', suffix = '.csv', delete = False) as f:
+                f.write(data)
+            try:
+                with open(f.name, 'r', encoding = 'utf-8') as text:
+                    source = revision.create_upload('foo.csv').csv(text)
+            finally:
+                os.unlink(f.name)
+            self.assertEqual(source.get_latest_input_schema().attributes['total_rows'], 2)
+
+    def test_bulk_upload(self):
+        files = [
+            ('file%d.csv' % i, b'a,b\n' + b'1,2\n' * (100 * (i + 1)), 'text/csv')
+            for i in range(4)
+        ]
+        with FakePublishingServer(preferred_chunk_size = 256) as server:
+            revision = Socrata(server.auth()).new({'name': 'test-view'})
+            (results, stats) = revision.bulk_upload(files, parallelism = 3, backoff_seconds = 0)
+
+            self.assertEqual([error for (_, error) in results], [None] * 4)
+            self.assertEqual(
+                [source.get_latest_input_schema().attributes['total_rows'] for (source, _) in results],
+                [100, 200, 300, 400]
+            )
+            self.assertEqual(stats['bytes'], sum(len(data) for (_, data, _) in files))
+            self.assertEqual(stats['failed'], 0)
+            self.assertEqual([f['filename'] for f in stats['per_file']], [f for (f, _, _) in files])
+
+    def test_bulk_upload_failures_are_per_file(self):
+        files = [('file%d.csv' % i, b'a,b\n' + b'1,2\n' * 100, 'text/csv') for i in range(3)]
+        with FakePublishingServer(preferred_chunk_size = 64) as server:
+            revision = Socrata(server.auth()).new({'name': 'test-view'})
+            # Sources are numbered after the view and revision
+            server.inject_failure('/source/4/upload/2/', status = 400)
+            (results, stats) = revision.bulk_upload(files, parallelism = 2)
+
+            self.assertEqual(stats['failed'], 1)
+            self.assertEqual(len([1 for (source, error) in results if source is not None and error is None]), 2)
+            self.assertEqual(server.request_count('/source/4/commit/'), 0)
+
+    def test_bulk_upload_files_take_turns(self):
+        files = [('file%d.csv' % i, b'a,b\n' + b'1,2\n' * 100, 'text/csv') for i in range(3)]
+        with FakePublishingServer(preferred_chunk_size = 64) as server:
+            revision = Socrata(server.auth()).new({'name': 'test-view'})
+            revision.bulk_upload(files, parallelism = 1)
+            with server.lock:
+                chunks = [path.split('/')[5] for (_, path) in server.requests if '/upload/' in path]
+            self.assertEqual(len(set(chunks[:3])), 3)
+            self.assertEqual(chunks[:6], chunks[:3] * 2)
+
+    def test_failure_rate_is_repeatable(self):
+        def failed_requests():
+            with FakePublishingServer(failure_rate = 0.5, seed = 42) as server:
+                auth = server.auth()
+                statuses = []
+                for _ in range(20):
+                    try:
+                        Socrata(auth).views.lookup('nope-nope')
+                    except UnexpectedResponseException as e:
+                        statuses.append(e.status)
+                return statuses
+
+        first = failed_requests()
+        self.assertIn(503, first)
+        self.assertIn(404, first)
+        self.assertEqual(first, failed_requests())
+
+    def test_polling_waits_for_processing(self):
+        with FakePublishingServer(processing_time = 0.3) as server:
+            (_, source) = create_source(Socrata(server.auth()))
+            output_schema = source.get_latest_input_schema().get_latest_output_schema()
+            self.assertIsNone(output_schema.attributes['completed_at'])
+
+            started = time.time()
+            output_schema.wait_for_finish(polling = ExponentialBackoff(initial = 0.05, maximum = 0.2))
+            self.assertTrue(time.time() - started >= 0.2)
+            self.assertIsNotNone(output_schema.attributes['completed_at'])
+
+    def test_wait_all(self):
+        with FakePublishingServer(processing_time = 0.2) as server:
+            socrata = Socrata(server.auth())
+            output_schemas = [
+                create_source(socrata)[1].get_latest_input_schema().get_latest_output_schema()
+                for _ in range(5)
+            ]
+            results = wait_all(output_schemas, polling = ExponentialBackoff(initial = 0.05, maximum = 0.1))
+            self.assertEqual([error for (_, error) in results], [None] * 5)
+
+    def test_bandwidth_cap(self):
+        data = os.urandom(256 * 1024)
+        with FakePublishingServer(bandwidth = 1024 * 1024, preferred_chunk_size = 32 * 1024) as server:
+            socrata = Socrata(server.auth())
+            revision = socrata.new({'name': 'test-view'})
+            source = revision.source_as_blob('foo.bin')
+            started = time.time()
+            source.blob(data)
+            # 256KB through a 1MB/s link takes at least a quarter of a second
+            self.assertTrue(time.time() - started >= 0.25)
+            self.assertTrue(server.bytes_received >= len(data))
+
+    def test_latency(self):
+        with FakePublishingServer(latency = 0.05) as server:
+            socrata = Socrata(server.auth())
+            started = time.time()
+            socrata.new({'name': 'test-view'}).show()
+            self.assertTrue(time.time() - started >= 0.1)
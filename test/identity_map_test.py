@@ -0,0 +1,102 @@
+import time
+import pickle
+import unittest
+from socrata.authorization import Authorization
+from socrata.identity_map import IdentityMap
+from socrata.resource import Collection
+from socrata.sources import Source
+from socrata.revisions import Revision
+from socrata.output_schema import OutputSchema
+
+def source_response(source_id, schema_ids, finished_at = None):
+    return {
+        'resource': {
+            'id': source_id,
+            'finished_at': finished_at,
+            'schemas': [
+                {'id': schema_id, 'output_schemas': []}
+                for schema_id in schema_ids
+            ]
+        },
+        'links': {
+            'show': '/api/publishing/v1/source/%s' % source_id,
+            'input_schema_links': {
+                'show': '/api/publishing/v1/source/%s/schema/{input_schema_id}' % source_id,
+                'output_schema_links': {}
+            }
+        }
+    }
+
+class TestIdentityMap(unittest.TestCase):
+    def test_lru_eviction(self):
+        identity_map = IdentityMap(max_size = 2, ttl = None)
+        identity_map.put('a', 1)
+        identity_map.put('b', 2)
+        self.assertEqual(identity_map.get('a'), 1)
+        identity_map.put('c', 3)
+        self.assertIsNone(identity_map.get('b'))
+        self.assertEqual(identity_map.get('a'), 1)
+        self.assertEqual(identity_map.get('c'), 3)
+        self.assertEqual(identity_map.stats(), {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2})
+
+    def test_ttl(self):
+        identity_map = IdentityMap(ttl = 0.01)
+        identity_map.put('a', 1)
+        time.sleep(0.02)
+        self.assertIsNone(identity_map.get('a'))
+        self.assertEqual(len(identity_map), 0)
+
+    def test_same_id_is_the_same_object(self):
+        auth = Authorization('localhost', username = 'test', password = 'test', identity_map = IdentityMap())
+        collection = Collection(auth)
+
+        [first] = collection._subresources(Source, [source_response(1, [10])])
+        input_schema = first.input_schemas[0]
+        [second] = collection._subresources(Source, [source_response(1, [10], finished_at = 'now')])
+
+        self.assertIs(first, second)
+        self.assertEqual(first.attributes['finished_at'], 'now')
+        # The children came back out of the map too
+        self.assertIs(first.input_schemas[0], input_schema)
+        self.assertEqual(auth.identity_map.hits, 2)
+
+    def test_unchanged_resources_are_not_rebuilt(self):
+        auth = Authorization('localhost', username = 'test', password = 'test', identity_map = IdentityMap())
+        collection = Collection(auth)
+        source = collection._subresource(Source, source_response(1, [10]))
+        input_schemas = source.input_schemas
+        collection._subresource(Source, source_response(1, [10]))
+        self.assertIs(source.input_schemas, input_schemas)
+
+    def test_off_by_default(self):
+        auth = Authorization('localhost', username = 'test', password = 'test')
+        collection = Collection(auth)
+        first = collection._subresource(Source, source_response(1, []))
+        second = collection._subresource(Source, source_response(1, []))
+        self.assertIsNot(first, second)
+
+    def test_only_mapped_types_are_shared(self):
+        auth = Authorization('localhost', username = 'test', password = 'test', identity_map = IdentityMap())
+        collection = Collection(auth)
+        response = {'resource': {'id': 1}, 'links': {}}
+        self.assertIsNot(collection._subresource(Revision, response), collection._subresource(Revision, response))
+
+    def test_pickled_map_starts_empty(self):
+        identity_map = IdentityMap(max_size = 7)
+        identity_map.put('a', 1)
+        copy = pickle.loads(pickle.dumps(identity_map))
+        self.assertEqual(len(copy), 0)
+        self.assertEqual(copy.max_size, 7)
+        copy.put('b', 2)
+
+    def test_output_schemas_are_not_shared(self):
+        auth = Authorization('localhost', username = 'test', password = 'test', identity_map = IdentityMap())
+        collection = Collection(auth)
+        response = {'resource': {'id': 20, 'output_columns': []}, 'links': {}}
+
+        first = collection._subresource(OutputSchema, response)
+        first.drop_column('a')
+        second = collection._subresource(OutputSchema, response)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.column_deletions, [])
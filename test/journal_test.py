@@ -0,0 +1,93 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from socrata.journal import UploadJournal, fingerprint
+
+class TestUploadJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_acknowledged_chunks_survive_reopening(self):
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        self.assertFalse(journal.is_resumable())
+        journal.start({'preferred_chunk_size': 10})
+        journal.record(0, 0, 10)
+        journal.record(2, 20, 30)
+        journal.close()
+
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        self.assertTrue(journal.is_resumable())
+        self.assertEqual(journal.header, {'preferred_chunk_size': 10})
+        self.assertEqual(journal.acknowledged, {0: (0, 0, 10), 2: (2, 20, 30)})
+
+        journal.remove()
+        self.assertFalse(UploadJournal.open(self.directory, 42, 'abc').is_resumable())
+
+    def test_torn_writes_are_dropped(self):
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        journal.start({'preferred_chunk_size': 10})
+        journal.record(0, 0, 10)
+        journal.close()
+        with open(journal.path, 'a') as f:
+            f.write('[1, 10')
+
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        self.assertEqual(journal.acknowledged, {0: (0, 0, 10)})
+        journal.start(journal.header, journal.acknowledged)
+        journal.record(1, 10, 20)
+        journal.close()
+        self.assertEqual(UploadJournal.open(self.directory, 42, 'abc').acknowledged, {
+            0: (0, 0, 10),
+            1: (1, 10, 20)
+        })
+
+    def test_checksums_survive_reopening(self):
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        journal.start({'preferred_chunk_size': 10})
+        journal.record(0, 0, 10, 1234)
+        journal.record(1, 10, 20)
+        journal.close()
+
+        journal = UploadJournal.open(self.directory, 42, 'abc')
+        self.assertEqual(journal.checksums, {0: 1234})
+        journal.start(journal.header, journal.acknowledged, journal.checksums)
+        journal.close()
+        self.assertEqual(UploadJournal.open(self.directory, 42, 'abc').checksums, {0: 1234})
+
+    def test_fingerprints(self):
+        self.assertEqual(fingerprint(b'abc'), fingerprint(b'abc'))
+        self.assertNotEqual(fingerprint(b'abc'), fingerprint(b'abd'))
+        self.assertIsNone(fingerprint(x for x in [b'abc']))
+        self.assertIsNone(fingerprint(io.BytesIO(b'abc')))
+
+        path = os.path.join(self.directory, 'data.csv')
+        with open(path, 'wb') as f:
+            f.write(b'a,b,c\n1,2,3\n')
+        with open(path, 'rb') as f:
+            first = fingerprint(f)
+            self.assertEqual(f.tell(), 0)
+            f.read(6)
+            self.assertNotEqual(fingerprint(f), first)
+            self.assertEqual(f.tell(), 6)
+
+    def test_text_files_are_fingerprinted_by_their_bytes(self):
+        path = os.path.join(self.directory, 'data.csv')
+        with open(path, 'w', encoding = 'utf-8') as f:
+            # The end sample starts an odd number of bytes in, in the
+            # middle of an 'é'
+            f.write('a,\n' + 'é' * 700000)
+        with open(path, 'rb') as f:
+            binary = fingerprint(f)
+        with open(path, 'r', encoding = 'utf-8') as f:
+            f.read(3)
+            position = f.tell()
+            f.seek(0)
+            self.assertEqual(fingerprint(f), binary)
+            f.seek(position)
+            self.assertNotEqual(fingerprint(f), binary)
+            self.assertEqual(f.read(2), 'éé')
@@ -0,0 +1,87 @@
+import time
+import unittest
+from threading import Lock
+from socrata.lazy_pool import LazyThreadPoolExecutor
+
+class TestLazyThreadPoolExecutor(unittest.TestCase):
+    def test_maps_everything(self):
+        pool = LazyThreadPoolExecutor(4)
+        self.assertEqual(sorted(pool.map(lambda x: x * 2, range(100))), [x * 2 for x in range(100)])
+
+    def test_bounded_pool_applies_back_pressure(self):
+        lock = Lock()
+        pulled = [0]
+        def things():
+            for i in range(100):
+                with lock:
+                    pulled[0] += 1
+                yield i
+
+        pool = LazyThreadPoolExecutor(2, max_pending = 3)
+        results = pool.map(lambda x: x, things())
+        first = next(results)
+        # Give the workers time to run ahead as far as they can
+        time.sleep(0.2)
+        # 3 waiting in the queue, 1 taken by us, and one blocked in each worker
+        self.assertLessEqual(pulled[0], 1 + 3 + 2)
+        self.assertEqual(sorted([first] + list(results)), list(range(100)))
+
+    def test_exceptions_are_raised(self):
+        def boom(x):
+            raise ValueError(x)
+        pool = LazyThreadPoolExecutor(2)
+        with self.assertRaises(ValueError):
+            list(pool.map(boom, range(10)))
+
+    def test_failure_stops_the_workers(self):
+        pulled = []
+        def things():
+            for i in range(1000):
+                pulled.append(i)
+                yield i
+
+        def work(x):
+            if x == 5:
+                raise ValueError(x)
+            time.sleep(0.01)
+            return x
+
+        pool = LazyThreadPoolExecutor(4, max_pending = 4)
+        with self.assertRaises(ValueError):
+            list(pool.map(work, things()))
+        self.assertEqual(pool.failed_item, 5)
+        pool.shutdown()
+        self.assertLess(len(pulled), 20)
+        self.assertTrue(all(not t.is_alive() for t in pool.threads))
+
+    def test_in_flight_items_are_recorded(self):
+        def work(x):
+            if x == 0:
+                time.sleep(0.05)
+                raise ValueError(x)
+            time.sleep(1)
+            return x
+
+        pool = LazyThreadPoolExecutor(3)
+        with self.assertRaises(ValueError):
+            list(pool.map(work, range(3)))
+        self.assertEqual(pool.failed_item, 0)
+        self.assertEqual(sorted(pool.in_flight_at_failure), [1, 2])
+
+    def test_failing_worker_takes_nothing_else(self):
+        started = []
+        def work(x):
+            started.append(x)
+            if x == 0:
+                raise ValueError(x)
+            return x
+
+        pool = LazyThreadPoolExecutor(1, max_pending = 1)
+        results = pool.map(work, range(10))
+        # Let the worker get as far as it's going to before reading anything
+        time.sleep(0.2)
+        with self.assertRaises(ValueError):
+            list(results)
+        self.assertEqual(started, [0])
+        self.assertEqual(pool.failed_item, 0)
+        self.assertEqual(pool.in_flight_at_failure, [])
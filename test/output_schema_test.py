@@ -58,6 +58,17 @@ class TestOutputSchema(TestCase):
 
         assert output_schema.any_errors()
 
+    def test_iter_errors_csv(self):
+        output_schema = create_bad_output_schema(self.create_input_schema())
+        output_schema = output_schema.wait_for_finish(timeout = 300)
+
+        errors = list(output_schema.iter_schema_errors_csv(chunk_size = 16))
+        self.assertEqual(len(errors), output_schema.attributes['error_count'])
+        assert any('Unable to convert' in error.message for row in errors for error in row.errors)
+
+        summary = output_schema.summarize_schema_errors_csv()
+        self.assertEqual(summary['rows'], len(errors))
+
     def test_get_rows(self):
         output_schema = create_good_output_schema(self.create_input_schema())
         output_schema = output_schema.wait_for_finish(timeout = 300)
@@ -76,6 +87,29 @@ class TestOutputSchema(TestCase):
             {'b': {'ok': 'bfoo'}}
         ])
 
+    def test_get_rows_in_compact_formats(self):
+        output_schema = create_good_output_schema(self.create_input_schema())
+        output_schema = output_schema.wait_for_finish(timeout = 300)
+
+        self.assertEqual(output_schema.field_names(), ('b',))
+        self.assertEqual(output_schema.rows(limit = 2, row_format = 'tuple'), [
+            ({'ok': 'bfoo'},),
+            ({'ok': 'bfoo'},)
+        ])
+        self.assertEqual(output_schema.rows(limit = 2, row_format = 'columns'), {
+            'b': [{'ok': 'bfoo'}, {'ok': 'bfoo'}]
+        })
+
+    def test_iter_rows(self):
+        output_schema = create_good_output_schema(self.create_input_schema())
+        output_schema = output_schema.wait_for_finish(timeout = 300)
+
+        rows = list(output_schema.iter_rows(page_size = 1, prefetch = 3))
+        self.assertEqual(rows, output_schema.rows())
+
+        rows = list(output_schema.iter_rows(page_size = 3, offset = 2))
+        self.assertEqual(rows, output_schema.rows(offset = 2))
+
     def test_build_config(self):
         output_schema = create_good_output_schema(self.create_input_schema())
 
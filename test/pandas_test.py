@@ -29,6 +29,31 @@ class TestPandas(TestCase):
 
         assert 'show' in output_schema.list_operations()
 
+    def test_source_csv_in_batches(self):
+        rev = self.create_rev()
+        source = rev.create_upload('foo.csv')
+
+        df = pd.read_csv('test/fixtures/simple.csv')
+        source = source.df(df, batch_rows = 1)
+        output_schema = source.get_latest_input_schema().get_latest_output_schema()
+        output_schema = output_schema.wait_for_finish(timeout = 300)
+
+        names = sorted([oc['field_name'] for oc in output_schema.attributes['output_columns']])
+        self.assertEqual(['a', 'b', 'c'], names)
+        self.assertEqual(output_schema.attributes['total_rows'], len(df))
+
+    def test_output_schema_to_dataframe(self):
+        output_schema = self.create_output_schema()
+        output_schema = output_schema.wait_for_finish(timeout = 300)
+
+        df = output_schema.to_dataframe()
+        self.assertEqual(list(df.columns), ['b'])
+        self.assertEqual(str(df['b'].dtype), 'float64')
+        self.assertEqual(len(df), output_schema.attributes['total_rows'])
+
+        frames = list(output_schema.iter_dataframes(page_size = 1))
+        self.assertEqual(len(frames), len(df))
+
     def test_create_source_outside_rev(self):
         pub = Socrata(auth)
 
@@ -0,0 +1,103 @@
+import unittest
+from socrata.authorization import Authorization
+from socrata.http import UnexpectedResponseException
+from socrata.resource import Resource, WaitState
+from socrata.polling import FixedInterval, ExponentialBackoff
+
+class Thing(Resource):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        super(Thing, self).__init__(
+            Authorization('localhost', username = 'test', password = 'test'),
+            self.responses.pop(0)
+        )
+
+    def show(self):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return self._mutate(response)
+
+    def _progress(self):
+        return self.attributes.get('fraction')
+
+def response(**attributes):
+    return {'resource': attributes, 'links': {}}
+
+def wait_state(thing, polling, timeout = None):
+    return WaitState(
+        thing,
+        lambda m: m.attributes.get('done'),
+        lambda m: False,
+        lambda m: None,
+        timeout,
+        polling
+    )
+
+class TestPolling(unittest.TestCase):
+    def test_backoff_grows_to_the_cap(self):
+        thing = Thing([response()] * 7)
+        state = wait_state(thing, ExponentialBackoff(initial = 1, maximum = 10, jitter = 0))
+        delays = []
+        for _ in range(6):
+            state.on_response(thing.show())
+            delays.append(state.next_delay())
+        self.assertEqual(delays, [1, 2, 4, 8, 10, 10])
+
+    def test_jitter_only_shortens(self):
+        polling = ExponentialBackoff(initial = 4, maximum = 4, jitter = 0.5)
+        state = wait_state(Thing([response()]), polling)
+        for _ in range(100):
+            self.assertTrue(2 <= state.next_delay() <= 4)
+
+    def test_retry_after_is_honored(self):
+        thing = Thing([response()])
+        state = wait_state(thing, FixedInterval(1))
+        state.on_error(UnexpectedResponseException(429, {}, {'Retry-After': '30'}))
+        self.assertEqual(state.next_delay(), 30)
+
+    def test_client_errors_are_not_retried(self):
+        state = wait_state(Thing([response()]), FixedInterval(1))
+        with self.assertRaises(UnexpectedResponseException):
+            state.on_error(UnexpectedResponseException(404, {}))
+
+    def test_never_sleeps_past_the_timeout(self):
+        state = wait_state(Thing([response()]), FixedInterval(60), timeout = 5)
+        self.assertTrue(state.next_delay() <= 5.01)
+
+    def test_eta_bounds_the_backoff(self):
+        thing = Thing([response(fraction = 0.0), response(fraction = 0.5), response(fraction = 0.9)])
+        state = wait_state(thing, ExponentialBackoff(initial = 0.01, maximum = 60, jitter = 0))
+        state.polls = 20
+        state.on_response(thing.show())
+        state.started -= 1
+        state._first_progress = (state._first_progress[0] - 1, state._first_progress[1])
+        state.on_response(thing.show())
+        eta = state.eta()
+        self.assertIsNotNone(eta)
+        self.assertTrue(eta < 1)
+        self.assertAlmostEqual(state.next_delay(), eta, places = 2)
+
+    def test_wait_for_finish_uses_the_strategy(self):
+        class Counting(FixedInterval):
+            def __init__(self):
+                super(Counting, self).__init__(0)
+                self.calls = 0
+
+            def delay(self, state):
+                self.calls += 1
+                return 0
+
+        polling = Counting()
+        error = UnexpectedResponseException(503, {})
+        thing = Thing([response(), response(), error, response(done = True)])
+        thing._wait_for_finish(
+            lambda m: m.attributes.get('done'),
+            lambda m: False,
+            lambda m: None,
+            None,
+            1,
+            polling = polling
+        )
+        self.assertTrue(thing.attributes['done'])
+        self.assertEqual(polling.calls, 2)
@@ -0,0 +1,96 @@
+import unittest
+from socrata.authorization import Authorization
+from socrata.resource import Resource, ChildResourceSpec, parameterize_links
+
+class Thing(Resource):
+    def fetch(self, uri, limit = 10):
+        return (uri, limit)
+
+class Child(Resource):
+    built = 0
+
+    def __init__(self, *args, **kwargs):
+        Child.built += 1
+        super(Child, self).__init__(*args, **kwargs)
+
+class Parent(Resource):
+    def child_specs(self):
+        return [ChildResourceSpec(self, 'children', 'child_links', 'children', Child, 'child_id')]
+
+def parent(child_ids):
+    return Parent(
+        Authorization('localhost', username = 'test', password = 'test'),
+        parent_response(child_ids)
+    )
+
+def parent_response(child_ids):
+    return {
+        'resource': {'id': 1, 'children': [{'id': i} for i in child_ids]},
+        'links': {'child_links': {'show': '/child/{child_id}'}}
+    }
+
+def thing(links):
+    return Thing(
+        Authorization('localhost', username = 'test', password = 'test'),
+        {'resource': {'id': 1}, 'links': links}
+    )
+
+class TestResource(unittest.TestCase):
+    def test_links_fill_in_the_uri(self):
+        t = thing({'fetch': '/fetch/1'})
+        self.assertEqual(t.fetch(), ('/fetch/1', 10))
+        self.assertEqual(t.fetch(limit = 5), ('/fetch/1', 5))
+        self.assertEqual(t.fetch_uri, '/fetch/1')
+
+    def test_without_a_link_the_uri_is_passed_in(self):
+        t = thing({})
+        self.assertEqual(t.fetch('/elsewhere'), ('/elsewhere', 10))
+        with self.assertRaises(AttributeError):
+            t.fetch_uri
+
+    def test_links_without_a_method_are_not_implemented(self):
+        t = thing({'frobnicate': '/frobnicate/1'})
+        self.assertEqual(t.frobnicate_uri, '/frobnicate/1')
+        with self.assertRaises(NotImplementedError):
+            t.frobnicate()
+        with self.assertRaises(AttributeError):
+            t.defenestrate
+
+    def test_operations_follow_the_latest_response(self):
+        t = thing({'fetch': '/fetch/1', 'show': '/show/1', 'children': {'show': '/child/{id}'}})
+        self.assertEqual(sorted(t.list_operations()), ['fetch', 'show'])
+        self.assertEqual(t.child_ops, {'children': {'show': '/child/{id}'}})
+
+        t._mutate({'resource': {'id': 1}, 'links': {'fetch': '/fetch/2'}})
+        self.assertEqual(t.fetch(), ('/fetch/2', 10))
+        self.assertEqual(t.list_operations(), ['fetch'])
+
+    def test_parameterize_links(self):
+        links = {
+            'show': '/source/{id}',
+            'both': '/source/{id}/again/{id}',
+            'nested': {'show': '/source/{id}/schema/{schema_id}'}
+        }
+        self.assertEqual(parameterize_links(links, 'id', 7), {
+            'show': '/source/7',
+            'both': '/source/7/again/7',
+            'nested': {'show': '/source/7/schema/{schema_id}'}
+        })
+
+    def test_children_are_built_when_first_read(self):
+        Child.built = 0
+        p = parent([1, 2])
+        self.assertEqual(Child.built, 0)
+
+        children = p.children
+        self.assertEqual(Child.built, 2)
+        self.assertEqual([c.show_uri for c in children], ['/child/1', '/child/2'])
+        self.assertIs(p.children, children)
+        self.assertEqual(Child.built, 2)
+
+    def test_children_are_rebuilt_after_a_response(self):
+        p = parent([1])
+        first = p.children
+        p._mutate(parent_response([1, 2, 3]))
+        self.assertEqual([c.attributes['id'] for c in p.children], [1, 2, 3])
+        self.assertIsNot(p.children, first)
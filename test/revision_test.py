@@ -116,6 +116,19 @@ class TestSocrata(TestCase):
         output_schema = r.get_output_schema()
         self.assertTrue(output_schema != None)
 
+    def test_get_output_schema_again(self):
+        r = self.view.revisions.create_replace_revision()
+        input_schema = self.create_input_schema(rev = r)
+        output_schema_id = input_schema.get_latest_output_schema().attributes['id']
+        r.set_output_schema(output_schema_id)
+
+        first = r.get_output_schema()
+        self.assertIn(output_schema_id, r._output_schema_owners)
+        # The second time around, it's fetched directly
+        second = r._show_output_schema(output_schema_id)
+        self.assertEqual(second.attributes['id'], first.attributes['id'])
+        self.assertEqual(r.get_output_schema().attributes['id'], output_schema_id)
+
     def test_get_plan_without_permission(self):
         r = self.view.revisions.create_replace_revision()
         input_schema = self.create_input_schema(rev = r).wait_for_schema()
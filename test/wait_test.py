@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+from socrata.authorization import Authorization
+from socrata.http import TimeoutException, UnexpectedResponseException
+from socrata.resource import Resource, ResourceFailedException
+from socrata.polling import FixedInterval
+from socrata.wait import as_completed, wait_all, RequestBudget
+
+class Thing(Resource):
+    def __init__(self, name, responses):
+        self.name = name
+        self.polled = 0
+        self.responses = list(responses)
+        super(Thing, self).__init__(
+            Authorization('localhost', username = 'test', password = 'test'),
+            {'resource': {}, 'links': {}}
+        )
+
+    def show(self):
+        self.polled += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return self._mutate({'resource': response, 'links': {}})
+
+    def _finish_conditions(self):
+        return (
+            lambda m: m.attributes.get('finished'),
+            lambda m: m.attributes.get('failed')
+        )
+
+class TestWait(unittest.TestCase):
+    def test_yields_in_the_order_they_finish(self):
+        slow = Thing('slow', [{}, {}, {}, {'finished': True}])
+        fast = Thing('fast', [{'finished': True}])
+        medium = Thing('medium', [{}, {'finished': True}])
+
+        finished = [
+            (thing.name, error)
+            for (thing, error) in as_completed([slow, fast, medium], polling = FixedInterval(0.01), requests_per_second = None)
+        ]
+        self.assertEqual(finished, [('fast', None), ('medium', None), ('slow', None)])
+
+    def test_failures_are_yielded_not_raised(self):
+        failed = Thing('failed', [{'failed': True}])
+        missing = Thing('missing', [UnexpectedResponseException(404, {})])
+        flaky = Thing('flaky', [UnexpectedResponseException(503, {}), {'finished': True}])
+
+        results = wait_all([failed, missing, flaky], polling = FixedInterval(0), requests_per_second = None)
+        self.assertEqual([thing.name for (thing, _) in results], ['failed', 'missing', 'flaky'])
+        self.assertIsInstance(results[0][1], ResourceFailedException)
+        self.assertIsInstance(results[1][1], UnexpectedResponseException)
+        self.assertIsNone(results[2][1])
+
+    def test_timeout(self):
+        never = Thing('never', [{}])
+        [(_, error)] = wait_all([never], timeout = 0.05, polling = FixedInterval(0.01), requests_per_second = None)
+        self.assertIsInstance(error, TimeoutException)
+
+    def test_polls_from_the_calling_thread(self):
+        threads = set()
+        class Recording(Thing):
+            def show(self):
+                threads.add(threading.get_ident())
+                return super(Recording, self).show()
+
+        things = [Recording(str(i), [{}, {'finished': True}]) for i in range(20)]
+        wait_all(things, polling = FixedInterval(0), requests_per_second = None)
+        self.assertEqual(threads, {threading.get_ident()})
+
+    def test_budget_spaces_requests_out(self):
+        things = [Thing(str(i), [{'finished': True}]) for i in range(5)]
+        started = time.time()
+        wait_all(things, polling = FixedInterval(0), requests_per_second = 100)
+        # 5 polls at most 100 per second: the last one can't go out before 40ms
+        self.assertTrue(time.time() - started >= 0.04)
+        self.assertEqual(sum(thing.polled for thing in things), 5)
+
+    def test_unlimited_budget(self):
+        budget = RequestBudget(None)
+        started = time.time()
+        for _ in range(1000):
+            budget.wait()
+        self.assertTrue(time.time() - started < 0.5)